@@ -2,6 +2,34 @@
 A filesystem abstraction layer.
 """
 
+import importlib
+
 from filesystems._path import Path
 
 __all__ = ["Path"]
+
+_SUBMODULES = frozenset(
+    [
+        "archive",
+        "click",
+        "common",
+        "content",
+        "exceptions",
+        "interfaces",
+        "memory",
+        "native",
+        "overlay",
+        "sqlite",
+        "sync",
+        "trie",
+    ],
+)
+
+
+def __getattr__(name):
+    """
+    Import submodules only once they are used, keeping imports fast.
+    """
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return importlib.import_module(f"{__name__}.{name}")
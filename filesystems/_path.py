@@ -1,26 +1,54 @@
+"""
+Paths, which are imported along with the package.
+
+They are kept free of heavier dependencies, which would otherwise slow down
+e.g. command line tools needing only to parse some paths.
+
+They are declared to provide `filesystems.interfaces.Path` once the
+interfaces are imported.
+"""
+
+from functools import lru_cache
+import operator
 import os.path
 
-from pyrsistent import pvector
-from zope.interface import implementer
-import attr
+#: How many recently parsed strings `Path.from_string` remembers.
+_FROM_STRING_CACHE_SIZE = 1 << 16
 
-from filesystems import interfaces
-from filesystems.exceptions import InvalidPath
+_BYTES_SEP = os.fsencode(os.sep)
+_CURDIR = {os.curdir, os.fsencode(os.curdir)}
+_PARDIR = {os.pardir, os.fsencode(os.pardir)}
+
+
+def _comparison(compare):
+    """
+    A method comparing paths of the same kind by their segments.
+    """
+
+    def method(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return compare(self.segments, other.segments)
+
+    return method
 
 
-@implementer(interfaces.Path)
-@attr.s(
-    these={"segments": attr.ib()},
-    init=False,
-    repr=False,
-    unsafe_hash=True,
-)
 class Path:
     def __init__(self, *segments):
-        self.segments = pvector(segments)
+        self.segments = segments
+
+    def __hash__(self):
+        return hash((self.__class__, self.segments))
+
+    __eq__ = _comparison(operator.eq)
+    __ne__ = _comparison(operator.ne)
+    __lt__ = _comparison(operator.lt)
+    __le__ = _comparison(operator.le)
+    __gt__ = _comparison(operator.gt)
+    __ge__ = _comparison(operator.ge)
 
     def __div__(self, other):
-        if not isinstance(other, (bytes, str)):  # FIXME: Unicode paths
+        if not isinstance(other, (bytes, str)):
             return NotImplemented
         return self.descendant(other)
 
@@ -28,10 +56,21 @@ class Path:
         return f"<Path {self}>"
 
     def __str__(self):
-        return os.sep + os.sep.join(self.segments)
+        return _displayed(self.__fspath__())
+
+    def __fspath__(self):
+        """
+        The path as the OS sees it.
+
+        Paths whose segments are `bytes` are passed to the OS as bytes (and
+        so e.g. have their children listed as bytes too).
+        """
+        segments = self.segments
+        if segments and isinstance(segments[0], bytes):
+            return _BYTES_SEP + _BYTES_SEP.join(segments)
+        return os.sep + os.sep.join(segments)
 
     __truediv__ = __div__
-    __fspath__ = __str__
 
     @classmethod
     def cwd(cls):
@@ -46,18 +85,68 @@ class Path:
         return cls()
 
     @classmethod
-    def from_string(cls, path):
+    def from_string(cls, path, normalize=False):
         """
         Create a path out of an OS-specific string.
+
+        If the string is `bytes`, so are the path's segments.
+
+        If ``normalize`` is true, the path is also `normalized`.
+
+        Paths are immutable, so recently parsed strings are remembered and
+        parsed only once.
+        """
+        return _from_string(cls, path, normalize)
+
+    @classmethod
+    def from_strings(cls, paths):
         """
-        if not path:
-            raise InvalidPath(path)
+        Create paths out of many OS-specific strings.
 
-        _drive, rest = os.path.splitdrive(path.rstrip(os.sep))
-        split = rest.split(os.sep)
-        if split[0]:
-            return RelativePath(*split)
-        return cls(*split[1:])
+        Each directory is parsed once, and identical segments are shared
+        between paths, which is considerably cheaper than parsing each
+        string from scratch when the strings come from walking a tree (e.g.
+        from ``find``).
+        """
+        parsed = {}
+        names = {}
+
+        def parse(rest, sep):
+            path = parsed.get(rest)
+            if path is None:
+                parent, found, name = rest.rpartition(sep)
+                name = names.setdefault(name, name)
+                if not rest:
+                    path = cls()
+                elif not found:
+                    path = RelativePath(name)
+                else:
+                    path = parse(parent, sep)._child(name)
+                parsed[rest] = path
+            return path
+
+        results = []
+        splitdrive = os.path.splitdrive
+        for path in paths:
+            if not path:
+                raise _invalid(path)
+            sep = _BYTES_SEP if isinstance(path, bytes) else os.sep
+            _drive, rest = splitdrive(path.rstrip(sep))
+            parent, found, name = rest.rpartition(sep)
+            directory = parsed.get(parent) if found else None
+            if directory is None:
+                path = parse(rest, sep)
+            else:
+                path = directory._child(names.setdefault(name, name))
+                parsed[rest] = path
+            results.append(path)
+        return results
+
+    def _child(self, name):
+        """
+        A child of this path.
+        """
+        return self.__class__(*self.segments, name)
 
     def basename(self):
         return (self.segments or [""])[-1]
@@ -69,14 +158,13 @@ class Path:
         """
         The (top-down) direct ancestors of this path, including itself.
         """
-        segments = pvector()
-        for segment in self.segments[:-1]:
-            segments = segments.append(segment)
-            yield self.__class__(*segments)
+        segments = self.segments
+        for depth in range(1, len(segments)):
+            yield self.__class__(*segments[:depth])
         yield self
 
     def descendant(self, *segments):
-        return self.__class__(*self.segments.extend(segments))
+        return self.__class__(*self.segments, *segments)
 
     def parent(self):
         return self.__class__(*self.segments[:-1])
@@ -94,20 +182,40 @@ class Path:
         """
         return self
 
+    def normalized(self):
+        """
+        Collapse any ``.``, ``..`` or empty segments in this path.
+
+        This is purely lexical, and does not touch any filesystem, so unlike
+        ``realpath``, a ``..`` following a symbolic link removes the link
+        rather than going to the parent of its target.
+
+        The parent of the root is the root.
+        """
+        segments = _normalized(self.segments)
+        if segments is None:
+            return self
+        while segments and segments[0] in _PARDIR:
+            del segments[0]
+        return self.__class__(*segments)
+
 
-@implementer(interfaces.Path)
-@attr.s(
-    these={"segments": attr.ib()},
-    init=False,
-    repr=False,
-    unsafe_hash=True,
-)
 class RelativePath:
     def __init__(self, *segments):
-        self.segments = pvector(segments)
+        self.segments = segments
+
+    def __hash__(self):
+        return hash((self.__class__, self.segments))
+
+    __eq__ = _comparison(operator.eq)
+    __ne__ = _comparison(operator.ne)
+    __lt__ = _comparison(operator.lt)
+    __le__ = _comparison(operator.le)
+    __gt__ = _comparison(operator.gt)
+    __ge__ = _comparison(operator.ge)
 
     def __div__(self, other):
-        if not isinstance(other, (bytes, str)):  # FIXME: Unicode paths
+        if not isinstance(other, (bytes, str)):
             return NotImplemented
         return self.descendant(other)
 
@@ -115,10 +223,15 @@ class RelativePath:
         return f"<Path {self}>"
 
     def __str__(self):
-        return os.sep.join(self.segments)
+        return _displayed(self.__fspath__())
+
+    def __fspath__(self):
+        segments = self.segments
+        if segments and isinstance(segments[0], bytes):
+            return _BYTES_SEP.join(segments)
+        return os.sep.join(segments)
 
     __truediv__ = __div__
-    __fspath__ = __str__
 
     def basename(self):
         return (self.segments or [""])[-1]
@@ -133,20 +246,90 @@ class RelativePath:
         """
         The (top-down) direct ancestors of this path, including itself.
         """
-        segments = pvector()
-        for segment in self.segments[:-1]:
-            segments = segments.append(segment)
-            yield self.__class__(*segments)
+        segments = self.segments
+        for depth in range(1, len(segments)):
+            yield self.__class__(*segments[:depth])
         yield self
 
     def descendant(self, *segments):
-        return self.__class__(*self.segments.extend(segments))
+        return self.__class__(*self.segments, *segments)
 
     def sibling(self, name):
         return self.parent() / name
 
+    _child = Path._child
+
     def relative_to(self, path):
         """
         Resolve this path against another ``Path``.
         """
         return path.descendant(*self.segments)
+
+    def normalized(self):
+        """
+        Collapse any ``.``, ``..`` or empty segments in this path.
+
+        See `Path.normalized`. Leading ``..`` segments are kept, and a path
+        which collapses entirely becomes ``.``.
+        """
+        segments = _normalized(self.segments)
+        if segments is None:
+            return self
+        if not segments:
+            curdir = os.curdir
+            if isinstance(self.segments[0], bytes):
+                curdir = os.fsencode(curdir)
+            segments = [curdir]
+        return self.__class__(*segments)
+
+
+def _invalid(path):
+    """
+    An exception for an invalid path.
+
+    Exceptions are only imported when needed, as they depend on ``attrs``.
+    """
+    from filesystems.exceptions import InvalidPath
+
+    return InvalidPath(path)
+
+
+def _displayed(path):
+    """
+    A string for displaying an OS path, which may be `bytes`.
+    """
+    return path if isinstance(path, str) else os.fsdecode(path)
+
+
+def _normalized(segments):
+    """
+    Collapse the given segments, or return None if they need no collapsing.
+    """
+    if all(
+        each and each not in _CURDIR and each not in _PARDIR
+        for each in segments
+    ):
+        return None
+
+    normalized = []
+    for segment in segments:
+        if segment in _PARDIR:
+            if normalized and normalized[-1] not in _PARDIR:
+                normalized.pop()
+            else:
+                normalized.append(segment)
+        elif segment and segment not in _CURDIR:
+            normalized.append(segment)
+    return normalized
+
+
+@lru_cache(maxsize=_FROM_STRING_CACHE_SIZE)
+def _from_string(cls, path, normalize=False):
+    if not path:
+        raise _invalid(path)
+
+    sep = _BYTES_SEP if isinstance(path, bytes) else os.sep
+    _drive, rest = os.path.splitdrive(path.rstrip(sep))
+    split = rest.split(sep)
+    path = RelativePath(*split) if split[0] else cls(*split[1:])
+    return path.normalized() if normalize else path
@@ -0,0 +1,452 @@
+"""
+A read-only filesystem serving the contents of a zip or (uncompressed) tar.
+
+The archive's central directory (or its headers, for a tar) is read once,
+into an index from each path to its entry, so that looking up a path never
+scans the archive. The archive itself is memory mapped, and members stored
+without compression are read directly out of the mapping, without copying
+them out of it first. Compressed members are decompressed as they are read.
+
+Symbolic links within the archive are followed within the archive, with
+absolute links being relative to its root.
+
+The archive stays open (and mapped) until the filesystem is closed, either
+with ``fs.close()`` or by using it as a context manager.
+"""
+
+import io
+import mmap
+import stat
+import struct
+import tarfile
+import time
+import zipfile
+
+from pyrsistent import pset
+import attr
+
+from filesystems import Path, common, exceptions
+from filesystems._path import RelativePath
+
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_UNIX = 3  # the "system" which created a zip member, when it has a mode
+
+
+def FS(path):
+    """
+    Create a read-only filesystem from the zip or tar archive at a path.
+
+    The filesystem should be closed once it is no longer needed.
+
+    Arguments:
+
+        path:
+
+            the (native) path to a zip file or an uncompressed tar file,
+            whose root will appear as the root of the created filesystem
+
+    """
+    file = open(path, "rb")  # noqa: SIM115
+    try:
+        if zipfile.is_zipfile(file):
+            state = _Archive.from_zip(file=file)
+        else:
+            file.seek(0)
+            state = _Archive.from_tar(file=file)
+    except (tarfile.ReadError, zipfile.BadZipFile):
+        file.close()
+        raise exceptions.InvalidImage(path) from None
+    except BaseException:
+        file.close()
+        raise
+    return state.FS(name="ArchiveFS")
+
+
+def _segments(name):
+    """
+    The segments of a path within an archive, which always uses slashes.
+    """
+    return Path(*name.split("/")).normalized().segments
+
+
+def _target(name):
+    """
+    The path a symbolic link within an archive points to.
+    """
+    if name.startswith("/"):
+        return Path(*_segments(name))
+    return RelativePath(*name.split("/"))
+
+
+@attr.s(frozen=True, slots=True)
+class _Entry:
+    """
+    Something within an archive.
+
+    Members stored without compression carry a view of their contents, and
+    the rest carry the member to decompress when read.
+    """
+
+    mode = attr.ib()
+    ino = attr.ib()
+    size = attr.ib(default=0)
+    mtime = attr.ib(default=0)
+    data = attr.ib(default=None, repr=False)
+    member = attr.ib(default=None, repr=False)
+    target = attr.ib(default=None)
+
+
+class _Member(io.RawIOBase):
+    """
+    A read-only file reading directly from a view of an archive member.
+    """
+
+    def __init__(self, data):
+        self._data = data
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        start = self._position
+        chunk = self._data[start : start + len(buffer)]
+        read = len(chunk)
+        buffer[:read] = chunk
+        self._position += read
+        return read
+
+    def readall(self):
+        start, self._position = self._position, len(self._data)
+        return self._data[start:].tobytes()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._data)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+
+@attr.s
+class _Archive:
+
+    _handle = attr.ib(repr=False)
+    _archive = attr.ib(repr=False)
+    _mapped = attr.ib(repr=False)
+    _entries = attr.ib(factory=dict, repr=False)
+    _children = attr.ib(factory=dict, repr=False)
+
+    @classmethod
+    def from_zip(cls, file):
+        """
+        Index a zip file from its central directory.
+        """
+        archive = zipfile.ZipFile(file)
+        mapped = memoryview(
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ),
+        )
+        state = cls(handle=file, archive=archive, mapped=mapped)
+        for info in archive.infolist():
+            mode = info.external_attr >> 16
+            if info.create_system != _UNIX or not stat.S_IFMT(mode):
+                if info.is_dir():
+                    mode = stat.S_IFDIR | 0o755
+                else:
+                    mode = stat.S_IFREG | 0o644
+
+            data = member = None
+            if not stat.S_ISDIR(mode):
+                start = _stored_at(mapped=mapped, info=info)
+                if start is None:
+                    member = info
+                else:
+                    data = mapped[start : start + info.file_size]
+
+            target = None
+            if stat.S_ISLNK(mode):
+                if data is None:
+                    contents = archive.read(info)
+                else:
+                    contents = data.tobytes()
+                target = _target(contents.decode())
+
+            mtime = time.mktime((*info.date_time, 0, 0, -1))
+            state._add(
+                segments=_segments(info.filename),
+                mode=mode,
+                size=info.file_size,
+                mtime=mtime,
+                data=data,
+                member=member,
+                target=target,
+            )
+        return state._frozen()
+
+    @classmethod
+    def from_tar(cls, file):
+        """
+        Index an uncompressed tar file from its headers.
+        """
+        archive = tarfile.open(fileobj=file, mode="r:")  # noqa: SIM115
+        mapped = memoryview(
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ),
+        )
+        state = cls(handle=file, archive=archive, mapped=mapped)
+        for info in archive:
+            segments = _segments(info.name)
+            if info.islnk():
+                linked = state._entries.get(Path(*_segments(info.linkname)))
+                if linked is not None:
+                    state._add(segments=segments, entry=linked)
+                continue
+
+            mode = info.mode
+            data = member = target = None
+            if info.isdir():
+                mode |= stat.S_IFDIR
+            elif info.issym():
+                mode |= stat.S_IFLNK
+                target = _target(info.linkname)
+            elif info.isreg():
+                mode |= stat.S_IFREG
+                if info.sparse is None:
+                    start = info.offset_data
+                    data = mapped[start : start + info.size]
+                else:
+                    member = info
+            else:
+                continue
+
+            state._add(
+                segments=segments,
+                mode=mode,
+                size=info.size,
+                mtime=info.mtime,
+                data=data,
+                member=member,
+                target=target,
+            )
+        return state._frozen()
+
+    def _add(self, segments, entry=None, **kwargs):
+        """
+        Index an entry, along with any directories containing it.
+        """
+        path = Path.root()
+        for segment in segments:
+            if path not in self._entries:
+                self._entries[path] = self._directory()
+            self._children.setdefault(path, set()).add(segment)
+            path = path / segment
+
+        if entry is None:
+            entry = _Entry(ino=len(self._entries) + 1, **kwargs)
+        self._entries[path] = entry
+        if stat.S_ISDIR(entry.mode):
+            self._children.setdefault(path, set())
+        else:
+            self._children.pop(path, None)
+
+    def _directory(self):
+        return _Entry(mode=0o755 | stat.S_IFDIR, ino=len(self._entries) + 1)
+
+    def _frozen(self):
+        """
+        Finish indexing, freezing the contents of each directory.
+        """
+        self._entries.setdefault(Path.root(), self._directory())
+        self._children = {
+            path: pset(names) for path, names in self._children.items()
+        }
+        self._children.setdefault(Path.root(), pset())
+        return self
+
+    def FS(self, name):
+        return common.create(
+            name=name,
+            create_file=staticmethod(self.create_file),
+            open_file=staticmethod(self.open_file),
+            remove_file=staticmethod(self.remove_file),
+            create_directory=staticmethod(self.create_directory),
+            list_directory=staticmethod(self.list_directory),
+            remove_empty_directory=staticmethod(self.remove_empty_directory),
+            temporary_directory=staticmethod(self.temporary_directory),
+            stat=staticmethod(self.stat),
+            lstat=staticmethod(self.lstat),
+            link=staticmethod(self.link),
+            readlink=staticmethod(self.readlink),
+            realpath=staticmethod(self.realpath),
+            remove=staticmethod(self.remove),
+            digest=staticmethod(self.digest),
+            **common._closing(close=staticmethod(self.close)),
+        )()
+
+    def close(self):
+        """
+        Close the archive, after which nothing within it can be read.
+
+        Any files opened from it should be closed first.
+        """
+        if self._handle.closed:
+            return
+        self._archive.close()
+        for entry in self._entries.values():
+            if entry.data is not None:
+                entry.data.release()
+        mmap = self._mapped.obj
+        self._mapped.release()
+        mmap.close()
+        self._handle.close()
+
+    def _extract(self, member):
+        if isinstance(self._archive, zipfile.ZipFile):
+            return self._archive.open(member)
+        return self._archive.extractfile(member)
+
+    def _lookup(self, path):
+        """
+        Find the entry at the given path, without following a final link.
+        """
+        entry = self._entries.get(path)
+        if entry is not None:
+            return path, entry
+
+        for ancestor in list(path.heritage())[:-1]:
+            entry = self._entries.get(ancestor)
+            if entry is None:
+                break
+            if stat.S_ISLNK(entry.mode):
+                rest = path.segments[len(ancestor.segments) :]
+                try:
+                    real = self.realpath(path=ancestor)
+                    return self._lookup(real.descendant(*rest))
+                except exceptions._FileSystemError as error:
+                    raise error.__class__(path) from None
+            if not stat.S_ISDIR(entry.mode):
+                raise exceptions.NotADirectory(path)
+        raise exceptions.FileNotFound(path)
+
+    def _followed(self, path):
+        """
+        Find the entry at the given path, following a final link.
+        """
+        real, entry = self._lookup(path)
+        if stat.S_ISLNK(entry.mode):
+            try:
+                real, entry = self._lookup(self.realpath(path=real))
+            except exceptions._FileSystemError as error:
+                raise error.__class__(path) from None
+        return real, entry
+
+    def _file(self, path):
+        _, entry = self._followed(path)
+        if stat.S_ISDIR(entry.mode):
+            raise exceptions.IsADirectory(path)
+        return entry
+
+    def create_directory(self, path, with_parents, allow_existing):
+        raise exceptions.ReadOnly(path)
+
+    def list_directory(self, path):
+        real, entry = self._followed(path)
+        if not stat.S_ISDIR(entry.mode):
+            raise exceptions.NotADirectory(path)
+        return self._children[real]
+
+    def remove_empty_directory(self, path):
+        raise exceptions.ReadOnly(path)
+
+    def temporary_directory(self):
+        raise exceptions.ReadOnly(Path.root())
+
+    def create_file(self, path):
+        raise exceptions.ReadOnly(path)
+
+    def open_file(self, path, mode):
+        mode = common._parse_mode(mode=mode)
+        if not mode.read:
+            raise exceptions.ReadOnly(path)
+
+        entry = self._file(path)
+        if entry.data is None:
+            file = self._extract(entry.member)
+        else:
+            file = io.BufferedReader(_Member(entry.data))
+
+        if mode.text:
+            return io.TextIOWrapper(file)
+        return file
+
+    def digest(self, path, algorithm="sha256", tree_chunk_size=None):
+        entry = self._file(path)
+        if entry.data is None:
+            with self._extract(entry.member) as file:
+                return common._digest_file(
+                    file=file,
+                    algorithm=algorithm,
+                    tree_chunk_size=tree_chunk_size,
+                )
+        return common._digest_buffer(
+            buffer=entry.data,
+            algorithm=algorithm,
+            tree_chunk_size=tree_chunk_size,
+        )
+
+    def remove_file(self, path):
+        raise exceptions.ReadOnly(path)
+
+    def remove(self, path):
+        raise exceptions.ReadOnly(path)
+
+    def link(self, source, to):
+        raise exceptions.ReadOnly(to)
+
+    def readlink(self, path):
+        _, entry = self._lookup(path)
+        if not stat.S_ISLNK(entry.mode):
+            raise exceptions.NotASymlink(path)
+        return entry.target
+
+    def realpath(self, path, seen=pset()):
+        return common._realpath(fs=self, path=path, seen=seen)
+
+    def stat(self, path):
+        _, entry = self._followed(path)
+        return common._stat_result(
+            mode=entry.mode,
+            ino=entry.ino,
+            size=entry.size,
+            mtime=entry.mtime,
+        )
+
+    def lstat(self, path):
+        _, entry = self._lookup(path)
+        return common._stat_result(
+            mode=entry.mode,
+            ino=entry.ino,
+            size=entry.size,
+            mtime=entry.mtime,
+        )
+
+
+def _stored_at(mapped, info):
+    """
+    Where a zip member's contents start, if they are stored uncompressed.
+    """
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+        return None
+    start = info.header_offset
+    signature, name, extra = _LOCAL_HEADER.unpack_from(mapped, start)
+    if signature != b"PK\x03\x04":
+        return None
+    return start + _LOCAL_HEADER.size + name + extra
@@ -0,0 +1,5 @@
+"""
+Benchmarks for filesystems.
+
+Each module is a runnable `pyperf` benchmark.
+"""
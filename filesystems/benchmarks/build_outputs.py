@@ -0,0 +1,39 @@
+"""
+A benchmark for writing build outputs, most of which are unchanged.
+
+Rebuilding writes the same outputs over and over. A content-addressed
+filesystem hashes contents it has already stored rather than writing them out
+again, but still records the digest of each under its name (in memory, by
+default).
+"""
+
+import atexit
+
+from pyperf import Runner
+
+from filesystems import content, native
+
+OUTPUTS = 200
+SIZE = 64 * 1024
+
+
+def rebuild(fs, directory):
+    """
+    Write a set of outputs, each identical to the last build's.
+    """
+    for i in range(OUTPUTS):
+        contents = bytes([i % 256]) * SIZE
+        fs.set_contents(directory / f"output{i}", contents, mode="b")
+
+
+if __name__ == "__main__":
+    runner = Runner()
+
+    fs = native.FS()
+    tempdir = fs.temporary_directory()
+    atexit.register(fs.remove, tempdir)
+    runner.bench_func("rebuild (native)", rebuild, fs, tempdir)
+
+    fs = content.FS(store=tempdir / "store")
+    directory = fs.temporary_directory()
+    runner.bench_func("rebuild (content)", rebuild, fs, directory)
@@ -0,0 +1,55 @@
+"""
+A benchmark for operating on files deep within a directory tree.
+
+The kernel walks each component of a path on each call it is given one,
+which anchored filesystems (see `filesystems.native.anchored`) avoid.
+"""
+
+import atexit
+
+from pyperf import Runner
+
+from filesystems import native
+
+DEPTH = 20
+FILES = 100
+
+
+def stat_all(fs, paths):
+    """
+    Stat each of the given paths.
+    """
+    for path in paths:
+        fs.stat(path)
+
+
+def create_and_remove(fs, paths):
+    """
+    Create and then remove a sibling of each of the given paths.
+    """
+    for path in paths:
+        fs.touch(path.sibling(path.basename() + "-new"))
+        fs.remove_file(path.sibling(path.basename() + "-new"))
+
+
+if __name__ == "__main__":
+    fs = native.FS()
+    tempdir = fs.temporary_directory()
+    atexit.register(fs.remove, tempdir)
+
+    deep = tempdir.descendant(*(f"level{i}" for i in range(DEPTH)))
+    fs.create_directory(deep, with_parents=True)
+    paths = [deep / f"file{i}" for i in range(FILES)]
+    for path in paths:
+        fs.touch(path)
+
+    runner = Runner()
+    filesystems = [("native", native.FS()), ("anchored", native.anchored())]
+    for name, each in filesystems:
+        runner.bench_func(f"stat ({name})", stat_all, each, paths)
+        runner.bench_func(
+            f"create and remove ({name})",
+            create_and_remove,
+            each,
+            paths,
+        )
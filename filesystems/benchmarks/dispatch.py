@@ -0,0 +1,55 @@
+"""
+A benchmark for the per-call overhead of filesystem methods.
+
+Each operation here is cheap, so the time taken to get from a method call to
+the backend doing the work shows up clearly.
+"""
+
+import atexit
+
+from pyperf import Runner
+
+from filesystems import memory, native
+
+CALLS = 1000
+
+
+def open_file(fs, path):
+    """
+    Open (and close) a file repeatedly.
+    """
+    for _ in range(CALLS):
+        fs.open(path).close()
+
+
+def stat(fs, path):
+    """
+    Stat a file repeatedly.
+    """
+    for _ in range(CALLS):
+        fs.stat(path)
+
+
+def exists(fs, path):
+    """
+    Check whether a file exists repeatedly.
+    """
+    for _ in range(CALLS):
+        fs.exists(path)
+
+
+if __name__ == "__main__":
+    runner = Runner()
+    filesystems = [
+        ("native", native.FS()),
+        ("anchored", native.anchored()),
+        ("memory", memory.FS()),
+    ]
+    for name, fs in filesystems:
+        tempdir = fs.temporary_directory()
+        atexit.register(fs.remove, tempdir)
+        path = tempdir / "file"
+        fs.touch(path)
+
+        for each in open_file, stat, exists:
+            runner.bench_func(f"{each.__name__} ({name})", each, fs, path)
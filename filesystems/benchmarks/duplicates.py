@@ -0,0 +1,50 @@
+"""
+A benchmark for building an in-memory tree full of duplicate files.
+
+Trees of vendored packages or generated stubs contain many identical files.
+Run with ``--track-memory`` to compare how much memory each tree takes.
+"""
+
+from pyperf import Runner
+
+from filesystems import Path, memory
+
+PACKAGES = 100
+FILES = 50
+SIZE = 4096
+
+
+def build(deduplicate):
+    """
+    Build a tree of identical packages.
+    """
+    fs = memory.FS(deduplicate=deduplicate)
+    for package in range(PACKAGES):
+        directory = fs.create_directory(Path(f"package{package}"))
+        for i in range(FILES):
+            contents = bytes([i]) * SIZE
+            fs.set_contents(directory / f"module{i}.py", contents, mode="b")
+    return fs
+
+
+def copied():
+    """
+    Build a tree by copying a single package.
+    """
+    fs = memory.FS()
+    original = fs.create_directory(Path("package0"))
+    for i in range(FILES):
+        contents = bytes([i]) * SIZE
+        fs.set_contents(original / f"module{i}.py", contents, mode="b")
+    for package in range(1, PACKAGES):
+        directory = fs.create_directory(Path(f"package{package}"))
+        for i in range(FILES):
+            fs.copy(original / f"module{i}.py", directory / f"module{i}.py")
+    return fs
+
+
+if __name__ == "__main__":
+    runner = Runner()
+    runner.bench_func("duplicated", build, False)
+    runner.bench_func("deduplicated", build, True)
+    runner.bench_func("copied", copied)
@@ -0,0 +1,57 @@
+"""
+A benchmark for probing paths which (mostly) do not exist.
+
+Filesystem methods report failures by raising exceptions, which is costly
+when most probes fail. ``exists`` and the ``try_*`` methods avoid creating
+them.
+"""
+
+from contextlib import suppress
+import atexit
+
+from pyperf import Runner
+
+from filesystems import exceptions, memory, native
+
+PROBES = 1000
+
+
+def stat_raising(fs, paths):
+    """
+    Probe each path by stat'ing it, catching the exceptions raised.
+    """
+    for path in paths:
+        with suppress(exceptions.FileNotFound):
+            fs.stat(path)
+
+
+def try_stat(fs, paths):
+    """
+    Probe each path with ``try_stat``.
+    """
+    for path in paths:
+        fs.try_stat(path)
+
+
+def exists(fs, paths):
+    """
+    Probe each path with ``exists``.
+    """
+    for path in paths:
+        fs.exists(path)
+
+
+if __name__ == "__main__":
+    runner = Runner()
+    filesystems = [
+        ("native", native.FS()),
+        ("anchored", native.anchored()),
+        ("memory", memory.FS()),
+    ]
+    for name, fs in filesystems:
+        tempdir = fs.temporary_directory()
+        atexit.register(fs.remove, tempdir)
+        paths = [tempdir / f"missing{i}" for i in range(PROBES)]
+
+        for each in stat_raising, try_stat, exists:
+            runner.bench_func(f"{each.__name__} ({name})", each, fs, paths)
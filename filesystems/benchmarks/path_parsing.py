@@ -0,0 +1,55 @@
+"""
+A benchmark for parsing many path strings, as from the output of ``find``.
+
+Such output lists each directory followed by its contents, so consecutive
+strings share long prefixes, and the same strings tend to be seen again and
+again (e.g. when processing logs).
+"""
+
+import os
+
+from pyperf import Runner
+
+from filesystems import Path
+from filesystems._path import _from_string
+
+FANOUT = 8
+DEPTH = 4
+FILES = 10
+
+
+def find(root, depth=DEPTH):
+    """
+    Produce the output ``find`` would for a directory tree of the given depth.
+    """
+    yield root
+    for i in range(FILES):
+        yield os.path.join(root, f"file{i}.txt")
+    if depth:
+        for i in range(FANOUT):
+            yield from find(os.path.join(root, f"directory{i}"), depth - 1)
+
+
+def uncached(strings):
+    """
+    Parse each string from scratch.
+    """
+    for each in strings:
+        _from_string.__wrapped__(Path, each)
+
+
+def cached(strings):
+    """
+    Parse each string, remembering those already seen.
+    """
+    for each in strings:
+        Path.from_string(each)
+
+
+if __name__ == "__main__":
+    strings = list(find(os.path.join(os.sep, "home", "user", "project")))
+
+    runner = Runner()
+    runner.bench_func("from_string (uncached)", uncached, strings)
+    runner.bench_func("from_string (cached)", cached, strings)
+    runner.bench_func("from_strings", Path.from_strings, strings)
@@ -0,0 +1,55 @@
+"""
+A benchmark for writing, listing and removing many small files.
+
+Each file on a native filesystem costs an inode and a system call or more
+to list or remove. An SQLite-backed filesystem stores them as rows, removes
+a whole tree in a single statement, and, when writing within one
+transaction, commits all of the files at once.
+"""
+
+import atexit
+
+from pyperf import Runner
+
+from filesystems import Path, native, sqlite
+
+FILES = 1000
+
+
+def write_list_remove(fs, directory):
+    """
+    Write many small files into a directory, list it, then remove it.
+    """
+    fs.create_directory(directory)
+    for i in range(FILES):
+        fs.set_contents(directory / str(i), "contents")
+    fs.list_directory(directory)
+    fs.remove(directory)
+
+
+def in_one_transaction(fs, directory):
+    """
+    As above, but within a single transaction.
+    """
+    with fs.transaction():
+        write_list_remove(fs=fs, directory=directory)
+
+
+if __name__ == "__main__":
+    runner = Runner()
+
+    fs = native.FS()
+    tempdir = fs.temporary_directory()
+    atexit.register(fs.remove, tempdir)
+    runner.bench_func(
+        "write_list_remove (native)",
+        write_list_remove,
+        fs,
+        tempdir / "files",
+    )
+
+    fs = sqlite.FS(path=tempdir / "fs.sqlite")
+    atexit.register(fs.close)
+    for each in write_list_remove, in_one_transaction:
+        name = f"{each.__name__} (sqlite)"
+        runner.bench_func(name, each, fs, Path("files"))
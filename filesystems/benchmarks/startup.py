@@ -0,0 +1,41 @@
+"""
+A benchmark for how long importing the package (and its backends) takes.
+
+Command line tools often need only to parse a few paths, so a slow import
+is paid on every invocation.
+"""
+
+import sys
+
+from pyperf import Runner
+
+MODULES = ["filesystems", "filesystems.native", "filesystems.memory"]
+
+#: The most time (in seconds) importing the package should take, beyond
+#: starting the interpreter itself.
+BUDGET = 0.05
+
+
+if __name__ == "__main__":
+    runner = Runner()
+    python = runner.bench_command(
+        "python -c pass",
+        [sys.executable, "-c", "pass"],
+    )
+    imports = {
+        module: runner.bench_command(
+            f"import {module}",
+            [sys.executable, "-c", f"import {module}"],
+        )
+        for module in MODULES
+    }
+
+    # Benchmarks are only returned to the process running the others.
+    package = imports["filesystems"]
+    if python is not None and package is not None:
+        taken = package.mean() - python.mean()
+        if taken > BUDGET:
+            sys.exit(
+                f"importing filesystems took {taken * 1000:.1f}ms, "
+                f"more than its {BUDGET * 1000:.0f}ms budget",
+            )
@@ -0,0 +1,59 @@
+"""
+A benchmark for sharing one in-memory filesystem between many threads.
+
+Each thread mostly reads (stat'ing and reading files), and occasionally
+writes. Readers take no locks, so on a free-threaded build of Python (e.g.
+``python3.13t``) reading should scale with the number of threads, while on
+other builds this shows the overhead of contending for the GIL.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from pyperf import Runner
+
+from filesystems import Path, memory
+
+THREADS = [1, 2, 4, 8, 16, 32]
+OPERATIONS = 1000
+FILES = 100
+
+#: One in how many operations writes.
+WRITES = 20
+
+
+def work(fs, thread):
+    """
+    Read and write files within a filesystem.
+    """
+    directory = Path(f"thread{thread}")
+    fs.create_directory(directory)
+    for i in range(OPERATIONS):
+        path = Path(f"file{i % FILES}")
+        if i % WRITES:
+            fs.stat(path)
+            fs.get_contents(path)
+        else:
+            fs.set_contents(directory / path.basename(), "contents")
+    fs.remove(directory)
+
+
+def run(loops, threads):
+    """
+    Run the given number of threads, each doing the same amount of work.
+    """
+    fs = memory.FS()
+    for i in range(FILES):
+        fs.set_contents(Path(f"file{i}"), "contents")
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        for _ in range(loops):
+            list(pool.map(work, [fs] * threads, range(threads)))
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    runner = Runner()
+    for threads in THREADS:
+        runner.bench_time_func(f"{threads} threads", run, threads)
@@ -4,13 +4,19 @@ Common helpers for filesystems.
 
 from contextlib import contextmanager
 from fnmatch import fnmatch
+from functools import cache, partial
+import hashlib
+import os
 import stat
 
-from pyrsistent import pset
+from pyrsistent import pmap, pset
 import attr
 
 from filesystems import Path, exceptions
 
+#: The size of the reads done when streaming a file's contents through a hash.
+_DIGEST_CHUNK_SIZE = 1 << 20
+
 
 def _realpath(fs, path, seen=pset()):
     """
@@ -39,6 +45,54 @@ def _realpath(fs, path, seen=pset()):
     return real
 
 
+@attr.s(frozen=True)
+class _Resolver:
+    """
+    Follows links through a filesystem as a whole.
+
+    Links are not left to whichever underlying filesystem (or layer) holds
+    them. Its ``readlink`` is only given paths which have already had any links
+    above their last segment resolved.
+    """
+
+    _readlink = attr.ib()
+
+    def readlink(self, path):
+        try:
+            return self._readlink(path)
+        except exceptions.NotADirectory:
+            raise exceptions.NotASymlink(path) from None
+
+    def realpath(self, path, seen=pset()):
+        return _realpath(fs=self, path=path, seen=seen)
+
+
+@contextmanager
+def _resolved(realpath, path, follow):
+    """
+    Resolve any links along the given path (and at its end, if following).
+
+    Errors are reported for the path as given, rather than for wherever it
+    led.
+    """
+    if follow:
+        real = realpath(path)
+    elif path.segments:
+        real = realpath(path.parent()) / path.basename()
+    else:
+        real = path
+
+    try:
+        yield real
+    except exceptions._FileSystemError as error:
+        if real != path:
+            if error.value == real:
+                raise error.__class__(path) from None
+            if error.value == real.parent():
+                raise error.__class__(path.parent()) from None
+        raise
+
+
 def _recursive_remove(fs, path):
     """
     A recursive, non-atomic directory removal.
@@ -51,6 +105,155 @@ def _recursive_remove(fs, path):
         fs.remove_file(path=path)
 
 
+def _digest(fs, path, algorithm="sha256", tree_chunk_size=None):
+    """
+    Hash the contents of the file at the given path.
+
+    The file is streamed through the hash in large chunks rather than being
+    read into memory all at once.
+
+    If a ``tree_chunk_size`` is given, the file is instead split into ranges
+    of that size, each of which is hashed separately, and the result is the
+    hash of the concatenation of those digests (see `_tree_digest`), which
+    allows filesystems to hash the ranges of very large files in parallel.
+    """
+    with fs.open(path=path, mode="rb") as file:
+        return _digest_file(
+            file=file,
+            algorithm=algorithm,
+            tree_chunk_size=tree_chunk_size,
+        )
+
+
+def _check_tree_chunk_size(tree_chunk_size):
+    """
+    Ranges of files being tree hashed must have some size.
+    """
+    if tree_chunk_size is not None and tree_chunk_size <= 0:
+        raise ValueError(
+            f"tree_chunk_size must be positive, not {tree_chunk_size!r}",
+        )
+
+
+def _digest_file(file, algorithm, tree_chunk_size):
+    """
+    Hash an open (binary) file, producing the same result as `_digest`.
+    """
+    if tree_chunk_size is None:
+        hash = hashlib.new(algorithm)
+        for chunk in iter(partial(file.read, _DIGEST_CHUNK_SIZE), b""):
+            hash.update(chunk)
+        return hash.hexdigest()
+    chunks = iter(partial(file.read, tree_chunk_size), b"")
+    leaves = (hashlib.new(algorithm, chunk).digest() for chunk in chunks)
+    return _tree_digest(algorithm=algorithm, leaves=leaves)
+
+
+def _digest_buffer(buffer, algorithm, tree_chunk_size):
+    """
+    Hash an in-memory buffer, producing the same result as `_digest`.
+    """
+    if tree_chunk_size is None:
+        return hashlib.new(algorithm, buffer).hexdigest()
+    chunks = (
+        buffer[start : start + tree_chunk_size]
+        for start in range(0, len(buffer), tree_chunk_size)
+    )
+    return _tree_digest(
+        algorithm=algorithm,
+        leaves=(hashlib.new(algorithm, chunk).digest() for chunk in chunks),
+    )
+
+
+def _tree_digest(algorithm, leaves):
+    """
+    Combine the digests of each range of a file into one (hex) digest.
+    """
+    tree = hashlib.new(algorithm)
+    for leaf in leaves:
+        tree.update(leaf)
+    return tree.hexdigest()
+
+
+def _digest_many(fs, paths, max_workers=None, **kwargs):
+    """
+    Hash the contents of many files concurrently.
+
+    Hashing large buffers releases the GIL, so files are hashed across a pool
+    of threads. Any additional arguments are passed along to ``fs.digest``.
+
+    Returns a mapping from each path to its digest.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        digests = pool.map(lambda path: fs.digest(path=path, **kwargs), paths)
+        return pmap(zip(paths, digests))
+
+
+@attr.s(frozen=True)
+class DiskUsage:
+    """
+    The space used by the files within a directory and its subdirectories.
+    """
+
+    path = attr.ib()
+    size = attr.ib(default=0)
+    files = attr.ib(default=0)
+    directories = attr.ib(default=0)
+
+    def including(self, other):
+        """
+        Include the usage of a subdirectory in this one.
+        """
+        return attr.evolve(
+            self,
+            size=self.size + other.size,
+            files=self.files + other.files,
+            directories=self.directories + other.directories + 1,
+        )
+
+
+def _disk_usage(fs, path, by_depth=0):
+    """
+    Total up the (apparent) size of files within a directory.
+
+    Yields the usage of each directory at most ``by_depth`` levels beneath the
+    given one as soon as it has been totalled up (i.e. subdirectories before
+    their parents), finishing with the given directory itself.
+
+    Symbolic links are not followed (but are counted as files), and files
+    which are hard linked multiple times within the directory are counted
+    once.
+    """
+    seen = set()
+
+    def usage(path, depth):
+        total = DiskUsage(path=path)
+        for name in fs.list_directory(path=path):
+            child = path / name
+            lstat = fs.lstat(path=child)
+            if stat.S_ISDIR(lstat.st_mode):
+                subdirectory = yield from usage(path=child, depth=depth + 1)
+                total = total.including(subdirectory)
+                continue
+
+            total = attr.evolve(total, files=total.files + 1)
+            if lstat.st_nlink > 1:
+                inode = lstat.st_dev, lstat.st_ino
+                if inode in seen:
+                    continue
+                seen.add(inode)
+            total = attr.evolve(total, size=total.size + lstat.st_size)
+
+        if depth <= by_depth:
+            yield total
+        return total
+
+    return usage(path=path, depth=0)
+
+
 def create(
     name,
     create_file,
@@ -66,43 +269,95 @@ def create(
     readlink,
     realpath=_realpath,
     remove=_recursive_remove,
+    try_stat=None,
+    try_lstat=None,
+    try_readlink=None,
+    digest=_digest,
+    disk_usage=_disk_usage,
+    **kwargs,
 ):
     """
     Create a new kind of filesystem.
+
+    The non-raising ``try_stat``, ``try_lstat`` and ``try_readlink`` default
+    to catching the exceptions raised by ``stat``, ``lstat`` and
+    ``readlink``, but can be provided by filesystems which can avoid raising
+    them in the first place.
+
+    Any additional keyword arguments become further methods specific to this
+    kind of filesystem.
+
+    Methods may be given as static methods, which will not be passed the
+    filesystem (e.g. because they are bound methods of some other object
+    holding its state), avoiding an extra call just to discard it.
     """
+    if isinstance(open_file, staticmethod):
+        open_file_without_fs = open_file.__func__
 
-    def _create_directory(fs, path, with_parents=False, allow_existing=False):
-        create_directory(
+        def open(fs, path, mode="r"):
+            return open_file_without_fs(path, mode)
+
+    else:
+
+        def open(fs, path, mode="r"):
+            return open_file(fs, path, mode)
+
+    if isinstance(digest, staticmethod):
+        digest_without_fs = digest.__func__
+
+        def _checked_digest(
             fs,
             path,
-            with_parents=with_parents,
-            allow_existing=allow_existing,
-        )
-        return path
+            algorithm="sha256",
+            tree_chunk_size=None,
+        ):
+            _check_tree_chunk_size(tree_chunk_size)
+            return digest_without_fs(path, algorithm, tree_chunk_size)
+
+    else:
+
+        def _checked_digest(
+            fs,
+            path,
+            algorithm="sha256",
+            tree_chunk_size=None,
+        ):
+            _check_tree_chunk_size(tree_chunk_size)
+            return digest(fs, path, algorithm, tree_chunk_size)
+
+    if isinstance(create_directory, staticmethod):
+        create_directory_without_fs = create_directory.__func__
+
+        def _create_directory(
+            fs,
+            path,
+            with_parents=False,
+            allow_existing=False,
+        ):
+            create_directory_without_fs(path, with_parents, allow_existing)
+            return path
+
+    else:
+
+        def _create_directory(
+            fs,
+            path,
+            with_parents=False,
+            allow_existing=False,
+        ):
+            create_directory(fs, path, with_parents, allow_existing)
+            return path
 
     methods = dict(
         create=create_file,
-        open=lambda fs, path, mode="r": open_file(
-            fs=fs,
-            path=path,
-            mode=mode,
-        ),
+        open=open,
         remove_file=remove_file,
         create_directory=_create_directory,
         list_directory=list_directory,
         remove_empty_directory=remove_empty_directory,
         temporary_directory=temporary_directory,
-        get_contents=lambda fs, path, mode="": _get_contents(
-            fs=fs,
-            path=path,
-            mode=mode,
-        ),
-        set_contents=lambda fs, path, contents, mode="": _set_contents(
-            fs=fs,
-            path=path,
-            contents=contents,
-            mode=mode,
-        ),
+        get_contents=_get_contents,
+        set_contents=_set_contents,
         create_with_contents=_create_with_contents,
         remove=remove,
         removing=_removing,
@@ -110,6 +365,9 @@ def create(
         lstat=lstat,
         link=link,
         readlink=readlink,
+        try_stat=try_stat or _failing_with_class("stat"),
+        try_lstat=try_lstat or _failing_with_class("lstat"),
+        try_readlink=try_readlink or _failing_with_class("readlink"),
         realpath=realpath,
         exists=_exists,
         is_dir=_is_dir,
@@ -118,10 +376,74 @@ def create(
         touch=_touch,
         children=_children,
         glob_children=_glob_children,
+        digest=_checked_digest,
+        digest_many=_digest_many,
+        disk_usage=disk_usage,
+        **kwargs,
     )
     return attr.s(unsafe_hash=True)(type(name, (object,), methods))
 
 
+def _failing_with_class(name):
+    """
+    Wrap a method so that it returns the class of any exception it raises.
+    """
+
+    def method(fs, path):
+        try:
+            return getattr(fs, name)(path=path)
+        except exceptions._FileSystemError as error:
+            return error.__class__
+
+    method.__name__ = f"try_{name}"
+    return method
+
+
+def _failed(result):
+    """
+    Did a ``try_*`` method fail (and therefore return an exception class)?
+    """
+    return isinstance(result, type)
+
+
+def _stat_result(mode, ino=0, nlink=1, size=0, mtime=0):
+    """
+    Stat results for a non-native file, most of whose fields are meaningless.
+    """
+    return os.stat_result((mode, ino, 0, nlink, 0, 0, size, 0, mtime, 0))
+
+
+def _closing(close):
+    """
+    Methods for filesystems holding resources which should be released.
+
+    They may be closed either explicitly, or by using them as context
+    managers.
+    """
+    return dict(
+        close=close,
+        __enter__=lambda fs: fs,
+        __exit__=lambda fs, *exc_info: fs.close(),
+    )
+
+
+@contextmanager
+def _rooted_at(root):
+    """
+    Report errors from within a directory as if it were the root.
+
+    For filesystems holding their contents within a directory of another.
+    """
+    try:
+        yield
+    except exceptions._FileSystemError as error:
+        path = error.value
+        depth = len(root.segments)
+        if isinstance(path, Path) and path.segments[:depth] == root.segments:
+            raise error.__class__(Path(*path.segments[depth:])) from None
+        raise
+
+
 @contextmanager
 def _removing(fs, path):
     try:
@@ -130,12 +452,12 @@ def _removing(fs, path):
         fs.remove(path=path)
 
 
-def _get_contents(fs, path, mode):
+def _get_contents(fs, path, mode=""):
     with fs.open(path=path, mode="r" + mode) as file:
         return file.read()
 
 
-def _set_contents(fs, path, contents, mode):
+def _set_contents(fs, path, contents, mode=""):
     with fs.open(path=path, mode="w" + mode) as file:
         file.write(contents)
 
@@ -173,10 +495,13 @@ def _exists(fs, path):
 
     E.g., should EPERM or ELOOP be raised, an exception will bubble up.
     """
-    try:
-        fs.stat(path)
-    except (exceptions.FileNotFound, exceptions.NotADirectory):
-        return False
+    result = fs.try_stat(path=path)
+    if _failed(result):
+        if result is exceptions.FileNotFound:
+            return False
+        if result is exceptions.NotADirectory:
+            return False
+        raise result(path)
     return True
 
 
@@ -189,10 +514,7 @@ def _is_dir(fs, path):
 
     E.g., should EPERM or ELOOP be raised, an exception will bubble up.
     """
-    try:
-        return stat.S_ISDIR(fs.stat(path).st_mode)
-    except exceptions.FileNotFound:
-        return False
+    return _is(fs.try_stat, stat.S_ISDIR, path)
 
 
 def _is_file(fs, path):
@@ -204,10 +526,7 @@ def _is_file(fs, path):
 
     E.g., should EPERM or ELOOP be raised, an exception will bubble up.
     """
-    try:
-        return stat.S_ISREG(fs.stat(path).st_mode)
-    except exceptions.FileNotFound:
-        return False
+    return _is(fs.try_stat, stat.S_ISREG, path)
 
 
 def _is_link(fs, path):
@@ -219,10 +538,16 @@ def _is_link(fs, path):
 
     E.g., should EPERM or ELOOP be raised, an exception will bubble up.
     """
-    try:
-        return stat.S_ISLNK(fs.lstat(path).st_mode)
-    except exceptions.FileNotFound:
-        return False
+    return _is(fs.try_lstat, stat.S_ISLNK, path)
+
+
+def _is(try_stat, is_kind, path):
+    result = try_stat(path=path)
+    if _failed(result):
+        if result is exceptions.FileNotFound:
+            return False
+        raise result(path)
+    return is_kind(result.st_mode)
 
 
 @attr.s(frozen=True)
@@ -277,7 +602,14 @@ class _FileMode:
         return self.activity + self.mode
 
 
+@cache
 def _parse_mode(mode):
+    """
+    Parse (and validate) a mode string.
+
+    There are few distinct modes, and parsed modes are immutable, so each is
+    parsed only once.
+    """
     parameters = {}
     first = mode[:1]
     rest = mode[1:]
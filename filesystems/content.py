@@ -0,0 +1,308 @@
+"""
+A filesystem storing file contents once each, by their hash.
+
+Contents live in a native directory (the store), named by their SHA-256
+digest and spread across fan-out directories named by the digest's leading
+characters, so that no one directory grows too large. Contents already in
+the store are never written again, and a file whose contents are already
+stored takes up no further room.
+
+Which path holds which contents is kept by a separate filesystem (by default
+an in-memory one), in which each file holds only the digest of its
+contents. Directories and symbolic links live there as they are, with links
+being stored verbatim, and followed through this filesystem as a whole, so
+that absolute links are relative to its root rather than to that of the
+filesystem holding them. Files keep their
+previous contents until they are closed after being written.
+
+Contents are never removed from the store, even once no file uses them.
+"""
+
+from functools import partial
+import hashlib
+import io
+import os
+import stat
+
+from pyrsistent import pset
+import attr
+
+from filesystems import Path, common, exceptions, memory, native
+
+_EMPTY = hashlib.sha256(b"").hexdigest()
+
+
+def FS(store, names_fs=None, names=Path.root(), fan_out=2):
+    """
+    Create a filesystem storing file contents by their hash.
+
+    Arguments:
+
+        store:
+
+            the path to a native directory which will hold the contents of
+            files, and which will be created if it does not exist
+
+        names_fs:
+
+            a filesystem to hold the digests of the contents at each path,
+            by default a new in-memory one
+
+        names:
+
+            a directory within ``names_fs`` which will hold them
+
+        fan_out:
+
+            how many levels of (256) directories to spread contents across
+
+    """
+    if names_fs is None:
+        names_fs = memory.FS()
+    state = _ContentAddressed(
+        store=store,
+        names_fs=names_fs,
+        names=names,
+        fan_out=fan_out,
+    )
+    state._store_fs.create_directory(
+        store,
+        with_parents=True,
+        allow_existing=True,
+    )
+    return state.FS(name="ContentAddressedFS")
+
+
+class _Writer(io.BytesIO):
+    """
+    A file being written, whose contents are stored once it is closed.
+    """
+
+    def __init__(self, state, path, contents=b""):
+        super().__init__(contents)
+        self.seek(0, io.SEEK_END)
+        self._state = state
+        self._path = path
+
+    def close(self):
+        if not self.closed:
+            self._state._written(path=self._path, contents=self.getvalue())
+        super().close()
+
+
+@attr.s
+class _ContentAddressed:
+
+    _store = attr.ib()
+    _names_fs = attr.ib()
+    _names = attr.ib()
+    _fan_out = attr.ib()
+    _store_fs = attr.ib(factory=native.FS, repr=False)
+
+    #: Digests of the contents known to be in the store.
+    _stored = attr.ib(factory=set, repr=False)
+
+    def FS(self, name):
+        return common.create(
+            name=name,
+            create_file=staticmethod(self.create_file),
+            open_file=staticmethod(self.open_file),
+            remove_file=staticmethod(self.remove_file),
+            create_directory=staticmethod(self.create_directory),
+            list_directory=staticmethod(self.list_directory),
+            remove_empty_directory=staticmethod(self.remove_empty_directory),
+            temporary_directory=staticmethod(self.temporary_directory),
+            stat=staticmethod(self.stat),
+            lstat=staticmethod(self.lstat),
+            link=staticmethod(self.link),
+            readlink=staticmethod(self.readlink),
+            realpath=staticmethod(self.realpath),
+            digest=staticmethod(self.digest),
+            stored_at=staticmethod(self.stored_at),
+        )()
+
+    def _in_names(self, method, path, *args, **kwargs):
+        """
+        Call a method on the filesystem holding the names of files.
+        """
+        with common._rooted_at(self._names):
+            name = self._names.descendant(*path.segments)
+            return getattr(self._names_fs, method)(name, *args, **kwargs)
+
+    def _digest_of(self, path):
+        """
+        The digest of the contents of the file at the given path.
+
+        Files are empty while they are first being written.
+        """
+        return self._in_names("get_contents", path) or _EMPTY
+
+    def _object(self, digest):
+        """
+        The path within the store holding the given contents.
+        """
+        fan_out = (digest[i : i + 2] for i in range(0, self._fan_out * 2, 2))
+        return self._store.descendant(*fan_out, digest)
+
+    def _contents(self, digest):
+        if digest == _EMPTY:
+            return b""
+        return self._store_fs.get_contents(self._object(digest), mode="b")
+
+    def _put(self, digest, contents):
+        """
+        Store the given contents, unless they already are.
+        """
+        if digest in self._stored:
+            return
+
+        object = self._object(digest)
+        if not self._store_fs.exists(object):
+            self._store_fs.create_directory(
+                object.parent(),
+                with_parents=True,
+                allow_existing=True,
+            )
+            incomplete = object.sibling(f".{os.urandom(8).hex()}")
+            self._store_fs.set_contents(incomplete, contents, mode="b")
+            os.replace(incomplete, object)
+        self._stored.add(digest)
+
+    def _written(self, path, contents):
+        digest = hashlib.sha256(contents).hexdigest()
+        self._put(digest=digest, contents=contents)
+        self._in_names("set_contents", path, digest)
+
+    def _sized(self, result, path):
+        """
+        Stat results for the given path, with the size of its contents.
+        """
+        if not stat.S_ISREG(result.st_mode):
+            return result
+        digest = self._digest_of(path)
+        if digest == _EMPTY:
+            size = 0
+        else:
+            size = self._store_fs.stat(self._object(digest)).st_size
+        return os.stat_result(
+            (*result[:6], size, *result[7:]),
+            {
+                "st_atime": result.st_atime,
+                "st_mtime": result.st_mtime,
+                "st_ctime": result.st_ctime,
+            },
+        )
+
+    def _resolved(self, path, follow):
+        return common._resolved(self.realpath, path=path, follow=follow)
+
+    def stored_at(self, path):
+        """
+        The path within the store holding the contents of the given file.
+        """
+        with self._resolved(path, follow=True) as real:
+            return self._object(self._digest_of(real))
+
+    def create_directory(self, path, with_parents, allow_existing):
+        with self._resolved(path, follow=False) as real:
+            if allow_existing:
+                # Links are followed here, not by the names filesystem.
+                try:
+                    existing = self.stat(real)
+                except (exceptions.FileNotFound, exceptions.NotADirectory):
+                    pass
+                else:
+                    if stat.S_ISDIR(existing.st_mode):
+                        return
+                    raise exceptions.FileExists(real)
+            self._in_names(
+                "create_directory",
+                real,
+                with_parents=with_parents,
+                allow_existing=allow_existing,
+            )
+
+    def list_directory(self, path):
+        with self._resolved(path, follow=True) as real:
+            return self._in_names("list_directory", real)
+
+    def remove_empty_directory(self, path):
+        with self._resolved(path, follow=False) as real:
+            self._in_names("remove_empty_directory", real)
+
+    def temporary_directory(self):
+        directory = Path(os.urandom(16).hex())
+        self.create_directory(
+            path=directory,
+            with_parents=False,
+            allow_existing=False,
+        )
+        return directory
+
+    def create_file(self, path):
+        with self._resolved(path, follow=False) as real:
+            self._in_names("create", real).close()
+        return io.TextIOWrapper(_Writer(state=self, path=real))
+
+    def open_file(self, path, mode):
+        mode = common._parse_mode(mode=mode)
+        with self._resolved(path, follow=True) as real:
+            if mode.read:
+                digest = self._digest_of(real)
+                if digest == _EMPTY:
+                    file = io.BytesIO()
+                else:
+                    file = self._store_fs.open(self._object(digest), "rb")
+            else:
+                contents = b""
+                try:
+                    digest = self._digest_of(real)
+                except exceptions.FileNotFound:
+                    self._in_names("open", real, "w").close()
+                else:
+                    if mode.append:
+                        contents = self._contents(digest=digest)
+                file = _Writer(state=self, path=real, contents=contents)
+
+        if mode.text:
+            return io.TextIOWrapper(file)
+        return file
+
+    def digest(self, path, algorithm="sha256", tree_chunk_size=None):
+        if algorithm == "sha256" and tree_chunk_size is None:
+            with self._resolved(path, follow=True) as real:
+                return self._digest_of(real)
+        with self.open_file(path=path, mode="rb") as file:
+            return common._digest_file(
+                file=file,
+                algorithm=algorithm,
+                tree_chunk_size=tree_chunk_size,
+            )
+
+    def remove_file(self, path):
+        with self._resolved(path, follow=False) as real:
+            self._in_names("remove_file", real)
+
+    def link(self, source, to):
+        with (
+            self._resolved(to, follow=False) as real,
+            common._rooted_at(self._names),
+        ):
+            to = self._names.descendant(*real.segments)
+            self._names_fs.link(source=source, to=to)
+
+    def readlink(self, path):
+        with self._resolved(path, follow=False) as real:
+            return self._in_names("readlink", real)
+
+    def realpath(self, path, seen=pset()):
+        names = common._Resolver(readlink=partial(self._in_names, "readlink"))
+        return names.realpath(path=path, seen=seen)
+
+    def stat(self, path):
+        with self._resolved(path, follow=True) as real:
+            return self._sized(self._in_names("stat", real), path=real)
+
+    def lstat(self, path):
+        with self._resolved(path, follow=False) as real:
+            return self._sized(self._in_names("lstat", real), path=real)
@@ -21,6 +21,12 @@ class InvalidMode(Exception):
     """
 
 
+class InvalidImage(Exception):
+    """
+    The given file is not a valid filesystem image.
+    """
+
+
 @attr.s(unsafe_hash=True)
 class _FileSystemError(Exception):
 
@@ -72,6 +78,16 @@ class SymbolicLoop(_FileSystemError):
     message = os.strerror(errno)
 
 
+class NoSpace(_FileSystemError):
+    errno = errno.ENOSPC
+    message = os.strerror(errno)
+
+
+class ReadOnly(_FileSystemError):
+    errno = errno.EROFS
+    message = os.strerror(errno)
+
+
 # On macOS, calling unlink on a directory raises EPERM.  I do not understand
 # why, and man 2 unlink doesn't exactly discuss it, but it seems to be the
 # case.
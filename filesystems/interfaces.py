@@ -2,7 +2,9 @@
 Interface definitions for filesystems.
 """
 
-from zope.interface import Interface
+from zope.interface import Interface, classImplements
+
+from filesystems import _path
 
 
 class Path(Interface):
@@ -59,3 +61,14 @@ class Path(Interface):
         """
         Resolve a path relative to this one.
         """
+
+    def normalized():
+        """
+        Lexically collapse any ``.`` or ``..`` segments in this path.
+        """
+
+
+# Paths are imported with the package, so they avoid importing zope.interface
+# themselves, and are declared here instead.
+classImplements(_path.Path, Path)
+classImplements(_path.RelativePath, Path)
@@ -1,25 +1,121 @@
 """
 A transient in-memory filesystem.
+
+The tree of nodes is persistent -- nodes stored within a directory are never
+mutated, and instead are replaced, along with each of their ancestors, up to
+a new root. This makes it cheap for filesystems to share unchanged parts of
+their trees (see `snapshot`).
+
+Nodes stored in the tree know nothing about where they live. Looking up a
+path binds the node found there to its name and its parent, and it is these
+bound nodes which carry out operations, writing any changes back up through
+their parents. Directories passed through on the way are only bound if
+something beneath them actually changes.
+
+Filesystems may be shared between threads. Readers need no locking, as each
+lookup starts from whatever root is current and only ever sees immutable
+nodes beneath it. Writers are serialized, so that each builds its new root
+from the one left by the last.
+
+Each directory tracks how many bytes of file contents (and how many nodes)
+live beneath it, adjusting its totals as each child is replaced, so usage is
+known without walking the tree.
 """
 
+from collections import OrderedDict, defaultdict
 from io import BytesIO, TextIOWrapper
-from uuid import uuid4
+import hashlib
+import importlib
+import itertools
+import mmap
 import os
 import stat
+import struct
+import threading
+import time
+import weakref
 
 from pyrsistent import pmap, pset
 import attr
 
-from filesystems import Path, common, exceptions
+from filesystems import Path, common, exceptions, native
+from filesystems._path import RelativePath
+
+#: Inode numbers, which are unique across all in-memory filesystems.
+_INODES = itertools.count(1)
+
+#: The (standard library) modules which may be used to compress files.
+_COMPRESSIONS = frozenset(["bz2", "lzma", "zlib"])
+
+#: How many closed files may go uncounted before they are all counted.
+_MAX_UNSETTLED = 1024
+
+#: Images start with a magic string and a count of the entries they contain.
+#: Images from before hard links were recorded have no hard link entries, so
+#: can still be loaded.
+_IMAGE_HEADER = struct.Struct("<8sQ")
+_IMAGE_MAGIC = b"FSIMAGE2"
+_IMAGE_MAGICS = frozenset([b"FSIMAGE1", _IMAGE_MAGIC])
+
+#: Each entry is its kind, the index of its parent, the offset and length of
+#: its data within the blob following the entries, and the length of its name
+#: (which immediately follows it). Hard links are instead followed by the
+#: index of the entry for the first link to their file, in place of an offset.
+_IMAGE_ENTRY = struct.Struct("<BIQQH")
+_DIRECTORY, _FILE, _LINK, _RELATIVE_LINK, _HARDLINK = range(5)
 
 
 class _BytesIOIsTerrible(BytesIO):
+
+    #: The state whose file this is, where in its tree the file lives, and
+    #: the path it was opened with, while it is open for writing.
+    _writing = None
+
+    #: How many bytes writing has reserved from the filesystem's budget.
+    _reserved = 0
+
+    #: The hash these contents are shared by, if they are deduplicated.
+    _digest = None
+
+    def __init__(self, initial_bytes=b""):
+        super().__init__(initial_bytes)
+        # Kept up to date by writing, rather than measured by exporting the
+        # buffer, which would stop it from being resized by a writer in some
+        # other thread meanwhile.
+        self._size = len(initial_bytes)
+
     def __repr__(self):
         return f"<BytesIOIsTerrible contents={self.bytes!r}>"
 
+    def write(self, data):
+        if self._writing is not None:
+            state, _, path = self._writing
+            if state._budget is not None:
+                with memoryview(data) as view:
+                    growth = self.tell() + view.nbytes - self._size
+                if growth > 0:
+                    state._reserve(growth=growth, path=path)
+                    self._reserved += growth
+        written = super().write(data)
+        self._size = max(self._size, self.tell())
+        return written
+
+    def truncate(self, size=None):
+        size = super().truncate(size)
+        self._size = min(self._size, size)
+        return size
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
     def close(self):
         self._hereismyvalue = self.getvalue()
         super().close()
+        if self._writing is not None:
+            state, location, _ = self._writing
+            self._writing = None
+            state._closed(contents=self, location=location)
 
     @property
     def bytes(self):
@@ -27,19 +123,669 @@ class _BytesIOIsTerrible(BytesIO):
             return self._hereismyvalue
         return self.getvalue()
 
+    def view(self):
+        """
+        A view of the current contents.
+
+        The contents of closed files are not copied, but those of files
+        still open are, as exporting their buffer would stop them from
+        being written to while it is.
+        """
+        if self.closed:
+            return memoryview(self._hereismyvalue)
+        return memoryview(self.getvalue())
+
+    @property
+    def size(self):
+        if self.closed:
+            return len(self._hereismyvalue)
+        return self._size
+
+    resident = size
+
 
-def FS():
+def FS(  # noqa: PLR0917
+    budget=None,
+    spill_above=None,
+    max_resident=None,
+    compression=None,
+    hot=64,
+    deduplicate=False,
+):
     """
     Create an in-memory filesystem.
+
+    If a ``budget`` is given, writing more than that many bytes of file
+    contents into the filesystem raises `exceptions.NoSpace`.
+
+    Files larger than ``spill_above`` bytes are moved out of memory into
+    (anonymous) temporary files once they are closed, and are read back
+    through memory maps. If ``max_resident`` is given, whenever closing a
+    file leaves more than that many bytes of contents in memory, the least
+    recently opened files are moved out of memory too, until it no longer
+    does.
+
+    If ``compression`` names a compression module from the standard library
+    (``zlib``, ``lzma`` or ``bz2``), files are compressed once they have been
+    closed and are no longer among the ``hot`` most recently opened files.
+    Compressed files are decompressed when read, with the decompressed
+    contents of the ``hot`` most recently read ones kept around for reading
+    again.
+
+    If ``deduplicate`` is true, files with identical contents share a single
+    copy of them, found by hashing each file once it is closed.
+
+    Copying files (with ``fs.copy``) always shares their contents, and a
+    file whose contents are shared is given new contents of its own as soon
+    as it is written to.
+    """
+    if compression is None:
+        compressor = None
+    elif compression in _COMPRESSIONS:
+        compressor = _Compressor(
+            codec=importlib.import_module(compression),
+            hot=hot,
+        )
+    else:
+        raise ValueError(f"{compression!r} is not a known compression")
+
+    return _State(
+        budget=budget,
+        spill_above=spill_above,
+        max_resident=max_resident,
+        compressor=compressor,
+        blobs=weakref.WeakValueDictionary() if deduplicate else None,
+    ).FS(name="MemoryFS")
+
+
+@attr.s(frozen=True)
+class CompressionStats:
+    """
+    How well an in-memory filesystem's files have compressed.
+    """
+
+    #: How many files have been compressed.
+    files = attr.ib()
+
+    #: Their total size before compression.
+    size = attr.ib()
+
+    #: Their total size after compression.
+    compressed_size = attr.ib()
+
+    #: How many reads were served from recently decompressed contents.
+    hits = attr.ib()
+
+    #: How many reads needed decompressing.
+    misses = attr.ib()
+
+    @property
+    def ratio(self):
+        """
+        How many times smaller files became, overall.
+        """
+        if not self.compressed_size:
+            return 1.0
+        return self.size / self.compressed_size
+
+
+@attr.s(frozen=True)
+class MemoryUsage:
+    """
+    How much memory some part of an in-memory filesystem is using.
+
+    Only bytes of file contents held in memory are counted, so contents
+    still living in a native file (see `from_native`) or a memory-mapped
+    image (see `load`) are not, and nor are files still open for writing
+    until they are closed.
+
+    Deduplicated contents are counted once, however many files share them,
+    as are the contents of hard linked files, however many links they have.
+    The usage of a whole filesystem is known straight away, as is that of
+    any directory while no contents are shared, but otherwise finding that
+    of a directory walks everything beneath it, so as to count each of the
+    contents shared within it once.
+    """
+
+    #: The number of bytes of file contents.
+    size = attr.ib()
+
+    #: The number of files, directories and links (including this one).
+    nodes = attr.ib()
+
+
+def _snapshot(state):
+    """
+    Snapshot an in-memory filesystem.
+
+    The snapshot is an independent filesystem which shares all of its nodes
+    and file contents with the original until either is modified, so taking
+    one takes constant time, regardless of the size of the tree.
+
+    Files which are open for writing when a snapshot is taken continue to
+    write into both filesystems until they are closed.
+    """
+    state._settle()
+    with state._lock:
+        return _State(
+            root=state._root,
+            budget=state._budget,
+            spill_above=state._spill_above,
+            max_resident=state._max_resident,
+            compressor=state._compressor,
+            blobs=state._blobs,
+            links=state._links,
+            shared=state._shared,
+            shared_usage=state._shared_usage,
+        ).FS(name="MemoryFS")
+
+
+def from_native(root, lazy=False, max_workers=None):
+    """
+    Create an in-memory filesystem containing a copy of a native directory.
+
+    The native directory is scanned once, with file contents read in
+    parallel across a pool of threads, and the in-memory tree built
+    directly from the result.
+
+    If ``lazy`` is true, nothing is copied up front. Instead, each directory
+    is listed the first time it is accessed, and each file's contents are
+    read from the native filesystem whenever it is opened, until it is
+    written to. Changes are never written back to the native filesystem.
+
+    Symbolic links are copied as links, unresolved, so absolute links will
+    refer to paths within the in-memory filesystem.
+    """
+    if not stat.S_ISDIR(native.FS().stat(root).st_mode):
+        raise exceptions.NotADirectory(root)
+
+    if lazy:
+        children = _NativeChildren(source=str(root))
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            children = _scan(entries=os.scandir(root), pool=pool)
+    return _State(root=_Directory(children=children)).FS(name="MemoryFS")
+
+
+def _scan(entries, pool):
+    """
+    Build the children of a native directory, reading files on the pool.
+    """
+    children, files = {}, {}
+    with entries:
+        for entry in entries:
+            if entry.is_symlink():
+                source = Path.from_string(os.readlink(entry.path))
+                children[entry.name] = _Link(source=source)
+            elif entry.is_dir():
+                children[entry.name] = _Directory(
+                    children=_scan(entries=os.scandir(entry.path), pool=pool),
+                )
+            else:
+                contents = pool.submit(_read_native, entry.path)
+                files[entry.name] = contents, entry.stat().st_mtime
+
+    for name, (contents, mtime) in files.items():
+        children[name] = _File(contents=contents.result(), mtime=mtime)
+    return pmap(children)
+
+
+@attr.s(eq=False)
+class _NativeChildren:
+    """
+    The children of a directory, listed from a native one when first needed.
+
+    Changing the children produces an ordinary `pyrsistent.pmap`.
+    """
+
+    _source = attr.ib()
+    _loaded = attr.ib(default=None, repr=False)
+
+    def _children(self):
+        if self._loaded is None:
+            children = {}
+            with os.scandir(self._source) as entries:
+                for entry in entries:
+                    if entry.is_symlink():
+                        source = Path.from_string(os.readlink(entry.path))
+                        node = _Link(source=source)
+                    elif entry.is_dir():
+                        node = _Directory(
+                            children=_NativeChildren(source=entry.path),
+                        )
+                    else:
+                        node = _File(
+                            contents=_NativeContents(path=entry.path),
+                            mtime=entry.stat().st_mtime,
+                        )
+                    children[entry.name] = node
+            self._loaded = pmap(children)
+        return self._loaded
+
+    def __iter__(self):
+        return iter(self._children())
+
+    def __len__(self):
+        return len(self._children())
+
+    def get(self, name):
+        return self._children().get(name)
+
+    def items(self):
+        return self._children().items()
+
+    def set(self, name, node):
+        return self._children().set(name, node)
+
+    def remove(self, name):
+        return self._children().remove(name)
+
+
+@attr.s
+class _NativeContents:
+    """
+    The contents of a native file, read from it whenever they are needed.
+    """
+
+    _path = attr.ib()
+
+    #: Nothing is held in memory.
+    resident = 0
+
+    _digest = None
+
+    @property
+    def bytes(self):
+        with open(self._path, "rb") as file:
+            return file.read()
+
+    def view(self):
+        return memoryview(self.bytes)
+
+    @property
+    def size(self):
+        return os.stat(self._path).st_size
+
+
+def _read_native(path):
+    with open(path, "rb") as file:
+        contents = _BytesIOIsTerrible(file.read())
+    contents.close()
+    return contents
+
+
+def load(path):
+    """
+    Load an in-memory filesystem from an image written by ``fs.save``.
+
+    The image is memory-mapped, and file contents are read from it only when
+    they are, rather than being copied into memory up front.
+    """
+    with open(path, "rb") as file:
+        header = file.read(_IMAGE_HEADER.size)
+        if header[: len(_IMAGE_MAGIC)] not in _IMAGE_MAGICS:
+            raise exceptions.InvalidImage(path)
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    _, count = _IMAGE_HEADER.unpack_from(mapping)
+
+    entries = []
+    position = _IMAGE_HEADER.size
+    for _ in range(count):
+        kind, parent, offset, length, size = _IMAGE_ENTRY.unpack_from(
+            mapping,
+            position,
+        )
+        position += _IMAGE_ENTRY.size
+        name = os.fsdecode(mapping[position : position + size])
+        position += size
+        entries.append((kind, parent, name, offset, length))
+    blob = memoryview(mapping)[position:]
+
+    # Each file with further hard links to it becomes one linked file.
+    nlinks = defaultdict(lambda: 1)
+    for kind, _, _, first, _ in entries:
+        if kind == _HARDLINK:
+            nlinks[first] += 1
+    linked = {}
+
+    # Entries always follow their parent, so building them in reverse means
+    # each directory's children are all complete by the time we reach it.
+    children = defaultdict(dict)
+    for index, entry in zip(reversed(range(1, count + 1)), reversed(entries)):
+        kind, parent, name, offset, length = entry
+        first = index
+        if kind == _HARDLINK:
+            first = offset
+            kind, _, _, offset, length = entries[first - 1]
+        data = blob[offset : offset + length]
+        if kind == _DIRECTORY:
+            node = _Directory(children=pmap(children.pop(index, {})))
+        elif kind == _FILE and first not in nlinks:
+            node = _File(contents=_MappedContents(view=data))
+        elif kind == _FILE:
+            node = linked.get(first)
+            if node is None:
+                node = linked[first] = _File(
+                    contents=_MappedContents(view=data),
+                    linked=True,
+                    nlink=nlinks[first],
+                )
+        else:
+            source = os.fsdecode(data.tobytes())
+            segments = source.split("\0") if source else []
+            cls = Path if kind == _LINK else RelativePath
+            node = _Link(source=cls(*segments))
+        children[parent][name] = node
+
+    root = _Directory(children=pmap(children.pop(0, {})))
+    return _State(
+        root=root,
+        links=pmap((file._ino, file) for file in linked.values()),
+        shared=pmap((file._ino, (1, 0)) for file in linked.values()),
+    ).FS(name="MemoryFS")
+
+
+def _save(state, path):
+    """
+    Save an in-memory filesystem to an image on the native filesystem.
+    """
+    entries, blobs = [], []
+    offset = 0
+
+    # The index of the entry for the first link to each hard linked file.
+    first = {}
+
+    # Hard linked files are looked up from the same moment as the tree.
+    with state._lock:
+        root, links = state._root, state._links
+
+    directories = [(0, root)]
+    while directories:
+        parent, directory = directories.pop()
+        for name, node in directory._children.items():
+            name = os.fsencode(name)
+            if node.__class__ is _File and node._linked:
+                index = first.get(node._ino)
+                if index is not None:
+                    entry = _IMAGE_ENTRY.pack(
+                        _HARDLINK,
+                        parent,
+                        index,
+                        0,
+                        len(name),
+                    )
+                    entries.append(entry + name)
+                    continue
+                first[node._ino] = len(entries) + 1
+                node = links[node._ino]
+
+            if isinstance(node, _Directory):
+                kind, data = _DIRECTORY, b""
+                directories.append((len(entries) + 1, node))
+            elif isinstance(node, _File):
+                kind, data = _FILE, node._contents.view()
+            else:
+                source = node._source
+                kind = _LINK if isinstance(source, Path) else _RELATIVE_LINK
+                data = os.fsencode("\0".join(source.segments))
+
+            length = len(data)
+            entry = _IMAGE_ENTRY.pack(kind, parent, offset, length, len(name))
+            entries.append(entry + name)
+            blobs.append(data)
+            offset += length
+
+    with open(path, "wb") as file:
+        file.write(_IMAGE_HEADER.pack(_IMAGE_MAGIC, len(entries)))
+        file.writelines(entries)
+        for data in blobs:
+            file.write(data)
+            if isinstance(data, memoryview):
+                data.release()
+
+
+@attr.s
+class _MappedContents:
+    """
+    The (read-only) contents of a file, which live in some existing buffer.
+
+    Writing to the file replaces its contents entirely, so they are never
+    copied out of the buffer unless they are read.
+    """
+
+    _view = attr.ib(repr=False)
+
+    #: The buffer is memory-mapped, so its pages belong to the OS.
+    resident = 0
+
+    #: The hash these contents are shared by, if they are deduplicated.
+    _digest = None
+
+    @property
+    def bytes(self):
+        return self._view.tobytes()
+
+    def view(self):
+        return self._view[:]
+
+    @property
+    def size(self):
+        return self._view.nbytes
+
+
+@attr.s(eq=False)
+class _CompressedContents:
+    """
+    The (read-only) contents of a file, held compressed.
+    """
+
+    _compressed = attr.ib(repr=False)
+    _compressor = attr.ib(repr=False)
+    size = attr.ib()
+
+    #: The hash these contents are shared by, if they are deduplicated.
+    _digest = None
+
+    @property
+    def bytes(self):
+        return self._compressor.decompressed(self)
+
+    def view(self):
+        return memoryview(self.bytes)
+
+    @property
+    def resident(self):
+        return len(self._compressed)
+
+
+@attr.s(eq=False)
+class _Compressor:
+    """
+    Compresses files, keeping the most recently read ones decompressed.
+    """
+
+    _codec = attr.ib()
+    _hot = attr.ib()
+    _decompressed = attr.ib(factory=OrderedDict, repr=False)
+    _lock = attr.ib(factory=threading.Lock, repr=False)
+
+    _files = _size = _compressed_size = _hits = _misses = 0
+
+    def compress(self, contents):
+        data = contents.bytes
+        compressed = _CompressedContents(
+            compressed=self._codec.compress(data),
+            compressor=self,
+            size=len(data),
+        )
+        with self._lock:
+            self._files += 1
+            self._size += compressed.size
+            self._compressed_size += compressed.resident
+        return compressed
+
+    def decompressed(self, contents):
+        with self._lock:
+            data = self._decompressed.get(contents)
+            if data is not None:
+                self._hits += 1
+                self._decompressed.move_to_end(contents)
+                return data
+            self._misses += 1
+
+        data = self._codec.decompress(contents._compressed)
+        with self._lock:
+            self._remember(contents, data)
+        return data
+
+    def _remember(self, contents, data):
+        decompressed = self._decompressed
+        decompressed[contents] = data
+        decompressed.move_to_end(contents)
+        while len(decompressed) > self._hot:
+            decompressed.popitem(last=False)
+
+    def stats(self):
+        return CompressionStats(
+            files=self._files,
+            size=self._size,
+            compressed_size=self._compressed_size,
+            hits=self._hits,
+            misses=self._misses,
+        )
+
+
+def _usage_of(children):
     """
-    return _State().FS(name="MemoryFS")
+    The usage of a directory with the given children, counting itself.
+
+    Children still to be listed from a native directory are not counted.
+    """
+    if isinstance(children, _NativeChildren):
+        return 0, 1
+    size, nodes = 0, 1
+    for child in children.values():
+        size, nodes = size + child._usage[0], nodes + child._usage[1]
+    return size, nodes
+
+
+def _spilled(contents):
+    """
+    Move some contents out of memory, into a temporary file.
+
+    Empty contents have nothing to move (and an empty file can't be mapped).
+    """
+    if not contents.size:
+        return _MappedContents(view=memoryview(b""))
+
+    import tempfile
+
+    with tempfile.TemporaryFile() as file, contents.view() as view:
+        file.write(view)
+        file.flush()
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return _MappedContents(view=memoryview(mapping))
 
 
-def _fs(fn):
+def _bound(node, name, parent):
     """
-    Eat the fs argument.
+    A copy of a node bound to a name and parent (or unbound, given None).
+
+    This is `attr.evolve`, minus running every field back through
+    ``__init__``, which adds up when done for every lookup.
     """
-    return lambda fs, *args, **kwargs: fn(*args, **kwargs)
+    bound = object.__new__(node.__class__)
+    bound.__dict__.update(node.__dict__)
+    bound._name, bound._parent = name, parent
+    return bound
+
+
+@attr.s(eq=False, slots=True)
+class _Ancestors:
+    """
+    The parent of a directory which was found by walking down from the root.
+
+    The directories above it are bound only once something is written back
+    up through them.
+    """
+
+    _of = attr.ib()
+    _segments = attr.ib()
+    _depth = attr.ib()
+
+    def _bound(self):
+        state = self._of
+        directory = _bound(state._root, "", state)
+        for segment in self._segments[: self._depth]:
+            child = directory._children.get(segment)
+            directory = _bound(child, segment, directory)
+        return directory
+
+    def __setitem__(self, name, node):
+        self._bound()[name] = node
+
+    def __delitem__(self, name):
+        del self._bound()[name]
+
+    def _state(self):
+        return self._of
+
+
+def _location(node):
+    """
+    The segments of the path at which a bound node lives, free of any links.
+    """
+    names = []
+    while not isinstance(node, (_Ancestors, _State)):
+        names.append(node._name)
+        node = node._parent
+    if isinstance(node, _Ancestors):
+        return (*node._segments[: node._depth], *reversed(names))
+    return tuple(reversed(names[:-1]))
+
+
+def _shared_usage_of(node, links, shared):
+    """
+    The size of the shared contents beneath a node, counting each once.
+
+    Which contents are beneath which directories is not tracked, so this
+    walks everything beneath the node.
+    """
+    counted, nodes = {}, [node]
+    while nodes:
+        node = nodes.pop()
+        if node.__class__ is _Directory:
+            if not isinstance(node._children, _NativeChildren):
+                nodes.extend(node._children.values())
+        elif node.__class__ is _File:
+            if node._linked:
+                node = links[node._ino]
+            if node._shared is not None:
+                counted[node._shared] = shared[node._shared][1]
+    return sum(counted.values())
+
+
+def _unlinked(node):
+    """
+    Is this a file with no hard links (whose contents its entry counts)?
+    """
+    return node.__class__ is _File and not node._linked
+
+
+def _shared_key(file):
+    """
+    What a file's contents are counted under, if they are shared.
+
+    Deduplicated contents are counted once for their hash, and the contents
+    of hard linked files are otherwise counted once for their inode.
+    """
+    digest = file._contents._digest
+    if digest is None and file._linked:
+        return file._ino
+    return digest
 
 
 @attr.s(unsafe_hash=True)
@@ -48,13 +794,42 @@ class _File:
     A file.
     """
 
-    _name = attr.ib()
-    _parent = attr.ib(repr=False)
+    _name = attr.ib(default=None)
+    _parent = attr.ib(default=None, repr=False)
     _contents = attr.ib(factory=_BytesIOIsTerrible)
+    _mtime = attr.ib(factory=time.time, eq=False, repr=False)
+    _ino = attr.ib(factory=_INODES.__next__, eq=False, repr=False)
+
+    #: Files which have ever been hard linked live in their filesystem's
+    #: table of links, which each of their directory entries refers to.
+    _linked = attr.ib(default=False, eq=False, repr=False)
+    _nlink = attr.ib(default=1, eq=False, repr=False)
+
+    #: What the file's contents are counted under by their filesystem, if
+    #: they are shared with other files (and so not counted by directories).
+    _shared = attr.ib(eq=False, repr=False)
+    _usage = attr.ib(eq=False, repr=False)
+
+    @_shared.default
+    def _(self):
+        return _shared_key(self)
+
+    @_usage.default
+    def _(self):
+        return 0 if self._shared is not None else self._contents.resident, 1
 
     def __getitem__(self, name):
         return _FileChild(parent=self._parent)
 
+    def _stored(self):
+        stored = _bound(self, None, None)
+        stored._shared = shared = _shared_key(self)
+        if shared is None:
+            stored._usage = self._contents.resident, 1
+        else:
+            stored._usage = 0, 1
+        return stored
+
     def create_directory(self, path, with_parents, allow_existing):
         raise exceptions.FileExists(path)
 
@@ -71,28 +846,52 @@ class _File:
         if mode.read:
             file = _BytesIOIsTerrible(self._contents.bytes)
         elif mode.write:
-            self._contents = _BytesIOIsTerrible()
+            self._contents, self._mtime = _BytesIOIsTerrible(), time.time()
+            self._parent[self._name] = self
             file = self._contents
+            file._writing = self._parent._state(), _location(self), path
         else:
             original, self._contents = self._contents, _BytesIOIsTerrible()
             self._contents.write(original.bytes)
+            self._mtime = time.time()
+            self._parent[self._name] = self
             file = self._contents
+            file._writing = self._parent._state(), _location(self), path
 
         if mode.text:
             return TextIOWrapper(file)
         return file
 
+    def digest(self, path, algorithm, tree_chunk_size):
+        with self._contents.view() as contents:
+            return common._digest_buffer(
+                buffer=contents,
+                algorithm=algorithm,
+                tree_chunk_size=tree_chunk_size,
+            )
+
     def remove_file(self, path):
         del self._parent[self._name]
+        if self._linked:
+            self._parent._state()._unlink(self)
 
-    def link(self, source, to, fs, state):
+    def link(self, source, to):
+        raise exceptions.FileExists(to)
+
+    def hardlink(self, file, to):
         raise exceptions.FileExists(to)
 
     def readlink(self, path):
         raise exceptions.NotASymlink(path)
 
     def stat(self, path):
-        return os.stat_result((stat.S_IFREG,) + (0,) * 9)
+        return common._stat_result(
+            mode=stat.S_IFREG,
+            ino=self._ino,
+            nlink=self._nlink,
+            size=self._contents.size,
+            mtime=self._mtime,
+        )
 
     lstat = stat
 
@@ -123,10 +922,16 @@ class _FileChild:
     def open_file(self, path, mode):
         raise exceptions.NotADirectory(path)
 
+    def digest(self, path, algorithm, tree_chunk_size):
+        raise exceptions.NotADirectory(path)
+
     def remove_file(self, path):
         raise exceptions.NotADirectory(path)
 
-    def link(self, source, to, fs, state):
+    def link(self, source, to):
+        raise exceptions.NotADirectory(to.parent())
+
+    def hardlink(self, file, to):
         raise exceptions.NotADirectory(to.parent())
 
     def readlink(self, path):
@@ -144,27 +949,64 @@ class _Directory:
     A directory.
     """
 
-    _name = attr.ib()
-    _parent = attr.ib(repr=False)
+    _name = attr.ib(default=None)
+    _parent = attr.ib(default=None, repr=False)
     _children = attr.ib(default=pmap())
+    _usage = attr.ib(eq=False, repr=False)
+    _ino = attr.ib(factory=_INODES.__next__, eq=False, repr=False)
 
-    @classmethod
-    def root(cls):
-        root = cls(name="", parent=None)
-        root._parent = root
-        return root
+    @_usage.default
+    def _(self):
+        return _usage_of(self._children)
 
     def __getitem__(self, name):
-        return self._children.get(
-            name,
-            _DirectoryChild(name=name, parent=self),
-        )
+        child = self._children.get(name)
+        if child is None:
+            return _DirectoryChild(name=name, parent=self)
+        if child.__class__ is _File and child._linked:
+            # Walking an older root, this may be a file whose last name has
+            # since been removed, and which no longer exists.
+            child = self._state()._links.get(child._ino)
+            if child is None:
+                return _DirectoryChild(name=name, parent=self)
+        return _bound(child, name, self)
 
     def __setitem__(self, name, node):
-        self._children = self._children.set(name, node)
+        node = node._stored()
+        if node.__class__ is _File and node._linked:
+            self._state()._relink(node)
+        children, old = self._children, self._children.get(name)
+        self._children = children.set(name, node)
+        if _unlinked(old) and old._shared is not None:
+            self._state()._share(old._shared, -1)
+        if _unlinked(node) and node._shared is not None:
+            self._state()._share(node._shared, 1, node._contents.resident)
+        if isinstance(children, _NativeChildren):
+            self._usage = _usage_of(self._children)
+        else:
+            size, nodes = self._usage
+            if old is not None:
+                size, nodes = size - old._usage[0], nodes - old._usage[1]
+            self._usage = size + node._usage[0], nodes + node._usage[1]
+        self._parent[self._name] = self
 
     def __delitem__(self, name):
-        self._children = self._children.remove(name)
+        children, old = self._children, self._children.get(name)
+        self._children = children.remove(name)
+        if _unlinked(old) and old._shared is not None:
+            self._state()._share(old._shared, -1)
+        if isinstance(children, _NativeChildren):
+            self._usage = _usage_of(self._children)
+        else:
+            size, nodes = self._usage
+            self._usage = size - old._usage[0], nodes - old._usage[1]
+        self._parent[self._name] = self
+
+    def _stored(self):
+        return _bound(self, None, None)
+
+    def _state(self):
+        return self._parent._state()
 
     def create_directory(self, path, with_parents, allow_existing):
         if allow_existing:
@@ -186,17 +1028,23 @@ class _Directory:
     def open_file(self, path, mode):
         raise exceptions.IsADirectory(path)
 
+    def digest(self, path, algorithm, tree_chunk_size):
+        raise exceptions.IsADirectory(path)
+
     def remove_file(self, path):
         raise exceptions._UnlinkNonFileError(path)
 
-    def link(self, source, to, fs, state):
+    def link(self, source, to):
+        raise exceptions.FileExists(to)
+
+    def hardlink(self, file, to):
         raise exceptions.FileExists(to)
 
     def readlink(self, path):
         raise exceptions.NotASymlink(path)
 
     def stat(self, path):
-        return os.stat_result((stat.S_IFDIR,) + (0,) * 9)
+        return common._stat_result(mode=stat.S_IFDIR, ino=self._ino)
 
     lstat = stat
 
@@ -230,32 +1078,27 @@ class _DirectoryChild:
         raise exceptions.FileNotFound(path)
 
     def create_file(self, path):
-        file = self._parent[self._name] = _File(
-            name=self._name,
-            parent=self._parent,
-        )
+        file = _File(name=self._name, parent=self._parent)
         return file.open_file(path=path, mode=common._FileMode(activity="w"))
 
     def open_file(self, path, mode):
         if mode.read:
             raise exceptions.FileNotFound(path)
         else:
-            file = self._parent[self._name] = _File(
-                name=self._name,
-                parent=self._parent,
-            )
+            file = _File(name=self._name, parent=self._parent)
             return file.open_file(path=path, mode=mode)
 
+    def digest(self, path, algorithm, tree_chunk_size):
+        raise exceptions.FileNotFound(path)
+
     def remove_file(self, path):
         raise exceptions.FileNotFound(path)
 
-    def link(self, source, to, fs, state):
-        self._parent[self._name] = _Link(
-            name=self._name,
-            parent=self._parent,
-            source=source,
-            entry_at=lambda path=source: state[fs.realpath(path=path)],
-        )
+    def link(self, source, to):
+        self._parent[self._name] = _Link(source=source)
+
+    def hardlink(self, file, to):
+        self._parent[self._name] = file
 
     def readlink(self, path):
         raise exceptions.FileNotFound(path)
@@ -269,10 +1112,20 @@ class _DirectoryChild:
 @attr.s(unsafe_hash=True)
 class _Link:
 
-    _name = attr.ib()
-    _parent = attr.ib(repr=False)
     _source = attr.ib()
-    _entry_at = attr.ib(repr=False)
+    _name = attr.ib(default=None)
+    _parent = attr.ib(default=None, repr=False)
+
+    _usage = (0, 1)
+
+    def _stored(self):
+        return _bound(self, None, None)
+
+    def _entry_at(self, path=None):
+        state = self._parent._state()
+        if path is None:
+            path = self._source
+        return state[state.realpath(path=path)]
 
     def __getitem__(self, name):
         return self._entry_at()[name]
@@ -299,10 +1152,20 @@ class _Link:
     def open_file(self, path, mode):
         return self._entry_at(path=path).open_file(path=path, mode=mode)
 
+    def digest(self, path, algorithm, tree_chunk_size):
+        return self._entry_at(path=path).digest(
+            path=path,
+            algorithm=algorithm,
+            tree_chunk_size=tree_chunk_size,
+        )
+
     def remove_file(self, path):
         del self._parent[self._name]
 
-    def link(self, source, to, fs, state):
+    def link(self, source, to):
+        raise exceptions.FileExists(to)
+
+    def hardlink(self, file, to):
         raise exceptions.FileExists(to)
 
     def readlink(self, path):
@@ -312,7 +1175,10 @@ class _Link:
         return self._entry_at(path=path).stat(path=path)
 
     def lstat(self, path):
-        return os.stat_result((stat.S_IFLNK,) + (0,) * 9)
+        return common._stat_result(
+            mode=stat.S_IFLNK,
+            size=len(str(self._source)),
+        )
 
 
 @attr.s(unsafe_hash=True)
@@ -355,10 +1221,16 @@ class _NoSuchEntry:
     def open_file(self, path, mode):
         raise exceptions.FileNotFound(path)
 
+    def digest(self, path, algorithm, tree_chunk_size):
+        raise exceptions.FileNotFound(path)
+
     def remove_file(self, path):
         raise exceptions.FileNotFound(path)
 
-    def link(self, source, to, fs, state):
+    def link(self, source, to):
+        raise exceptions.FileNotFound(to.parent())
+
+    def hardlink(self, file, to):
         raise exceptions.FileNotFound(to.parent())
 
     def readlink(self, path):
@@ -373,49 +1245,295 @@ class _NoSuchEntry:
 @attr.s(unsafe_hash=True)
 class _State:
 
-    _root = attr.ib(factory=_Directory.root)
+    _root = attr.ib(factory=_Directory)
+    _budget = attr.ib(default=None)
+    _spill_above = attr.ib(default=None)
+    _max_resident = attr.ib(default=None)
+    _compressor = attr.ib(default=None)
+
+    #: Contents by their hash, for as long as any file refers to them.
+    _blobs = attr.ib(default=None, eq=False, repr=False)
+
+    #: Hard linked files, by their inode numbers.
+    _links = attr.ib(default=pmap(), eq=False, repr=False)
+
+    #: Contents shared between files, which are counted once each, rather
+    #: than by each directory holding one of their files. Each is kept with
+    #: how many files share it, and the size it was last counted as.
+    _shared = attr.ib(default=pmap(), eq=False, repr=False)
+    _shared_usage = attr.ib(default=0, eq=False, repr=False)
+    _lock = attr.ib(factory=threading.RLock, eq=False, repr=False)
+
+    #: Bytes written to files which are still open, and so not yet counted.
+    _pending = attr.ib(default=0, eq=False, repr=False)
+
+    #: Where files held in memory live, least recently opened first.
+    _recent = attr.ib(factory=OrderedDict, eq=False, repr=False)
+
+    #: Files closed since their sizes were last counted, where nothing else
+    #: needs to happen when they are closed.
+    _unsettled = attr.ib(factory=list, eq=False, repr=False)
 
     def __getitem__(self, path):
         """
         Retrieve the Node at the given path.
+
+        Plain directories along the way are walked through without binding
+        them, leaving only the last one (and whatever is below it) bound.
         """
-        node = self._root
-        for segment in path.segments:
+        segments = path.segments
+        node, depth, last = self._root, 0, len(segments) - 1
+        while depth < last:
+            child = node._children.get(segments[depth])
+            if child.__class__ is not _Directory:
+                break
+            node, depth = child, depth + 1
+
+        if depth:
+            parent = _Ancestors(of=self, segments=segments, depth=depth - 1)
+            node = _bound(node, segments[depth - 1], parent)
+        else:
+            node = _bound(node, "", self)
+        for segment in segments[depth:]:
             node = node[segment]
         return node
 
+    def __setitem__(self, name, root):
+        """
+        Replace the root directory with a new one.
+        """
+        self._root = _bound(root, None, None)
+
+    def _state(self):
+        return self
+
+    def _relink(self, file):
+        """
+        Store the node shared by each of a hard linked file's entries.
+
+        Its contents are counted once, however many entries it has.
+        """
+        old = self._links.get(file._ino)
+        self._links = self._links.set(file._ino, file)
+        if old is not None:
+            self._share(old._shared, -1)
+        self._share(file._shared, 1, file._contents.resident)
+
+    def _unlink(self, file):
+        """
+        Forget one of a hard linked file's directory entries.
+        """
+        if file._nlink == 1:
+            self._share(self._links[file._ino]._shared, -1)
+            self._links = self._links.remove(file._ino)
+        else:
+            file = attr.evolve(file._stored(), nlink=file._nlink - 1)
+            self._links = self._links.set(file._ino, file)
+
+    def _share(self, key, delta, resident=None):
+        """
+        Count one more (or one fewer) file sharing some contents.
+        """
+        count, counted = self._shared.get(key, (0, 0))
+        count += delta
+        if resident is None:
+            resident = counted
+        if count:
+            self._shared = self._shared.set(key, (count, resident))
+            self._shared_usage += resident - counted
+        else:
+            self._shared = self._shared.remove(key)
+            self._shared_usage -= counted
+
+    def _used(self):
+        """
+        How many bytes of file contents are in memory, or are reserved.
+        """
+        return self._root._usage[0] + self._shared_usage + self._pending
+
+    def _reserve(self, growth, path):
+        """
+        Reserve space for a file (still open for writing) to grow into.
+        """
+        with self._lock:
+            if self._used() + growth > self._budget:
+                raise exceptions.NoSpace(path)
+            self._pending += growth
+
+    def _file_at(self, location, contents=None):
+        """
+        The file at a location, if there is one (with the given contents).
+        """
+        directory = self._root
+        for segment in location[:-1]:
+            directory = directory._children.get(segment)
+            if directory.__class__ is not _Directory:
+                return None
+        if directory._children.get(location[-1]).__class__ is not _File:
+            return None
+        node = self[Path(*location)]
+        if contents is not None and node._contents is not contents:
+            return None
+        return node
+
+    def _closed(self, contents, location):
+        """
+        A file has been closed after writing.
+
+        Unless something needs doing with its contents straight away, it is
+        only counted towards usage later, along with any others.
+        """
+        if (
+            self._budget is None
+            and self._spill_above is None
+            and self._max_resident is None
+            and self._compressor is None
+            and self._blobs is None
+        ):
+            with self._lock:
+                self._unsettled.append((weakref.ref(contents), location))
+                if len(self._unsettled) > _MAX_UNSETTLED:
+                    self._settle()
+        else:
+            self._written(contents=contents, location=location)
+
+    def _settle(self):
+        """
+        Count the contents of each file closed since this was last done.
+
+        Any whose contents have since been replaced are simply forgotten.
+        """
+        with self._lock:
+            unsettled, self._unsettled = self._unsettled, []
+            for contents, location in unsettled:
+                contents = contents()
+                if contents is None:
+                    continue
+                node = self._file_at(location=location, contents=contents)
+                if node is not None:
+                    node._parent[node._name] = node
+
+    def _written(self, contents, location):
+        """
+        Count the contents of a file which has been closed after writing.
+        """
+        with self._lock:
+            self._pending -= contents._reserved
+            node = self._file_at(location=location, contents=contents)
+            if node is None:
+                return
+
+            shared = None
+            if self._blobs is not None:
+                with contents.view() as view:
+                    digest = hashlib.sha256(view).digest()
+                shared = self._blobs.get(digest)
+
+            spill_above = self._spill_above
+            if shared is not None:
+                node._contents = shared
+            elif spill_above is not None and contents.size > spill_above:
+                node._contents = _spilled(contents)
+            if isinstance(node._contents, _BytesIOIsTerrible) and (
+                self._compressor is not None or self._max_resident is not None
+            ):
+                self._recent[location] = None
+                self._recent.move_to_end(location)
+
+            if self._blobs is not None and shared is None:
+                node._contents._digest = digest
+                self._blobs[digest] = node._contents
+            node._parent[node._name] = node
+
+            self._relieve()
+
+    def _relieve(self):
+        """
+        Compress or spill the least recently opened files.
+
+        Files are compressed once more than ``hot`` files are held in memory
+        uncompressed, and otherwise spilled once their contents take up more
+        than the maximum allowed to stay resident.
+        """
+        compressor, max_resident = self._compressor, self._max_resident
+        while self._recent and (
+            (compressor is not None and len(self._recent) > compressor._hot)
+            or (
+                max_resident is not None
+                and self._root._usage[0] > max_resident
+            )
+        ):
+            location, _ = self._recent.popitem(last=False)
+            node = self._file_at(location=location)
+            contents = None if node is None else node._contents
+            if isinstance(contents, _BytesIOIsTerrible) and contents.closed:
+                node._contents = self._evicted(contents)
+                node._parent[node._name] = node
+
+    def _evicted(self, contents):
+        """
+        Compress or spill some contents, unless another file already has.
+
+        Deduplicated contents are replaced by their compressed (or spilled)
+        version for any file which later shares them.
+        """
+        digest = contents._digest
+        if digest is not None:
+            evicted = self._blobs.get(digest)
+            if evicted is not None and evicted is not contents:
+                return evicted
+
+        if self._compressor is None:
+            evicted = _spilled(contents)
+        else:
+            evicted = self._compressor.compress(contents)
+
+        if digest is not None:
+            evicted._digest = digest
+            self._blobs[digest] = evicted
+        return evicted
+
     def FS(self, name):
         return common.create(
             name=name,
-            create_file=_fs(self.create_file),
-            open_file=_fs(self.open_file),
-            remove_file=_fs(self.remove_file),
-            create_directory=_fs(self.create_directory),
-            list_directory=_fs(self.list_directory),
-            remove_empty_directory=_fs(self.remove_empty_directory),
-            temporary_directory=_fs(self.temporary_directory),
-            stat=_fs(self.stat),
-            lstat=_fs(self.lstat),
-            link=lambda fs, *args, **kwargs: self.link(*args, fs=fs, **kwargs),
-            readlink=_fs(self.readlink),
+            create_file=staticmethod(self.create_file),
+            open_file=staticmethod(self.open_file),
+            remove_file=staticmethod(self.remove_file),
+            create_directory=staticmethod(self.create_directory),
+            list_directory=staticmethod(self.list_directory),
+            remove_empty_directory=staticmethod(self.remove_empty_directory),
+            temporary_directory=staticmethod(self.temporary_directory),
+            stat=staticmethod(self.stat),
+            lstat=staticmethod(self.lstat),
+            link=staticmethod(self.link),
+            readlink=staticmethod(self.readlink),
+            digest=staticmethod(self.digest),
+            hardlink=staticmethod(self.hardlink),
+            copy=staticmethod(self.copy),
+            memory_usage=staticmethod(self.memory_usage),
+            compression_stats=staticmethod(self.compression_stats),
+            snapshot=lambda fs: _snapshot(state=self),
+            save=lambda fs, path: _save(state=self, path=path),
         )()
 
     def create_directory(self, path, with_parents, allow_existing):
-        self[path].create_directory(
-            path=path,
-            with_parents=with_parents,
-            allow_existing=allow_existing,
-        )
+        with self._lock:
+            self[path].create_directory(
+                path=path,
+                with_parents=with_parents,
+                allow_existing=allow_existing,
+            )
 
     def list_directory(self, path):
         return self[path].list_directory(path=path)
 
     def remove_empty_directory(self, path):
-        return self[path].remove_empty_directory(path=path)
+        with self._lock:
+            self[path].remove_empty_directory(path=path)
 
     def temporary_directory(self):
         # TODO: Maybe this isn't good enough.
-        directory = Path(uuid4().hex)
+        directory = Path(os.urandom(16).hex())
         self.create_directory(
             path=directory,
             with_parents=False,
@@ -424,23 +1542,117 @@ class _State:
         return directory
 
     def create_file(self, path):
-        return self[path].create_file(path=path)
+        with self._lock:
+            return self[path].create_file(path=path)
 
     def open_file(self, path, mode):
         mode = common._parse_mode(mode=mode)
-        return self[path].open_file(path=path, mode=mode)
+        if mode.read:
+            if self._recent:
+                with self._lock:
+                    if path.segments in self._recent:
+                        self._recent.move_to_end(path.segments)
+            return self[path].open_file(path=path, mode=mode)
+        with self._lock:
+            return self[path].open_file(path=path, mode=mode)
+
+    def digest(self, path, algorithm="sha256", tree_chunk_size=None):
+        return self[path].digest(
+            path=path,
+            algorithm=algorithm,
+            tree_chunk_size=tree_chunk_size,
+        )
 
     def remove_file(self, path):
-        self[path].remove_file(path=path)
-
-    def link(self, source, to, fs):
-        self[to].link(fs=fs, source=source, to=to, state=self)
+        with self._lock:
+            self[path].remove_file(path=path)
+
+    def link(self, source, to):
+        with self._lock:
+            self[to].link(source=source, to=to)
+
+    def hardlink(self, source, to):
+        with self._lock:
+            file = self[self.realpath(path=source)]
+            file.stat(path=source)
+            if not isinstance(file, _File):
+                raise exceptions.PermissionError(source)
+
+            linked = attr.evolve(
+                file._stored(),
+                linked=True,
+                nlink=file._nlink + 1,
+            )
+            self[to].hardlink(file=linked, to=to)
+            if not file._linked:
+                file = self[self.realpath(path=source)]
+                file._parent[file._name] = linked
 
     def readlink(self, path):
         return self[path].readlink(path=path)
 
+    def realpath(self, path, seen=pset()):
+        return common._realpath(fs=self, path=path, seen=seen)
+
     def lstat(self, path):
         return self[path].lstat(path=path)
 
+    def copy(self, source, to):
+        with self._lock:
+            file = self[self.realpath(path=source)]
+            file.stat(path=source)
+            if not isinstance(file, _File):
+                raise exceptions.IsADirectory(source)
+
+            contents = file._contents
+            if (
+                isinstance(contents, _BytesIOIsTerrible)
+                and not contents.closed
+            ):
+                contents = _BytesIOIsTerrible(contents.bytes)
+                contents.close()
+
+            budget = self._budget
+            if (
+                budget is not None
+                and contents._digest is None
+                and self._used() + contents.resident > budget
+            ):
+                raise exceptions.NoSpace(to)
+
+            empty = self[to].open_file(path=to, mode=common._parse_mode("wb"))
+            empty._writing = None
+            empty.close()
+
+            copied = self[self.realpath(path=to)]
+            copied._contents = contents
+            copied._parent[copied._name] = copied
+        return to
+
+    def compression_stats(self):
+        if self._compressor is None:
+            return CompressionStats(
+                files=0,
+                size=0,
+                compressed_size=0,
+                hits=0,
+                misses=0,
+            )
+        return self._compressor.stats()
+
+    def memory_usage(self, path):
+        self._settle()
+        with self._lock:
+            node = self[path]
+            links, shared = self._links, self._shared
+            shared_usage = self._shared_usage
+        node.lstat(path=path)
+        size, nodes = node._usage
+        if not path.segments:
+            size += shared_usage
+        elif shared:
+            size += _shared_usage_of(node, links=links, shared=shared)
+        return MemoryUsage(size=size, nodes=nodes)
+
     def stat(self, path):
         return self[path].stat(path=path)
@@ -2,182 +2,624 @@
 Native filesystems speak to some real (non-in-memory) filesystem.
 """
 
+from collections import OrderedDict
+from contextlib import nullcontext
+from functools import partial
+import errno
+import hashlib
 import os
-import tempfile
+import shutil
+import threading
+import weakref
+
+import attr
 
 from filesystems import Path, common, exceptions
+from filesystems._path import RelativePath
+from filesystems.trie import PathTrie
 
 _CREATE_FLAGS = os.O_EXCL | os.O_CREAT | os.O_RDWR | getattr(os, "O_BINARY", 0)
+_DIRECTORY_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+
+#: The most to ask the kernel to copy at once when copying between files.
+_COPY_CHUNK_SIZE = 1 << 30
+
+#: Errors indicating the kernel can't copy between two particular files.
+_NO_COPY_OFFLOAD = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+
+
+def _errors(*on_path, on_parent=()):
+    """
+    A table translating errnos into the exceptions raised for them.
+
+    Exceptions for errors ``on_parent`` are raised with the parent of the
+    path being operated on, as the problem lies with it.
+    """
+    table = {each.errno: (each, False) for each in on_path}
+    table.update((each.errno, (each, True)) for each in on_parent)
+    return table
+
+
+def _translated(error, path, table):
+    """
+    The exception to raise for an OS error which occurred at a given path.
+    """
+    translation = table.get(error.errno)
+    if translation is None:
+        return error
+    exception, on_parent = translation
+    return exception(path.parent() if on_parent else path)
+
+
+def _try(error, table):
+    """
+    The exception class an OS error translates to, or else reraise it.
+    """
+    translation = table.get(error.errno)
+    if translation is None:
+        raise error
+    return translation[0]
+
+
+_CREATE_FILE_ERRORS = _errors(
+    exceptions.FileNotFound,
+    exceptions.FileExists,
+    exceptions.NotADirectory,
+    on_parent=[exceptions.SymbolicLoop],
+)
+_OPEN_FILE_ERRORS = _errors(
+    exceptions.FileNotFound,
+    exceptions.IsADirectory,
+    exceptions.NotADirectory,
+    exceptions.SymbolicLoop,
+)
+_REMOVE_FILE_ERRORS = _errors(
+    exceptions.FileNotFound,
+    exceptions.IsADirectory,
+    exceptions.NotADirectory,
+    exceptions.PermissionError,
+    on_parent=[exceptions.SymbolicLoop],
+)
+_CREATE_DIRECTORY_ERRORS = _errors(
+    exceptions.FileExists,
+    on_parent=[
+        exceptions.FileNotFound,
+        exceptions.NotADirectory,
+        exceptions.SymbolicLoop,
+    ],
+)
+_LIST_DIRECTORY_ERRORS = _errors(
+    exceptions.FileNotFound,
+    exceptions.NotADirectory,
+    exceptions.SymbolicLoop,
+)
+_REMOVE_EMPTY_DIRECTORY_ERRORS = _errors(
+    exceptions.DirectoryNotEmpty,
+    exceptions.FileNotFound,
+    exceptions.NotADirectory,
+    on_parent=[exceptions.SymbolicLoop],
+)
+_LINK_ERRORS = _errors(
+    exceptions.FileExists,
+    on_parent=[
+        exceptions.FileNotFound,
+        exceptions.NotADirectory,
+        exceptions.SymbolicLoop,
+    ],
+)
+_HARDLINK_ERRORS = _errors(
+    exceptions.FileExists,
+    on_parent=[exceptions.NotADirectory, exceptions.SymbolicLoop],
+)
+_READLINK_ERRORS = _errors(
+    exceptions.FileNotFound,
+    exceptions.NotADirectory,
+    exceptions.NotASymlink,
+    exceptions.SymbolicLoop,
+)
+_STAT_ERRORS = _errors(
+    exceptions.FileNotFound,
+    exceptions.NotADirectory,
+    exceptions.SymbolicLoop,
+)
+
+
+def anchored(cache_size=128):
+    """
+    Create a native filesystem which resolves paths from open directories.
+
+    Rather than passing each full path to the kernel, which walks every one of
+    its components on every call, the containing directory of each path is
+    opened (once) and then used as the ``dir_fd`` for operations on paths
+    within it, so that only the final component needs resolving.
+
+    Up to ``cache_size`` directories are kept open, least recently used first
+    to be closed.
+
+    Changes made by other processes (or other filesystem objects) to the
+    directories held open are not noticed -- in particular, should an open
+    directory be renamed, paths within its old location continue to refer to
+    it.
+    """
+    directories = _OpenDirectories(size=cache_size)
+    AnchoredNativeFS = type(
+        "AnchoredNativeFS",
+        (FS,),
+        dict(
+            _at=staticmethod(directories.at),
+            _forget=staticmethod(directories.forget),
+        ),
+    )
+    fs = AnchoredNativeFS()
+    weakref.finalize(fs, directories.close)
+    return fs
+
+
+@attr.s(eq=False)
+class _OpenDirectories:
+    """
+    An LRU cache of open file descriptors for directories.
+
+    Directories handed out by `at` are in use until the operation using them
+    finishes, and one evicted (or forgotten) in the meantime is only closed
+    once it no longer is, as its descriptor could otherwise be reused for
+    some other file out from under whichever thread is using it.
+    """
+
+    _size = attr.ib()
+    _root = attr.ib(factory=lambda: os.open(os.sep, _DIRECTORY_FLAGS))
+    _fds = attr.ib(factory=PathTrie, repr=False)
+    _recent = attr.ib(factory=OrderedDict, repr=False)
+    _users = attr.ib(factory=dict, repr=False)
+    _evicted = attr.ib(factory=set, repr=False)
+    _lock = attr.ib(factory=threading.Lock, repr=False)
+
+    def at(self, path):
+        """
+        A name and directory file descriptor which refer to the given path.
+
+        They are in use (and so stay open) within the returned context.
+        """
+        if not isinstance(path, Path) or not path.segments:
+            return nullcontext((os.fspath(path), None))
+        if len(path.segments) == 1:
+            # The root is never evicted, so needs no tracking while in use.
+            return nullcontext((path.basename(), self._root))
+
+        parent = path.parent()
+        with self._lock:
+            fd = self._recent.get(parent)
+            if fd is None:
+                name, fd = self._open(path=path, parent=parent)
+            else:
+                self._recent.move_to_end(parent)
+                name = path.basename()
+            self._users[fd] = self._users.get(fd, 0) + 1
+            if len(self._recent) > self._size:
+                evicted, evicted_fd = self._recent.popitem(last=False)
+                del self._fds[evicted]
+                self._discard(evicted_fd)
+        return _InUse(directories=self, name=name, fd=fd)
+
+    def _open(self, path, parent):
+        """
+        Open the given path's parent, from the nearest open directory to it.
+        """
+        nearest, fd = self._fds.longest_prefix(parent, (None, self._root))
+        rest = parent.segments
+        if nearest is not None:
+            self._recent.move_to_end(nearest)
+            rest = rest[len(nearest.segments) :]
+
+        try:
+            name = os.fspath(RelativePath(*rest))
+            opened = os.open(name, _DIRECTORY_FLAGS, dir_fd=fd)
+        except OSError:
+            # Let the real operation find (and report) the problem.
+            return os.fspath(RelativePath(*rest, path.basename())), fd
+        self._fds[parent] = self._recent[parent] = opened
+        return path.basename(), opened
+
+    def _release(self, fd):
+        """
+        Finish using a directory, closing it if it has since been evicted.
+        """
+        with self._lock:
+            users = self._users.pop(fd) - 1
+            if users:
+                self._users[fd] = users
+            elif fd in self._evicted:
+                self._evicted.remove(fd)
+                os.close(fd)
+
+    def _discard(self, fd):
+        """
+        Close a directory no longer cached, once it is no longer in use.
+        """
+        if fd in self._users:
+            self._evicted.add(fd)
+        else:
+            os.close(fd)
+
+    def forget(self, path):
+        """
+        Close any open directories at or beneath a path which was removed.
+        """
+        with self._lock:
+            for each, fd in list(self._fds.subtree(path)):
+                del self._fds[each], self._recent[each]
+                self._discard(fd)
+
+    def close(self):
+        with self._lock:
+            while self._recent:
+                self._discard(self._recent.popitem()[1])
+            self._fds = PathTrie()
+            os.close(self._root)
+
+
+class _InUse:
+    """
+    A directory from an `_OpenDirectories`, in use until this context exits.
+    """
+
+    __slots__ = ("_directories", "_fd", "_name")
+
+    def __init__(self, directories, name, fd):
+        self._directories = directories
+        self._name = name
+        self._fd = fd
+
+    def __enter__(self):
+        return self._name, self._fd
+
+    def __exit__(self, *exc_info):
+        self._directories._release(self._fd)
+
+
+def _at(fs, path):
+    """
+    Plain native filesystems simply pass full paths to the kernel.
+    """
+    return nullcontext((os.fspath(path), None))
 
 
 def _create_file(fs, path):
-    try:
-        fd = os.open(str(path), _CREATE_FLAGS)
-    except OSError as error:
-        if error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path)
-        elif error.errno == exceptions.FileExists.errno:
-            raise exceptions.FileExists(path)
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path)
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path.parent())
-        raise
+    with fs._at(path) as (name, dir_fd):
+        try:
+            fd = os.open(name, _CREATE_FLAGS, dir_fd=dir_fd)
+        except OSError as error:
+            raise _translated(error, path, _CREATE_FILE_ERRORS)
 
-    return os.fdopen(fd, "w+")
+        return os.fdopen(fd, "w+")
 
 
 def _open_file(fs, path, mode):
     mode = common._parse_mode(mode)
+    with fs._at(path) as (name, dir_fd):
+        opener = None if dir_fd is None else partial(os.open, dir_fd=dir_fd)
 
-    try:
-        return open(str(path), mode.io_open_string())
-    except OSError as error:
-        if error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path)
-        elif error.errno == exceptions.IsADirectory.errno:
-            raise exceptions.IsADirectory(path)
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path)
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path)
-        raise
+        try:
+            return open(name, mode.io_open_string(), opener=opener)
+        except OSError as error:
+            raise _translated(error, path, _OPEN_FILE_ERRORS)
 
 
 def _remove_file(fs, path):
-    try:
-        os.remove(str(path))
-    except OSError as error:
-        if error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path)
-        elif error.errno == exceptions.IsADirectory.errno:
-            raise exceptions.IsADirectory(path)
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path)
-        elif error.errno == exceptions.PermissionError.errno:
-            raise exceptions.PermissionError(path)
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path.parent())
-        raise
+    with fs._at(path) as (name, dir_fd):
+        try:
+            os.remove(name, dir_fd=dir_fd)
+        except OSError as error:
+            raise _translated(error, path, _REMOVE_FILE_ERRORS)
+    fs._forget(path)
 
 
 def _create_directory(fs, path, with_parents, allow_existing):
-    try:
-        if with_parents:
-            os.makedirs(str(path), exist_ok=allow_existing)
-        else:
-            os.mkdir(str(path))
-    except OSError as error:
-        if error.errno == exceptions.FileExists.errno:
-            if allow_existing and fs.is_dir(path):
-                return
-            raise exceptions.FileExists(path)
-        elif error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path.parent())
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path.parent())
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path.parent())
-        raise
+    with fs._at(path) as (name, dir_fd):
+        try:
+            if with_parents and dir_fd is None:
+                os.makedirs(name, exist_ok=allow_existing)
+            else:
+                os.mkdir(name, dir_fd=dir_fd)
+        except OSError as error:
+            if error.errno == exceptions.FileNotFound.errno and with_parents:
+                fs.create_directory(
+                    path.parent(),
+                    with_parents=True,
+                    allow_existing=True,
+                )
+                return _create_directory(
+                    fs=fs,
+                    path=path,
+                    with_parents=False,
+                    allow_existing=allow_existing,
+                )
+            elif error.errno == exceptions.FileExists.errno:
+                if allow_existing and fs.is_dir(path):
+                    return
+            raise _translated(error, path, _CREATE_DIRECTORY_ERRORS)
 
 
 def _list_directory(fs, path):
-    try:
-        return os.listdir(str(path))
-    except OSError as error:
-        if error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path)
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path)
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path)
-        raise
+    with fs._at(path) as (name, dir_fd):
+        try:
+            if dir_fd is None:
+                return os.listdir(name)
+            if isinstance(name, bytes):
+                # Listing a file descriptor always produces str names.
+                return os.listdir(os.fspath(path))
+            fd = os.open(name, _DIRECTORY_FLAGS, dir_fd=dir_fd)
+            try:
+                return os.listdir(fd)
+            finally:
+                os.close(fd)
+        except OSError as error:
+            raise _translated(error, path, _LIST_DIRECTORY_ERRORS)
 
 
 def _remove_empty_directory(fs, path):
-    try:
-        os.rmdir(str(path))
-    except OSError as error:
-        if error.errno == exceptions.DirectoryNotEmpty.errno:
-            raise exceptions.DirectoryNotEmpty(path)
-        elif error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path)
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path)
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path.parent())
-        raise
+    with fs._at(path) as (name, dir_fd):
+        try:
+            os.rmdir(name, dir_fd=dir_fd)
+        except OSError as error:
+            raise _translated(error, path, _REMOVE_EMPTY_DIRECTORY_ERRORS)
+    fs._forget(path)
 
 
 def _link(fs, source, to):
-    try:
-        os.symlink(str(source), str(to))
-    except OSError as error:
-        if error.errno == exceptions.FileExists.errno:
-            raise exceptions.FileExists(to)
-        elif error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(to.parent())
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(to.parent())
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(to.parent())
-        raise
+    with fs._at(to) as (name, dir_fd):
+        try:
+            os.symlink(os.fspath(source), name, dir_fd=dir_fd)
+        except OSError as error:
+            raise _translated(error, to, _LINK_ERRORS)
+
+
+def _hardlink(fs, source, to):
+    with (
+        fs._at(source) as (source_name, source_dir_fd),
+        fs._at(to) as (name, dir_fd),
+    ):
+        if source_dir_fd is None:
+            # Without any directory to link relative to, os.link calls
+            # link(2), which (on Linux) does not follow links, unlike
+            # linkat(2).
+            source_name = os.path.realpath(source_name)
+        try:
+            os.link(
+                source_name,
+                name,
+                src_dir_fd=source_dir_fd,
+                dst_dir_fd=dir_fd,
+            )
+        except OSError as error:
+            # The error may lie with either path, so work out which.
+            if error.errno == errno.ENOENT:
+                missing = to.parent() if fs.exists(source) else source
+                raise exceptions.FileNotFound(missing)
+            if error.errno == errno.EPERM:
+                raise exceptions.PermissionError(source)
+            raise _translated(error, to, _HARDLINK_ERRORS)
 
 
 def _readlink(fs, path):
-    try:
-        value = os.readlink(str(path))
-    except OSError as error:
-        if error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path)
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path)
-        elif error.errno == exceptions.NotASymlink.errno:
-            raise exceptions.NotASymlink(path)
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path)
-        raise
-    else:
-        return Path.from_string(value)
+    with fs._at(path) as (name, dir_fd):
+        try:
+            value = os.readlink(name, dir_fd=dir_fd)
+        except OSError as error:
+            raise _translated(error, path, _READLINK_ERRORS)
+        else:
+            return Path.from_string(value)
 
 
 def _stat(fs, path):
-    try:
-        return os.stat(str(path))
-    except OSError as error:
-        if error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path)
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path)
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path)
-        raise
+    with fs._at(path) as (name, dir_fd):
+        try:
+            return os.stat(name, dir_fd=dir_fd)
+        except OSError as error:
+            raise _translated(error, path, _STAT_ERRORS)
 
 
 def _lstat(fs, path):
+    with fs._at(path) as (name, dir_fd):
+        try:
+            return os.lstat(name, dir_fd=dir_fd)
+        except OSError as error:
+            raise _translated(error, path, _STAT_ERRORS)
+
+
+def _try_readlink(fs, path):
+    with fs._at(path) as (name, dir_fd):
+        try:
+            value = os.readlink(name, dir_fd=dir_fd)
+        except OSError as error:
+            return _try(error, _READLINK_ERRORS)
+        return Path.from_string(value)
+
+
+def _try_stat(fs, path):
+    with fs._at(path) as (name, dir_fd):
+        try:
+            return os.stat(name, dir_fd=dir_fd)
+        except OSError as error:
+            return _try(error, _STAT_ERRORS)
+
+
+def _try_lstat(fs, path):
+    with fs._at(path) as (name, dir_fd):
+        try:
+            return os.lstat(name, dir_fd=dir_fd)
+        except OSError as error:
+            return _try(error, _STAT_ERRORS)
+
+
+def _digest(fs, path, algorithm="sha256", tree_chunk_size=None):
+    """
+    Hash a file, reading the ranges of a tree hash in parallel.
+
+    Each range is read with ``os.pread`` from a shared file descriptor, so
+    ranges can be read and hashed concurrently without seeking.
+    """
+    if tree_chunk_size is None or not hasattr(os, "pread"):
+        return common._digest(
+            fs=fs,
+            path=path,
+            algorithm=algorithm,
+            tree_chunk_size=tree_chunk_size,
+        )
+
+    with fs.open(path=path, mode="rb") as file:
+        fd = file.fileno()
+
+        def leaf(offset):
+            chunk = os.pread(fd, tree_chunk_size, offset)
+            return hashlib.new(algorithm, chunk).digest()
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        size = os.fstat(fd).st_size
+        with ThreadPoolExecutor() as pool:
+            return common._tree_digest(
+                algorithm=algorithm,
+                leaves=pool.map(leaf, range(0, size, tree_chunk_size)),
+            )
+
+
+def _scan(path):
+    """
+    Scan a directory, returning its files' stat results and its subdirectories.
+    """
+    files, directories = [], []
     try:
-        return os.lstat(str(path))
+        with os.scandir(os.fspath(path)) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(path / entry.name)
+                else:
+                    files.append(entry.stat(follow_symlinks=False))
     except OSError as error:
-        if error.errno == exceptions.FileNotFound.errno:
-            raise exceptions.FileNotFound(path)
-        elif error.errno == exceptions.NotADirectory.errno:
-            raise exceptions.NotADirectory(path)
-        elif error.errno == exceptions.SymbolicLoop.errno:
-            raise exceptions.SymbolicLoop(path)
-        raise
+        raise _translated(error, path, _LIST_DIRECTORY_ERRORS)
+    return files, directories
 
 
-FS = common.create(
-    name="NativeFS",
+def _size_of(files, seen):
+    """
+    The total size of some files, skipping any already seen hard links.
+    """
+    size = 0
+    for each in files:
+        if each.st_nlink > 1:
+            inode = each.st_dev, each.st_ino
+            if inode in seen:
+                continue
+            seen.add(inode)
+        size += each.st_size
+    return size
+
+
+def _disk_usage(fs, path, by_depth=0, max_workers=None):
+    """
+    Total up the (apparent) size of files within a directory, in parallel.
+
+    Directories are scanned with ``os.scandir`` across a pool of threads, and
+    each directory's usage is yielded as soon as everything beneath it has
+    been scanned, so large trees are never held in memory all at once.
+
+    See `common._disk_usage`.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    seen = set()
+    totals, remaining = {}, {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_scan, path): (path, 0)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory, depth = pending.pop(future)
+                    files, subdirectories = future.result()
+
+                    totals[directory] = common.DiskUsage(
+                        path=directory,
+                        size=_size_of(files, seen=seen),
+                        files=len(files),
+                    )
+                    remaining[directory] = len(subdirectories)
+
+                    for subdirectory in subdirectories:
+                        future = pool.submit(_scan, subdirectory)
+                        pending[future] = subdirectory, depth + 1
+
+                    while not remaining[directory]:
+                        del remaining[directory]
+                        total = totals.pop(directory)
+                        if depth <= by_depth:
+                            yield total
+                        if not depth:
+                            break
+                        directory, depth = directory.parent(), depth - 1
+                        totals[directory] = totals[directory].including(total)
+                        remaining[directory] -= 1
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _temporary_directory(fs):
+    import tempfile
+
+    return Path.from_string(tempfile.mkdtemp())
+
+
+def _copy_file(source, to):
+    """
+    Copy a native file, letting the kernel do the copying where it can.
+
+    ``os.copy_file_range`` copies without the contents passing through this
+    process (and lets filesystems which support it share extents or copy on
+    the server side). Otherwise, we fall back to `shutil.copyfile`, which
+    uses whichever other fast copying is available.
+    """
+    if hasattr(os, "copy_file_range"):
+        with open(source, "rb") as input, open(to, "wb") as output:
+            try:
+                while os.copy_file_range(
+                    input.fileno(),
+                    output.fileno(),
+                    _COPY_CHUNK_SIZE,
+                ):
+                    pass
+            except OSError as error:
+                if error.errno not in _NO_COPY_OFFLOAD:
+                    raise
+            else:
+                return
+    shutil.copyfile(source, to)
+
+
+_METHODS = dict(
     create_file=_create_file,
     open_file=_open_file,
     remove_file=_remove_file,
     create_directory=_create_directory,
     list_directory=_list_directory,
     remove_empty_directory=_remove_empty_directory,
-    temporary_directory=lambda fs: Path.from_string(tempfile.mkdtemp()),
+    temporary_directory=_temporary_directory,
     stat=_stat,
     lstat=_lstat,
     link=_link,
+    hardlink=_hardlink,
     readlink=_readlink,
+    try_stat=_try_stat,
+    try_lstat=_try_lstat,
+    try_readlink=_try_readlink,
+    digest=_digest,
+    disk_usage=_disk_usage,
+)
+FS = common.create(
+    name="NativeFS",
+    _at=_at,
+    _forget=lambda fs, path: None,
+    **_METHODS,
 )
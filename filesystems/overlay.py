@@ -0,0 +1,420 @@
+"""
+A copy-on-write filesystem layering a writable filesystem over a native one.
+
+The lower (native) directory is never modified. Files are copied up into the
+upper layer the first time they are written to, removing a file from the
+lower layer records a whiteout which hides it, and directories present in
+both layers list the union of their contents.
+
+Symbolic links are stored verbatim, and followed through the overlay as a
+whole rather than by whichever layer contains them, so that a link in either
+layer can point at something in the other, and absolute links are relative
+to the overlay's root.
+
+Neither layer is expected to change other than through the overlay. Paths
+which no change has touched, and which have no links along them, are read
+straight from the lower layer.
+"""
+
+from collections import OrderedDict
+from functools import partial
+import os
+import shutil
+import stat
+import threading
+
+from pyrsistent import pset
+import attr
+
+from filesystems import Path, common, exceptions, memory, native
+from filesystems.trie import PathSet
+
+#: How many results from the lower layer to remember.
+_CACHE_SIZE = 4096
+
+
+def FS(lower, upper_fs=None, upper=Path.root()):
+    """
+    Create a filesystem layering a writable filesystem over a native one.
+
+    Arguments:
+
+        lower:
+
+            the path to a native directory, which will appear as the root
+            of the created filesystem, but which will never be modified
+
+        upper_fs:
+
+            a filesystem to write changes to, by default a new in-memory
+            one
+
+        upper:
+
+            a directory within ``upper_fs`` which will hold changes
+
+    """
+    if upper_fs is None:
+        upper_fs = memory.FS()
+    state = _Overlay(lower=lower, upper_fs=upper_fs, upper=upper)
+    if upper_fs.exists(upper) and upper_fs.list_directory(upper):
+        # Whatever is already there may hide anything in the lower layer.
+        state._shadowed.add(Path.root())
+    return state.FS(name="OverlayFS")
+
+
+@attr.s
+class _Overlay:
+
+    _lower = attr.ib()
+    _upper_fs = attr.ib()
+    _upper = attr.ib()
+    _lower_fs = attr.ib(factory=native.FS, repr=False)
+    _whiteouts = attr.ib(factory=PathSet, repr=False)
+    _cached = attr.ib(factory=OrderedDict, repr=False)
+
+    #: Paths at which the upper layer hides (or may hide) the lower one.
+    _shadowed = attr.ib(factory=PathSet, repr=False)
+    #: Directories copied into the upper layer, whose contents are merged.
+    _merged = attr.ib(factory=set, repr=False)
+    #: Directories in the lower layer which have no links along them.
+    _plain = attr.ib(factory=PathSet, repr=False)
+    _lock = attr.ib(factory=threading.Lock, repr=False)
+
+    def FS(self, name):
+        return common.create(
+            name=name,
+            create_file=staticmethod(self.create_file),
+            open_file=staticmethod(self.open_file),
+            remove_file=staticmethod(self.remove_file),
+            create_directory=staticmethod(self.create_directory),
+            list_directory=staticmethod(self.list_directory),
+            remove_empty_directory=staticmethod(self.remove_empty_directory),
+            temporary_directory=staticmethod(self.temporary_directory),
+            stat=staticmethod(self.stat),
+            lstat=staticmethod(self.lstat),
+            link=staticmethod(self.link),
+            readlink=staticmethod(self.readlink),
+            realpath=staticmethod(self.realpath),
+        )()
+
+    def _resolved(self, path, follow):
+        return common._resolved(self.realpath, path=path, follow=follow)
+
+    def _plain_directory(self, path):
+        """
+        Is the given path a directory in the lower layer, reached directly?
+
+        Directories reached through a link are not.
+        """
+        if not path.segments or path in self._plain:
+            return True
+        if not self._plain_directory(path.parent()):
+            return False
+        try:
+            mode = self._from_lower("lstat", path).st_mode
+        except exceptions._FileSystemError:
+            return False
+        if not stat.S_ISDIR(mode):
+            return False
+        with self._lock:
+            self._plain.add(path)
+        return True
+
+    def _lower_only(self, path):
+        """
+        Is whatever is at the given path just as the lower layer has it?
+
+        Nothing above it may be a link, though it may be one itself, and the
+        lower layer may have nothing there at all.
+        """
+        return (
+            not self._shadowed.has_prefix(path)
+            and path not in self._merged
+            and (not path.segments or self._plain_directory(path.parent()))
+        )
+
+    def _lower_lstat(self, path):
+        """
+        The lower layer's lstat result for an untouched path, if it has one.
+        """
+        if self._lower_only(path):
+            try:
+                return self._from_lower("lstat", path)
+            except exceptions._FileSystemError:
+                return None
+        return None
+
+    def _in_upper(self, path):
+        """
+        Is there anything at the given path in the upper layer?
+        """
+        try:
+            with common._rooted_at(self._upper):
+                self._upper_fs.lstat(self._upper.descendant(*path.segments))
+        except exceptions.FileNotFound:
+            return False
+        return True
+
+    def _in_lower(self, path):
+        """
+        Is there anything at the given path in the lower layer, not whited out?
+        """
+        if self._whiteouts.has_prefix(path):
+            return False
+        try:
+            self._from_lower("lstat", path)
+        except exceptions.FileNotFound:
+            return False
+        return True
+
+    def _from_lower(self, method, path):
+        """
+        Call a method on the lower layer, which never changes, so is cached.
+        """
+        key = method, path
+        with self._lock:
+            result = self._cached.get(key)
+            if result is not None:
+                self._cached.move_to_end(key)
+        if result is None:
+            try:
+                with common._rooted_at(self._lower):
+                    lower = self._lower.descendant(*path.segments)
+                    result = getattr(self._lower_fs, method)(lower)
+            except exceptions._FileSystemError as error:
+                result = error
+            with self._lock:
+                self._cached[key] = result
+                if len(self._cached) > _CACHE_SIZE:
+                    self._cached.popitem(last=False)
+
+        if isinstance(result, exceptions._FileSystemError):
+            raise result.__class__(result.value)
+        return result
+
+    def _from_either(self, method, path):
+        """
+        Call a method on whichever layer the given path lives in.
+        """
+        if self._in_upper(path) or not self._in_lower(path):
+            with common._rooted_at(self._upper):
+                upper = self._upper.descendant(*path.segments)
+                return getattr(self._upper_fs, method)(upper)
+        return self._from_lower(method, path)
+
+    def _white_out(self, path):
+        """
+        Hide whatever the lower layer has at the given path (if anything).
+        """
+        try:
+            self._from_lower("lstat", path)
+        except (exceptions.FileNotFound, exceptions.NotADirectory):
+            return
+        with self._lock:
+            self._shadowed.add(path)
+            self._whiteouts.add(path)
+
+    def _visible_lower_children(self, path):
+        return [
+            name
+            for name in self._from_lower("list_directory", path)
+            if path / name not in self._whiteouts
+        ]
+
+    def _copy_up_parents(self, path):
+        """
+        Copy any directories containing the given path into the upper layer.
+        """
+        for ancestor in list(path.heritage())[:-1]:
+            if not self._in_upper(ancestor):
+                if not self._in_lower(ancestor):
+                    return
+                self._copy_up(ancestor)
+
+    def _copy_up(self, path):
+        """
+        Copy the given path from the lower layer into the upper one.
+        """
+        self._copy_up_parents(path)
+
+        upper = self._upper.descendant(*path.segments)
+        lower = self._lower.descendant(*path.segments)
+        mode = self._from_lower("lstat", path).st_mode
+        with self._lock:
+            if stat.S_ISDIR(mode):
+                self._merged.add(path)
+            else:
+                self._shadowed.add(path)
+        with common._rooted_at(self._upper):
+            if stat.S_ISDIR(mode):
+                self._upper_fs.create_directory(upper)
+            elif stat.S_ISLNK(mode):
+                source = self._from_lower("readlink", path)
+                self._upper_fs.link(source=source, to=upper)
+            else:
+                with (
+                    self._lower_fs.open(lower, "rb") as original,
+                    self._upper_fs.open(upper, "wb") as copy,
+                ):
+                    shutil.copyfileobj(original, copy)
+
+    def _in_either(self, path):
+        """
+        Is there anything at the given path, which is about to be created?
+        """
+        try:
+            return self._in_upper(path), self._in_lower(path)
+        except exceptions.NotADirectory:
+            raise exceptions.NotADirectory(path.parent())
+
+    def create_directory(self, path, with_parents, allow_existing):
+        with self._resolved(path, follow=False) as real:
+            upper = self._upper.descendant(*real.segments)
+            in_upper, in_lower = self._in_either(real)
+            if not in_upper:
+                if in_lower:
+                    if allow_existing and stat.S_ISDIR(
+                        self.stat(real).st_mode,
+                    ):
+                        return
+                    raise exceptions.FileExists(real)
+                self._copy_up_parents(real)
+
+            with common._rooted_at(self._upper):
+                self._upper_fs.create_directory(
+                    upper,
+                    with_parents=with_parents,
+                    allow_existing=allow_existing,
+                )
+
+    def list_directory(self, path):
+        lstat = self._lower_lstat(path)
+        if lstat is not None and stat.S_ISDIR(lstat.st_mode):
+            return pset(self._visible_lower_children(path))
+
+        with self._resolved(path, follow=True) as real:
+            in_upper, in_lower = self._in_upper(real), self._in_lower(real)
+            names = set()
+            if in_upper or not in_lower:
+                with common._rooted_at(self._upper):
+                    upper = self._upper.descendant(*real.segments)
+                    names.update(self._upper_fs.list_directory(upper))
+            if in_lower:
+                names.update(self._visible_lower_children(real))
+            return pset(names)
+
+    def remove_empty_directory(self, path):
+        with self._resolved(path, follow=False) as real:
+            if self._in_lower(real):
+                if not stat.S_ISDIR(self._from_lower("lstat", real).st_mode):
+                    raise exceptions.NotADirectory(real)
+                if self._visible_lower_children(real):
+                    raise exceptions.DirectoryNotEmpty(real)
+
+            if self._in_upper(real) or not self._in_lower(real):
+                with common._rooted_at(self._upper):
+                    upper = self._upper.descendant(*real.segments)
+                    self._upper_fs.remove_empty_directory(upper)
+            self._white_out(real)
+
+    def temporary_directory(self):
+        directory = Path(os.urandom(16).hex())
+        self.create_directory(
+            path=directory,
+            with_parents=False,
+            allow_existing=False,
+        )
+        return directory
+
+    def create_file(self, path):
+        with self._resolved(path, follow=False) as real:
+            if self._in_upper(real) or self._in_lower(real):
+                raise exceptions.FileExists(real)
+            self._copy_up_parents(real)
+            with common._rooted_at(self._upper):
+                upper = self._upper.descendant(*real.segments)
+                return self._upper_fs.create(upper)
+
+    def open_file(self, path, mode):
+        parsed = common._parse_mode(mode=mode)
+        if parsed.read:
+            lstat = self._lower_lstat(path)
+            if lstat is not None and stat.S_ISREG(lstat.st_mode):
+                with common._rooted_at(self._lower):
+                    lower = self._lower.descendant(*path.segments)
+                    return self._lower_fs.open(lower, mode)
+
+        with self._resolved(path, follow=True) as real:
+            if not self._in_upper(real) and self._in_lower(real):
+                if parsed.read:
+                    with common._rooted_at(self._lower):
+                        lower = self._lower.descendant(*real.segments)
+                        return self._lower_fs.open(lower, mode)
+
+                lstat = self._from_lower("lstat", real)
+                if parsed.append or not stat.S_ISREG(lstat.st_mode):
+                    self._copy_up(real)
+                else:
+                    self._copy_up_parents(real)
+                    with self._lock:
+                        self._shadowed.add(real)
+            elif not parsed.read:
+                self._copy_up_parents(real)
+
+            with common._rooted_at(self._upper):
+                upper = self._upper.descendant(*real.segments)
+                return self._upper_fs.open(upper, mode)
+
+    def remove_file(self, path):
+        with self._resolved(path, follow=False) as real:
+            if self._in_upper(real) or not self._in_lower(real):
+                with common._rooted_at(self._upper):
+                    upper = self._upper.descendant(*real.segments)
+                    self._upper_fs.remove_file(upper)
+            elif stat.S_ISDIR(self._from_lower("lstat", real).st_mode):
+                raise exceptions._UnlinkNonFileError(real)
+            self._white_out(real)
+
+    def link(self, source, to):
+        with self._resolved(to, follow=False) as real:
+            if any(self._in_either(real)):
+                raise exceptions.FileExists(real)
+            self._copy_up_parents(real)
+            with common._rooted_at(self._upper):
+                upper = self._upper.descendant(*real.segments)
+                self._upper_fs.link(source=source, to=upper)
+
+    def readlink(self, path):
+        lstat = self._lower_lstat(path)
+        if lstat is not None and stat.S_ISLNK(lstat.st_mode):
+            return self._from_lower("readlink", path)
+
+        with self._resolved(path, follow=False) as real:
+            return self._from_either("readlink", real)
+
+    def realpath(self, path, seen=pset()):
+        lstat = self._lower_lstat(path)
+        if lstat is not None and not stat.S_ISLNK(lstat.st_mode):
+            return path
+
+        merged = common._Resolver(
+            readlink=partial(self._from_either, "readlink"),
+        )
+        return merged.realpath(path=path, seen=seen)
+
+    def stat(self, path):
+        lstat = self._lower_lstat(path)
+        if lstat is not None and not stat.S_ISLNK(lstat.st_mode):
+            return lstat
+
+        with self._resolved(path, follow=True) as real:
+            return self._from_either("stat", real)
+
+    def lstat(self, path):
+        lstat = self._lower_lstat(path)
+        if lstat is not None:
+            return lstat
+
+        with self._resolved(path, follow=False) as real:
+            return self._from_either("lstat", real)
@@ -0,0 +1,418 @@
+"""
+A filesystem stored in a single SQLite database.
+
+Every file, directory and symbolic link is one row of a table, indexed by
+its parent directory and name, with the contents of files stored alongside
+them. This suits very many small files, which would otherwise each use up
+an inode (and which are slow to list or remove one by one).
+
+Each change is its own transaction unless made within ``fs.transaction()``,
+which groups every change made within it into one, committed only once it
+ends (and rolled back if it fails). Writing many files within a single
+transaction is far faster than committing after each.
+
+The database stays open until the filesystem is closed, either with
+``fs.close()`` or by using it as a context manager.
+"""
+
+from contextlib import contextmanager
+import io
+import os
+import sqlite3
+import stat
+import threading
+import time
+
+from pyrsistent import pset
+import attr
+
+from filesystems import Path, common, exceptions
+
+_ROOT = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    parent INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    kind INTEGER NOT NULL,
+    contents BLOB,
+    mtime REAL NOT NULL,
+    UNIQUE (parent, name)
+)
+"""
+
+_REMOVE_TREE = """
+WITH RECURSIVE tree(id) AS (
+    VALUES (?)
+    UNION ALL
+    SELECT entries.id FROM entries JOIN tree ON entries.parent = tree.id
+)
+DELETE FROM entries WHERE id IN tree AND id != ?
+"""
+
+
+def FS(path=None):
+    """
+    Create a filesystem stored in an SQLite database.
+
+    The filesystem should be closed once it is no longer needed.
+
+    Arguments:
+
+        path:
+
+            the (native) path to the database, which is created if it does
+            not exist, or by default a new database held in memory
+
+    """
+    database = ":memory:" if path is None else os.fspath(path)
+    connection = sqlite3.connect(
+        database,
+        isolation_level=None,
+        check_same_thread=False,
+    )
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute(_SCHEMA)
+    connection.execute(
+        "INSERT OR IGNORE INTO entries VALUES (?, 0, '', ?, NULL, 0)",
+        (_ROOT, stat.S_IFDIR),
+    )
+    state = _Database(connection=connection)
+    return state.FS(name="SQLiteFS")
+
+
+class _Writer(io.BytesIO):
+    """
+    A file being written, whose contents are stored once it is closed.
+    """
+
+    def __init__(self, state, id, contents=b""):
+        super().__init__(contents)
+        self.seek(0, io.SEEK_END)
+        self._state = state
+        self._id = id
+
+    def close(self):
+        if not self.closed:
+            self._state._store(id=self._id, contents=self.getvalue())
+        super().close()
+
+
+@attr.s
+class _Database:
+
+    _connection = attr.ib(repr=False)
+
+    #: The connection is shared, so is used by one thread at a time, which
+    #: also keeps other threads out of any transaction in progress.
+    _lock = attr.ib(factory=threading.RLock, repr=False)
+
+    #: How many transactions we are within, of which only the outermost is
+    #: a real one.
+    _depth = attr.ib(default=0, repr=False)
+
+    def FS(self, name):
+        return common.create(
+            name=name,
+            create_file=staticmethod(self.create_file),
+            open_file=staticmethod(self.open_file),
+            remove_file=staticmethod(self.remove_file),
+            create_directory=staticmethod(self.create_directory),
+            list_directory=staticmethod(self.list_directory),
+            remove_empty_directory=staticmethod(self.remove_empty_directory),
+            temporary_directory=staticmethod(self.temporary_directory),
+            stat=staticmethod(self.stat),
+            lstat=staticmethod(self.lstat),
+            link=staticmethod(self.link),
+            readlink=staticmethod(self.readlink),
+            realpath=staticmethod(self.realpath),
+            remove=staticmethod(self.remove),
+            transaction=staticmethod(self.transaction),
+            **common._closing(close=staticmethod(self.close)),
+        )()
+
+    def close(self):
+        """
+        Close the database, after which the filesystem can no longer be used.
+        """
+        with self._lock:
+            self._connection.close()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            if not self._depth:
+                self._connection.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if not self._depth:
+                    self._connection.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if not self._depth:
+                self._connection.execute("COMMIT")
+
+    def _execute(self, query, *parameters):
+        with self._lock:
+            return self._connection.execute(query, parameters)
+
+    def _one(self, query, *parameters):
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchone()
+
+    def _all(self, query, *parameters):
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def _child(self, parent, name):
+        """
+        The id and kind of the given child of a directory, if it exists.
+        """
+        row = self._one(
+            "SELECT id, kind FROM entries WHERE parent = ? AND name = ?",
+            parent,
+            name,
+        )
+        return (None, None) if row is None else row
+
+    def _lookup(self, path):
+        """
+        Find the parent, id and kind of whatever is at the given path.
+
+        A final link is not followed. The id and kind are None if nothing
+        exists there but something could be created.
+        """
+        parent, id, kind = None, _ROOT, stat.S_IFDIR
+        for depth, segment in enumerate(path.segments):
+            if kind == stat.S_IFLNK:
+                ancestor = Path(*path.segments[:depth])
+                try:
+                    _, id, kind = self._followed(ancestor)
+                except (
+                    exceptions.FileNotFound,
+                    exceptions.NotADirectory,
+                ) as error:
+                    raise error.__class__(path) from None
+            if kind is None:
+                raise exceptions.FileNotFound(path)
+            if kind != stat.S_IFDIR:
+                raise exceptions.NotADirectory(path)
+            parent = id
+            id, kind = self._child(parent=parent, name=segment)
+        return parent, id, kind
+
+    def _followed(self, path):
+        """
+        Find whatever is at the given path, following a final link.
+        """
+        parent, id, kind = self._lookup(path)
+        if kind == stat.S_IFLNK:
+            try:
+                return self._lookup(self.realpath(path=path))
+            except (exceptions.FileNotFound, exceptions.NotADirectory) as e:
+                raise e.__class__(path) from None
+        return parent, id, kind
+
+    def _insert(self, parent, name, kind, contents=None):
+        return self._execute(
+            "INSERT INTO entries (parent, name, kind, contents, mtime) "
+            "VALUES (?, ?, ?, ?, ?)",
+            parent,
+            name,
+            kind,
+            contents,
+            time.time(),
+        ).lastrowid
+
+    def _store(self, id, contents):
+        with self.transaction():
+            self._execute(
+                "UPDATE entries SET contents = ?, mtime = ? WHERE id = ?",
+                contents,
+                time.time(),
+                id,
+            )
+
+    def create_directory(self, path, with_parents, allow_existing):
+        with self.transaction():
+            try:
+                parent, _, kind = self._lookup(path)
+            except exceptions.FileNotFound:
+                if not with_parents:
+                    raise exceptions.FileNotFound(path.parent()) from None
+                self.create_directory(
+                    path=path.parent(),
+                    with_parents=with_parents,
+                    allow_existing=True,
+                )
+                parent, _, kind = self._lookup(path)
+            except exceptions.NotADirectory:
+                raise exceptions.NotADirectory(path.parent()) from None
+
+            if kind is None:
+                self._insert(
+                    parent=parent,
+                    name=path.basename(),
+                    kind=stat.S_IFDIR,
+                )
+            elif not allow_existing or not stat.S_ISDIR(
+                self.stat(path).st_mode,
+            ):
+                raise exceptions.FileExists(path)
+
+    def list_directory(self, path):
+        _, id, kind = self._followed(path)
+        if kind is None:
+            raise exceptions.FileNotFound(path)
+        if kind != stat.S_IFDIR:
+            raise exceptions.NotADirectory(path)
+        names = self._all("SELECT name FROM entries WHERE parent = ?", id)
+        return pset(name for name, in names)
+
+    def remove_empty_directory(self, path):
+        with self.transaction():
+            _, id, kind = self._lookup(path)
+            if kind is None:
+                raise exceptions.FileNotFound(path)
+            if kind != stat.S_IFDIR:
+                raise exceptions.NotADirectory(path)
+            child = self._one(
+                "SELECT 1 FROM entries WHERE parent = ? LIMIT 1",
+                id,
+            )
+            if child is not None:
+                raise exceptions.DirectoryNotEmpty(path)
+            self._execute("DELETE FROM entries WHERE id = ?", id)
+
+    def temporary_directory(self):
+        directory = Path(os.urandom(16).hex())
+        self.create_directory(
+            path=directory,
+            with_parents=False,
+            allow_existing=False,
+        )
+        return directory
+
+    def create_file(self, path):
+        with self.transaction():
+            _, id, _ = self._lookup(path)
+            if id is not None:
+                raise exceptions.FileExists(path)
+            return self.open_file(path=path, mode="w")
+
+    def open_file(self, path, mode):
+        mode = common._parse_mode(mode=mode)
+        if mode.read:
+            _, id, kind = self._followed(path)
+            if kind is None:
+                raise exceptions.FileNotFound(path)
+            if kind == stat.S_IFDIR:
+                raise exceptions.IsADirectory(path)
+            (contents,) = self._one(
+                "SELECT contents FROM entries WHERE id = ?",
+                id,
+            )
+            file = io.BytesIO(contents)
+        else:
+            with self.transaction():
+                real = path
+                parent, id, kind = self._lookup(path)
+                if kind == stat.S_IFLNK:
+                    real = self.realpath(path=path)
+                    parent, id, kind = self._followed(path)
+                if kind == stat.S_IFDIR:
+                    raise exceptions.IsADirectory(path)
+                if kind is None:
+                    id = self._insert(
+                        parent=parent,
+                        name=real.basename(),
+                        kind=stat.S_IFREG,
+                        contents=b"",
+                    )
+                    file = _Writer(state=self, id=id)
+                elif mode.append:
+                    (contents,) = self._one(
+                        "SELECT contents FROM entries WHERE id = ?",
+                        id,
+                    )
+                    file = _Writer(state=self, id=id, contents=contents)
+                else:
+                    self._store(id=id, contents=b"")
+                    file = _Writer(state=self, id=id)
+
+        if mode.text:
+            return io.TextIOWrapper(file)
+        return file
+
+    def remove_file(self, path):
+        with self.transaction():
+            _, id, kind = self._lookup(path)
+            if kind is None:
+                raise exceptions.FileNotFound(path)
+            if kind == stat.S_IFDIR:
+                raise exceptions._UnlinkNonFileError(path)
+            self._execute("DELETE FROM entries WHERE id = ?", id)
+
+    def remove(self, path):
+        with self.transaction():
+            _, id, kind = self._lookup(path)
+            if kind is None:
+                raise exceptions.FileNotFound(path)
+            self._execute(_REMOVE_TREE, id, _ROOT)
+
+    def link(self, source, to):
+        with self.transaction():
+            try:
+                parent, id, _ = self._lookup(to)
+            except (exceptions.FileNotFound, exceptions.NotADirectory) as e:
+                raise e.__class__(to.parent()) from None
+            if id is not None:
+                raise exceptions.FileExists(to)
+            self._insert(
+                parent=parent,
+                name=to.basename(),
+                kind=stat.S_IFLNK,
+                contents=str(source),
+            )
+
+    def readlink(self, path):
+        _, id, kind = self._lookup(path)
+        if kind is None:
+            raise exceptions.FileNotFound(path)
+        if kind != stat.S_IFLNK:
+            raise exceptions.NotASymlink(path)
+        (source,) = self._one(
+            "SELECT contents FROM entries WHERE id = ?",
+            id,
+        )
+        return Path.from_string(source)
+
+    def realpath(self, path, seen=pset()):
+        return common._realpath(fs=self, path=path, seen=seen)
+
+    def _stat(self, path, id):
+        if id is None:
+            raise exceptions.FileNotFound(path)
+        kind, size, mtime = self._one(
+            "SELECT kind, length(contents), mtime FROM entries WHERE id = ?",
+            id,
+        )
+        return common._stat_result(
+            mode=kind,
+            ino=id,
+            size=size or 0,
+            mtime=mtime,
+        )
+
+    def stat(self, path):
+        _, id, _ = self._followed(path)
+        return self._stat(path=path, id=id)
+
+    def lstat(self, path):
+        _, id, _ = self._lookup(path)
+        return self._stat(path=path, id=id)
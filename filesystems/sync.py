@@ -0,0 +1,187 @@
+"""
+Synchronize a tree on one filesystem with one on another, like ``rsync``.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import stat
+
+from pyrsistent import pset
+import attr
+
+from filesystems import exceptions, native
+
+
+@attr.s(frozen=True)
+class Synced:
+    """
+    The destination paths which were changed by a sync.
+    """
+
+    copied = attr.ib(default=pset())
+    removed = attr.ib(default=pset())
+
+
+def sync(  # noqa: PLR0917
+    source_fs,
+    source_path,
+    dest_fs,
+    dest_path,
+    checksum=False,
+    delete=False,
+    max_workers=None,
+):
+    """
+    Make a directory on one filesystem match one on another.
+
+    Only files which have changed are copied -- those whose size differs, or
+    which were modified in the source more recently than in the destination,
+    or, if ``checksum`` is true, those whose sizes or digests differ. Symbolic
+    links are copied as links. If ``delete`` is true, anything in the
+    destination which is not in the source is removed. Files copied onto
+    native filesystems keep their modification times from the source.
+
+    The source is listed on the calling thread while files are compared and
+    copied on a pool of worker threads. Between two native filesystems, files
+    are copied by the kernel where possible.
+    """
+    if _is_native(source_fs) and _is_native(dest_fs):
+        copy = _copy_native
+    else:
+        copy = _copy
+
+    syncer = _Sync(
+        source_fs=source_fs,
+        dest_fs=dest_fs,
+        checksum=checksum,
+        delete=delete,
+        copy=copy,
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        copying = syncer.directory(source_path, dest_path, pool=pool)
+        copied = pset(path for path in copying if path is not None)
+    return Synced(copied=copied, removed=pset(syncer.removed))
+
+
+def _is_native(fs):
+    """
+    Is the given filesystem a native one?
+    """
+    return isinstance(fs, native.FS)
+
+
+def _copy(source_fs, source, dest_fs, dest):
+    with (
+        source_fs.open(path=source, mode="rb") as input,
+        dest_fs.open(path=dest, mode="wb") as output,
+    ):
+        shutil.copyfileobj(input, output)
+
+
+def _copy_native(source_fs, source, dest_fs, dest):
+    native._copy_file(source=source, to=dest)
+
+
+@attr.s(eq=False)
+class _Sync:
+
+    _source_fs = attr.ib()
+    _dest_fs = attr.ib()
+    _checksum = attr.ib()
+    _delete = attr.ib()
+    _copy = attr.ib()
+    removed = attr.ib(factory=list)
+
+    def directory(self, source, dest, pool):
+        """
+        Sync a directory, yielding each destination path copied to.
+
+        Files are handed to the pool as they are found, and only waited for
+        once the whole tree has been listed.
+        """
+        copying = []
+        for child, dest_child, lstat in self._walk(source, dest):
+            if stat.S_ISLNK(lstat.st_mode):
+                if self._link(child, dest_child):
+                    yield dest_child
+            elif stat.S_ISREG(lstat.st_mode):
+                future = pool.submit(self._file, child, dest_child, lstat)
+                copying.append(future)
+        for future in copying:
+            yield future.result()
+
+    def _walk(self, source, dest):
+        """
+        Create any directories, yielding the other paths within the source.
+        """
+        names = set(self._source_fs.list_directory(path=source))
+        self._ensure_directory(dest)
+        if self._delete:
+            for name in self._dest_fs.list_directory(path=dest):
+                if name not in names:
+                    self._remove(dest / name)
+                    self.removed.append(dest / name)
+
+        for name in names:
+            child, dest_child = source / name, dest / name
+            lstat = self._source_fs.lstat(path=child)
+            if stat.S_ISDIR(lstat.st_mode):
+                yield from self._walk(child, dest_child)
+            else:
+                yield child, dest_child, lstat
+
+    def _remove(self, path):
+        self._dest_fs.remove(path=path)
+
+    def _dest_lstat(self, path):
+        try:
+            return self._dest_fs.lstat(path=path)
+        except exceptions.FileNotFound:
+            return None
+
+    def _ensure_directory(self, dest):
+        existing = self._dest_lstat(dest)
+        if existing is not None:
+            if stat.S_ISDIR(existing.st_mode):
+                return
+            self._remove(dest)
+        self._dest_fs.create_directory(path=dest)
+
+    def _link(self, source, dest):
+        target = self._source_fs.readlink(path=source)
+        existing = self._dest_lstat(dest)
+        if existing is not None:
+            if (
+                stat.S_ISLNK(existing.st_mode)
+                and self._dest_fs.readlink(path=dest) == target
+            ):
+                return False
+            self._remove(dest)
+        self._dest_fs.link(source=target, to=dest)
+        return True
+
+    def _changed(self, source, dest, lstat, existing):
+        if lstat.st_size != existing.st_size:
+            return True
+        if self._checksum:
+            digest = self._source_fs.digest(path=source)
+            return digest != self._dest_fs.digest(path=dest)
+        return lstat.st_mtime > existing.st_mtime
+
+    def _file(self, source, dest, lstat):
+        """
+        Copy a file if it has changed, returning the path it was copied to.
+        """
+        existing = self._dest_lstat(dest)
+        if existing is not None:
+            if not stat.S_ISREG(existing.st_mode):
+                self._remove(dest)
+            elif not self._changed(source, dest, lstat, existing):
+                return None
+        self._copy(self._source_fs, source, self._dest_fs, dest)
+        if _is_native(self._dest_fs):
+            # Otherwise, native timestamps are coarser than the clock, so a
+            # file copied just after being written may look older than it.
+            os.utime(dest, (lstat.st_atime, lstat.st_mtime))
+        return dest
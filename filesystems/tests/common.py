@@ -1,11 +1,14 @@
 import errno
+import hashlib
 import os
+import stat
 
 from pyrsistent import s
 from testscenarios import multiply_scenarios, with_scenarios
 
 from filesystems import Path, exceptions
 from filesystems._path import RelativePath
+from filesystems.common import DiskUsage
 
 
 @with_scenarios()
@@ -48,6 +51,14 @@ class _NonExistingFileMixin:
             "readlink",
             dict(act_on=lambda fs, path: fs.readlink(path=path)),
         ),
+        (
+            "digest",
+            dict(act_on=lambda fs, path: fs.digest(path=path)),
+        ),
+        (
+            "disk_usage",
+            dict(act_on=lambda fs, path: list(fs.disk_usage(path=path))),
+        ),
     ]
 
     def test_non_existing(self):
@@ -285,6 +296,179 @@ class TestFS(_NonExistingFileMixin):
             "foo\nbar\nbaz",
         )
 
+    def test_digest(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.set_contents(tempdir / "unittesting", b"some things!", mode="b")
+
+        self.assertEqual(
+            fs.digest(tempdir / "unittesting"),
+            hashlib.sha256(b"some things!").hexdigest(),
+        )
+
+    def test_digest_algorithm(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.set_contents(tempdir / "unittesting", b"some things!", mode="b")
+
+        self.assertEqual(
+            fs.digest(tempdir / "unittesting", algorithm="md5"),
+            hashlib.md5(b"some things!").hexdigest(),
+        )
+
+    def test_digest_tree(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.set_contents(tempdir / "unittesting", b"some things!", mode="b")
+
+        leaves = [b"some ", b"thing", b"s!"]
+        expected = hashlib.sha256(
+            b"".join(hashlib.sha256(leaf).digest() for leaf in leaves),
+        )
+        self.assertEqual(
+            fs.digest(tempdir / "unittesting", tree_chunk_size=5),
+            expected.hexdigest(),
+        )
+
+    def test_digest_tree_empty_file(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.touch(tempdir / "unittesting")
+
+        self.assertEqual(
+            fs.digest(tempdir / "unittesting", tree_chunk_size=5),
+            hashlib.sha256().hexdigest(),
+        )
+
+    def test_digest_tree_without_chunks(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.set_contents(tempdir / "unittesting", b"some things!", mode="b")
+        fs.touch(tempdir / "empty")
+
+        for path in tempdir / "unittesting", tempdir / "empty":
+            for size in 0, -1:
+                with (
+                    self.subTest(path=path, size=size),
+                    self.assertRaises(ValueError),
+                ):
+                    fs.digest(path, tree_chunk_size=size)
+
+    def test_digest_link(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source, to = tempdir / "source", tempdir / "to"
+        fs.set_contents(source, b"some things!", mode="b")
+        fs.link(source=source, to=to)
+
+        self.assertEqual(fs.digest(to), fs.digest(source))
+
+    def test_digest_directory(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        with self.assertRaises(exceptions.IsADirectory) as e:
+            fs.digest(tempdir)
+
+        self.assertEqual(
+            str(e.exception),
+            os.strerror(errno.EISDIR) + ": " + str(tempdir),
+        )
+
+    def test_digest_many(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        a, b = tempdir / "a", tempdir / "b"
+        fs.set_contents(a, b"foo", mode="b")
+        fs.set_contents(b, b"bar", mode="b")
+
+        self.assertEqual(
+            fs.digest_many(iter([a, b]), algorithm="sha1"),
+            {
+                a: hashlib.sha1(b"foo").hexdigest(),
+                b: hashlib.sha1(b"bar").hexdigest(),
+            },
+        )
+
+    def test_disk_usage(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.set_contents(tempdir / "a", b"foo", mode="b")
+        fs.create_directory(tempdir / "sub")
+        fs.set_contents(tempdir.descendant("sub", "b"), b"quux", mode="b")
+        fs.create_directory(tempdir.descendant("sub", "empty"))
+
+        self.assertEqual(
+            list(fs.disk_usage(tempdir)),
+            [DiskUsage(path=tempdir, size=7, files=2, directories=2)],
+        )
+
+    def test_disk_usage_by_depth(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        one, two = tempdir / "one", tempdir / "two"
+        fs.create_directory(one)
+        fs.create_directory(one / "deeper")
+        fs.set_contents(one.descendant("deeper", "a"), b"foo", mode="b")
+        fs.create_directory(two)
+        fs.set_contents(two / "b", b"quux", mode="b")
+
+        usage = list(fs.disk_usage(tempdir, by_depth=1))
+        self.assertEqual(
+            (set(usage[:-1]), usage[-1]),
+            (
+                {
+                    DiskUsage(path=one, size=3, files=1, directories=1),
+                    DiskUsage(path=two, size=4, files=1),
+                },
+                DiskUsage(path=tempdir, size=7, files=2, directories=3),
+            ),
+        )
+
+    def test_disk_usage_does_not_follow_links(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.create_directory(tempdir / "dir")
+        fs.set_contents(tempdir.descendant("dir", "a"), b"foo", mode="b")
+        fs.link(source=tempdir / "dir", to=tempdir / "link")
+
+        (usage,) = fs.disk_usage(tempdir)
+        self.assertEqual(
+            (usage.files, usage.directories),
+            (2, 1),
+        )
+
+    def test_disk_usage_file(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.touch(tempdir / "file")
+
+        with self.assertRaises(exceptions.NotADirectory):
+            list(fs.disk_usage(tempdir / "file"))
+
     def test_remove(self):
         fs = self.FS()
         tempdir = fs.temporary_directory()
@@ -1620,6 +1804,56 @@ class TestFS(_NonExistingFileMixin):
         fs = self.FS()
         self.assertEqual(fs.realpath(Path.root()), Path.root())
 
+    def test_try_stat(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.touch(tempdir / "file")
+        self.assertEqual(
+            (
+                stat.S_ISREG(fs.try_stat(tempdir / "file").st_mode),
+                fs.try_stat(tempdir / "missing"),
+                fs.try_stat(tempdir.descendant("file", "child")),
+            ),
+            (True, exceptions.FileNotFound, exceptions.NotADirectory),
+        )
+
+    def test_try_lstat(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.link(source=tempdir / "missing", to=tempdir / "link")
+        self.assertEqual(
+            (
+                stat.S_ISLNK(fs.try_lstat(tempdir / "link").st_mode),
+                fs.try_stat(tempdir / "link"),
+                fs.try_lstat(tempdir / "missing"),
+            ),
+            (True, exceptions.FileNotFound, exceptions.FileNotFound),
+        )
+
+    def test_try_readlink(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.touch(tempdir / "file")
+        fs.link(source=tempdir / "file", to=tempdir / "link")
+        self.assertEqual(
+            (
+                fs.try_readlink(tempdir / "link"),
+                fs.try_readlink(tempdir / "file"),
+                fs.try_readlink(tempdir / "missing"),
+            ),
+            (
+                tempdir / "file",
+                exceptions.NotASymlink,
+                exceptions.FileNotFound,
+            ),
+        )
+
     def test_readlink_link(self):
         fs = self.FS()
         tempdir = fs.temporary_directory()
@@ -1856,6 +2090,155 @@ class WriteLinesMixin:
             self.assertEqual(g.read(), text)
 
 
+class HardlinkMixin:
+    def test_hardlink(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source, to = tempdir / "source", tempdir / "to"
+        fs.set_contents(source, "contents")
+        fs.hardlink(source=source, to=to)
+
+        source_stat, to_stat = fs.stat(source), fs.stat(to)
+        self.assertEqual(
+            (
+                fs.get_contents(to),
+                fs.is_link(to),
+                source_stat.st_ino == to_stat.st_ino,
+                source_stat.st_nlink,
+                to_stat.st_nlink,
+            ),
+            ("contents", False, True, 2, 2),
+        )
+
+    def test_writes_are_seen_through_each_link(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source, to = tempdir / "source", tempdir / "to"
+        fs.create_directory(tempdir / "dir")
+        fs.set_contents(source, "contents")
+        fs.hardlink(source=source, to=tempdir / "dir" / "to")
+        fs.hardlink(source=source, to=to)
+
+        with fs.open(to, "a") as file:
+            file.write(" and more")
+        fs.set_contents(tempdir / "dir" / "to", "new contents")
+
+        self.assertEqual(
+            (fs.get_contents(source), fs.get_contents(to)),
+            ("new contents", "new contents"),
+        )
+
+    def test_removing_a_link(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source, to = tempdir / "source", tempdir / "to"
+        fs.set_contents(source, "contents")
+        fs.hardlink(source=source, to=to)
+        fs.remove_file(source)
+        fs.set_contents(to, "new contents")
+
+        self.assertEqual(
+            (fs.exists(source), fs.get_contents(to), fs.stat(to).st_nlink),
+            (False, "new contents", 1),
+        )
+
+    def test_distinct_files_have_distinct_inodes(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.touch(tempdir / "one")
+        fs.touch(tempdir / "two")
+        self.assertNotEqual(
+            fs.stat(tempdir / "one").st_ino,
+            fs.stat(tempdir / "two").st_ino,
+        )
+
+    def test_inodes_are_stable(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        path = tempdir / "file"
+        fs.touch(path)
+        before = fs.stat(path).st_ino
+        fs.set_contents(path, "contents")
+        self.assertEqual(fs.stat(path).st_ino, before)
+
+    def test_hardlink_follows_links(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source = tempdir / "source"
+        fs.set_contents(source, "contents")
+        fs.link(source=source, to=tempdir / "link")
+        fs.hardlink(source=tempdir / "link", to=tempdir / "to")
+
+        self.assertEqual(
+            (fs.is_link(tempdir / "to"), fs.stat(source).st_nlink),
+            (False, 2),
+        )
+
+    def test_hardlink_existing(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source, to = tempdir / "source", tempdir / "to"
+        fs.touch(source)
+        fs.touch(to)
+        with self.assertRaises(exceptions.FileExists) as e:
+            fs.hardlink(source=source, to=to)
+        self.assertEqual(
+            str(e.exception),
+            os.strerror(errno.EEXIST) + f": {to}",
+        )
+
+    def test_hardlink_non_existing_source(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source = tempdir / "source"
+        with self.assertRaises(exceptions.FileNotFound) as e:
+            fs.hardlink(source=source, to=tempdir / "to")
+        self.assertEqual(
+            str(e.exception),
+            os.strerror(errno.ENOENT) + f": {source}",
+        )
+
+    def test_hardlink_non_existing_parent(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source, to = tempdir / "source", tempdir.descendant("dir", "to")
+        fs.touch(source)
+        with self.assertRaises(exceptions.FileNotFound) as e:
+            fs.hardlink(source=source, to=to)
+        self.assertEqual(
+            str(e.exception),
+            os.strerror(errno.ENOENT) + f": {to.parent()}",
+        )
+
+    def test_hardlink_directory(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        source = tempdir / "source"
+        fs.create_directory(source)
+        with self.assertRaises(exceptions.PermissionError):
+            fs.hardlink(source=source, to=tempdir / "to")
+
+
 @with_scenarios()
 class NonExistentChildMixin:
 
@@ -0,0 +1,352 @@
+from unittest import TestCase
+import io
+import stat
+import tarfile
+import zipfile
+
+from pyrsistent import s
+
+from filesystems import Path, archive, exceptions, memory, native
+from filesystems._path import RelativePath
+
+
+class _ArchiveMixin:
+    def FS(self, files=(), links=(), directories=()):
+        """
+        Create an archive containing the given files, links and directories.
+        """
+        fs = native.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        path = tempdir / "archive"
+        with open(path, "wb") as file:
+            self.write(
+                file=file,
+                files=dict(files),
+                links=dict(links),
+                directories=directories,
+            )
+        fs = archive.FS(path=path)
+        self.addCleanup(fs.close)
+        return fs
+
+    def test_open(self):
+        fs = self.FS(files={"dir/file": b"some contents"})
+        with fs.open(Path("dir", "file"), "rb") as file:
+            self.assertEqual(file.read(), b"some contents")
+
+    def test_open_text(self):
+        fs = self.FS(files={"file": b"some\ncontents\n"})
+        with fs.open(Path("file")) as file:
+            self.assertEqual(file.readlines(), ["some\n", "contents\n"])
+
+    def test_read_in_pieces(self):
+        fs = self.FS(files={"file": b"some contents"})
+        with fs.open(Path("file"), "rb") as file:
+            self.assertEqual(
+                (file.read(4), file.read(1), file.read()),
+                (b"some", b" ", b"contents"),
+            )
+
+    def test_seek(self):
+        fs = self.FS(files={"file": b"some contents"})
+        with fs.open(Path("file"), "rb") as file:
+            file.seek(5)
+            self.assertEqual(file.read(), b"contents")
+
+    def test_get_contents(self):
+        fs = self.FS(files={"file": b"some contents"})
+        self.assertEqual(fs.get_contents(Path("file")), "some contents")
+
+    def test_empty_file(self):
+        fs = self.FS(files={"file": b""})
+        self.assertEqual(fs.get_contents(Path("file"), mode="b"), b"")
+
+    def test_list_directory(self):
+        fs = self.FS(files={"dir/a": b"", "dir/b": b"", "c": b""})
+        self.assertEqual(
+            (fs.list_directory(Path.root()), fs.list_directory(Path("dir"))),
+            (s("dir", "c"), s("a", "b")),
+        )
+
+    def test_implicit_directories(self):
+        fs = self.FS(files={"a/b/c/file": b""})
+        self.assertEqual(
+            (
+                fs.is_dir(Path("a")),
+                fs.is_dir(Path("a", "b")),
+                fs.list_directory(Path("a", "b", "c")),
+            ),
+            (True, True, s("file")),
+        )
+
+    def test_empty_directory(self):
+        fs = self.FS(directories=["dir"])
+        self.assertEqual(
+            (fs.is_dir(Path("dir")), fs.list_directory(Path("dir"))),
+            (True, s()),
+        )
+
+    def test_stat(self):
+        fs = self.FS(files={"file": b"some contents"})
+        result = fs.stat(Path("file"))
+        self.assertEqual(
+            (stat.S_ISREG(result.st_mode), result.st_size),
+            (True, 13),
+        )
+
+    def test_stat_directory(self):
+        fs = self.FS(files={"dir/file": b""})
+        self.assertTrue(stat.S_ISDIR(fs.stat(Path("dir")).st_mode))
+
+    def test_stat_root(self):
+        fs = self.FS()
+        self.assertTrue(stat.S_ISDIR(fs.stat(Path.root()).st_mode))
+
+    def test_distinct_inodes(self):
+        fs = self.FS(files={"a": b"", "b": b""})
+        self.assertNotEqual(
+            fs.stat(Path("a")).st_ino,
+            fs.stat(Path("b")).st_ino,
+        )
+
+    def test_digest(self):
+        contents = b"some contents" * 1000
+        fs = self.FS(files={"file": contents})
+
+        expected = memory.FS()
+        expected.set_contents(Path("file"), contents, mode="b")
+
+        self.assertEqual(
+            fs.digest(Path("file"), tree_chunk_size=4096),
+            expected.digest(Path("file"), tree_chunk_size=4096),
+        )
+
+    def test_digest_tree_without_chunks(self):
+        fs = self.FS(files={"file": b"contents"})
+        with self.assertRaises(ValueError):
+            fs.digest(Path("file"), tree_chunk_size=0)
+
+    def test_readlink(self):
+        fs = self.FS(files={"file": b""}, links={"link": "file"})
+        self.assertEqual(fs.readlink(Path("link")), RelativePath("file"))
+
+    def test_readlink_absolute(self):
+        fs = self.FS(files={"dir/file": b""}, links={"link": "/dir/file"})
+        self.assertEqual(fs.readlink(Path("link")), Path("dir", "file"))
+
+    def test_readlink_not_a_link(self):
+        fs = self.FS(files={"file": b""})
+        with self.assertRaises(exceptions.NotASymlink):
+            fs.readlink(Path("file"))
+
+    def test_open_through_link(self):
+        fs = self.FS(files={"file": b"contents"}, links={"link": "file"})
+        self.assertEqual(fs.get_contents(Path("link")), "contents")
+
+    def test_list_through_directory_link(self):
+        fs = self.FS(files={"dir/file": b"contents"}, links={"link": "dir"})
+        self.assertEqual(
+            (
+                fs.list_directory(Path("link")),
+                fs.get_contents(Path("link", "file")),
+            ),
+            (s("file"), "contents"),
+        )
+
+    def test_stat_and_lstat_link(self):
+        fs = self.FS(files={"file": b"contents"}, links={"link": "file"})
+        self.assertEqual(
+            (
+                stat.S_ISREG(fs.stat(Path("link")).st_mode),
+                stat.S_ISLNK(fs.lstat(Path("link")).st_mode),
+            ),
+            (True, True),
+        )
+
+    def test_broken_link(self):
+        fs = self.FS(links={"link": "nowhere"})
+        with self.assertRaises(exceptions.FileNotFound) as e:
+            fs.stat(Path("link"))
+        self.assertEqual(e.exception.value, Path("link"))
+
+    def test_link_loop(self):
+        fs = self.FS(links={"a": "b", "b": "a"})
+        with self.assertRaises(exceptions.SymbolicLoop):
+            fs.realpath(Path("a"))
+
+    def test_nonexistent(self):
+        fs = self.FS()
+        with self.assertRaises(exceptions.FileNotFound) as e:
+            fs.open(Path("missing"))
+        self.assertEqual(e.exception.value, Path("missing"))
+
+    def test_child_of_file(self):
+        fs = self.FS(files={"file": b""})
+        with self.assertRaises(exceptions.NotADirectory) as e:
+            fs.stat(Path("file", "child"))
+        self.assertEqual(e.exception.value, Path("file", "child"))
+
+    def test_open_directory(self):
+        fs = self.FS(files={"dir/file": b""})
+        with self.assertRaises(exceptions.IsADirectory):
+            fs.open(Path("dir"))
+
+    def test_list_file(self):
+        fs = self.FS(files={"file": b""})
+        with self.assertRaises(exceptions.NotADirectory):
+            fs.list_directory(Path("file"))
+
+    def test_writing_is_read_only(self):
+        fs = self.FS(files={"file": b""})
+        writes = [
+            lambda: fs.open(Path("file"), "w"),
+            lambda: fs.open(Path("new"), "a"),
+            lambda: fs.create(Path("new")),
+            lambda: fs.create_directory(Path("dir")),
+            lambda: fs.remove_file(Path("file")),
+            lambda: fs.remove(Path.root()),
+            lambda: fs.link(source=Path("file"), to=Path("link")),
+            fs.temporary_directory,
+        ]
+        for write in writes:
+            with (
+                self.subTest(write=write),
+                self.assertRaises(
+                    exceptions.ReadOnly,
+                ),
+            ):
+                write()
+        self.assertEqual(fs.list_directory(Path.root()), s("file"))
+
+    def test_context_manager(self):
+        fs = native.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        path = tempdir / "archive"
+        with open(path, "wb") as file:
+            self.write(
+                file=file,
+                files={"file": b"contents"},
+                links={},
+                directories=(),
+            )
+
+        with archive.FS(path=path) as fs:
+            contents = fs.get_contents(Path("file"))
+        self.assertEqual(contents, "contents")
+        with self.assertRaises(ValueError):
+            fs.get_contents(Path("file"))
+
+    def test_close_after_reading(self):
+        fs = self.FS(files={"file": b"contents", "other": b"more"})
+        with fs.open(Path("file"), "rb") as file:
+            file.read()
+        fs.digest(Path("other"), tree_chunk_size=2)
+        fs.close()
+
+
+class TestZip(_ArchiveMixin, TestCase):
+    compression = zipfile.ZIP_STORED
+
+    def write(self, file, files, links, directories):
+        with zipfile.ZipFile(file, "w", compression=self.compression) as zip:
+            for name in directories:
+                zip.writestr(f"{name}/", b"")
+            for name, contents in files.items():
+                zip.writestr(name, contents)
+            for name, target in links.items():
+                info = zipfile.ZipInfo(name)
+                info.create_system = archive._UNIX
+                info.external_attr = (stat.S_IFLNK | 0o777) << 16
+                zip.writestr(info, target)
+
+    def test_stored_contents_are_views(self):
+        """
+        Stored members are read directly out of the mapped archive.
+        """
+        fs = self.FS(files={"file": b"contents"})
+        with fs.open(Path("file"), "rb") as file:
+            self.assertIsInstance(file.raw, archive._Member)
+
+    def test_not_an_archive(self):
+        fs = native.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        path = tempdir / "archive"
+        fs.set_contents(path, "not an archive " * 100)
+        with self.assertRaises(exceptions.InvalidImage):
+            archive.FS(path=path)
+
+
+class TestCompressedZip(TestZip):
+    compression = zipfile.ZIP_DEFLATED
+
+    def test_stored_contents_are_views(self):
+        fs = self.FS(files={"file": b"contents"})
+        with fs.open(Path("file"), "rb") as file:
+            self.assertIsInstance(file, zipfile.ZipExtFile)
+
+
+class TestTar(_ArchiveMixin, TestCase):
+    def write(self, file, files, links, directories):
+        with tarfile.open(fileobj=file, mode="w:") as tar:
+            for name in directories:
+                info = tarfile.TarInfo(name)
+                info.type = tarfile.DIRTYPE
+                tar.addfile(info)
+            for name, contents in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(contents)
+                tar.addfile(info, io.BytesIO(contents))
+            for name, target in links.items():
+                info = tarfile.TarInfo(name)
+                info.type = tarfile.SYMTYPE
+                info.linkname = target
+                tar.addfile(info)
+
+    def test_hardlink(self):
+        fs = native.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        path = tempdir / "archive"
+        with (
+            open(path, "wb") as file,
+            tarfile.open(
+                fileobj=file,
+                mode="w:",
+            ) as tar,
+        ):
+            info = tarfile.TarInfo("file")
+            info.size = 8
+            tar.addfile(info, io.BytesIO(b"contents"))
+            info = tarfile.TarInfo("hardlink")
+            info.type = tarfile.LNKTYPE
+            info.linkname = "file"
+            tar.addfile(info)
+
+        fs = archive.FS(path=path)
+        self.addCleanup(fs.close)
+        self.assertEqual(
+            (
+                fs.get_contents(Path("hardlink")),
+                fs.stat(Path("hardlink")).st_ino,
+            ),
+            ("contents", fs.stat(Path("file")).st_ino),
+        )
+
+    def test_compressed_tars_are_invalid(self):
+        fs = native.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        path = tempdir / "archive"
+        with (
+            open(path, "wb") as file,
+            tarfile.open(
+                fileobj=file,
+                mode="w:gz",
+            ) as tar,
+        ):
+            tar.addfile(tarfile.TarInfo("file"))
+        with self.assertRaises(exceptions.InvalidImage):
+            archive.FS(path=path)
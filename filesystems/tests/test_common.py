@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from filesystems import Path, common, exceptions, memory
+
+_METHODS = [
+    "create_file",
+    "open_file",
+    "remove_file",
+    "create_directory",
+    "list_directory",
+    "remove_empty_directory",
+    "temporary_directory",
+    "stat",
+    "lstat",
+    "link",
+    "readlink",
+]
+
+
+def _unsupported(*args, **kwargs):
+    raise NotImplementedError()
+
+
+def _FS(**methods):
+    """
+    Create a filesystem with the given methods, and no others which work.
+    """
+    return common.create(
+        name="TestFS",
+        **{**dict.fromkeys(_METHODS, _unsupported), **methods},
+    )()
+
+
+class TestCreate(TestCase):
+    def test_open(self):
+        fs = _FS(open_file=lambda fs, path, mode: (fs, path, mode))
+        self.assertEqual(fs.open(Path("file")), (fs, Path("file"), "r"))
+
+    def test_open_static(self):
+        fs = _FS(open_file=staticmethod(lambda path, mode: (path, mode)))
+        self.assertEqual(
+            (fs.open(Path("file")), fs.open(Path("file"), mode="wb")),
+            ((Path("file"), "r"), (Path("file"), "wb")),
+        )
+
+    def test_create_directory(self):
+        created = []
+        fs = _FS(create_directory=lambda fs, *args: created.append(args))
+        self.assertEqual(
+            (
+                fs.create_directory(Path("dir")),
+                fs.create_directory(Path("a", "b"), with_parents=True),
+                created,
+            ),
+            (
+                Path("dir"),
+                Path("a", "b"),
+                [(Path("dir"), False, False), (Path("a", "b"), True, False)],
+            ),
+        )
+
+    def test_create_directory_static(self):
+        created = []
+        fs = _FS(create_directory=staticmethod(lambda *a: created.append(a)))
+        self.assertEqual(
+            (
+                fs.create_directory(Path("dir"), allow_existing=True),
+                created,
+            ),
+            (Path("dir"), [(Path("dir"), False, True)]),
+        )
+
+    def test_other_static_methods(self):
+        fs = _FS(
+            stat=staticmethod(lambda path: ("stat", path)),
+            extra=staticmethod(lambda: "extra"),
+        )
+        self.assertEqual(
+            (fs.stat(Path("file")), fs.extra()),
+            (("stat", Path("file")), "extra"),
+        )
+
+
+class TestParseMode(TestCase):
+    def test_parsed_once(self):
+        self.assertIs(common._parse_mode("rb"), common._parse_mode("rb"))
+
+    def test_invalid_modes_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(exceptions.InvalidMode):
+                common._parse_mode("rz")
+
+    def test_invalid_mode_after_valid_one(self):
+        fs = memory.FS()
+        fs.touch(Path("file"))
+        fs.open(Path("file"), "rb").close()
+        for mode in "rbz", "rbz", "z":
+            with (
+                self.subTest(mode=mode),
+                self.assertRaises(
+                    exceptions.InvalidMode,
+                ),
+            ):
+                fs.open(Path("file"), mode)
@@ -0,0 +1,228 @@
+from hashlib import sha256
+from unittest import TestCase
+
+from pyrsistent import s
+
+from filesystems import Path, content, memory, native
+from filesystems.tests.common import (
+    InvalidModeMixin,
+    NonExistentChildMixin,
+    OpenAppendNonExistingFileMixin,
+    OpenFileMixin,
+    OpenWriteNonExistingFileMixin,
+    SymbolicLoopMixin,
+    TestFS,
+    WriteLinesMixin,
+)
+
+
+class _ContentMixin:
+    def FS(self):
+        store = native.FS().temporary_directory()
+        self.addCleanup(native.FS().remove, store)
+        return content.FS(store=store)
+
+
+class TestContent(_ContentMixin, TestFS, TestCase):
+    pass
+
+
+class _NestedNamesMixin:
+    def FS(self):
+        store = native.FS().temporary_directory()
+        self.addCleanup(native.FS().remove, store)
+        names_fs = memory.FS()
+        names_fs.create_directory(Path("ns"))
+        return content.FS(store=store, names_fs=names_fs, names=Path("ns"))
+
+
+class TestContentNestedNames(_NestedNamesMixin, TestFS, TestCase):
+    pass
+
+
+class TestContentInvalidMode(_ContentMixin, InvalidModeMixin, TestCase):
+    pass
+
+
+class TestContentOpenFile(_ContentMixin, OpenFileMixin, TestCase):
+    pass
+
+
+class TestContentOpenWriteNonExistingFile(
+    _ContentMixin,
+    OpenWriteNonExistingFileMixin,
+    TestCase,
+):
+    pass
+
+
+class TestContentOpenAppendNonExistingFile(
+    _ContentMixin,
+    OpenAppendNonExistingFileMixin,
+    TestCase,
+):
+    pass
+
+
+class TestContentWriteLines(_ContentMixin, WriteLinesMixin, TestCase):
+    pass
+
+
+class TestNonExistentChild(_ContentMixin, NonExistentChildMixin, TestCase):
+    pass
+
+
+class TestSymbolicLoops(_ContentMixin, SymbolicLoopMixin, TestCase):
+    pass
+
+
+class TestStore(TestCase):
+    def store(self):
+        store = native.FS().temporary_directory()
+        self.addCleanup(native.FS().remove, store)
+        return store
+
+    def objects(self, store):
+        """
+        Every object in the store.
+        """
+        fs = native.FS()
+        return s(
+            *(
+                object
+                for first in fs.children(store)
+                for second in fs.children(first)
+                for object in fs.children(second)
+            ),
+        )
+
+    def test_fan_out(self):
+        store = self.store()
+        fs = content.FS(store=store)
+        fs.set_contents(Path("file"), "contents")
+
+        digest = sha256(b"contents").hexdigest()
+        self.assertEqual(
+            self.objects(store),
+            s(store / digest[:2] / digest[2:4] / digest),
+        )
+
+    def test_no_fan_out(self):
+        store = self.store()
+        fs = content.FS(store=store, fan_out=0)
+        fs.set_contents(Path("file"), "contents")
+
+        digest = sha256(b"contents").hexdigest()
+        self.assertEqual(native.FS().children(store), s(store / digest))
+
+    def test_stored_at(self):
+        store = self.store()
+        fs = content.FS(store=store)
+        fs.set_contents(Path("file"), "contents")
+        self.assertEqual(
+            native.FS().get_contents(fs.stored_at(Path("file"))),
+            "contents",
+        )
+
+    def test_identical_contents_are_stored_once(self):
+        store = self.store()
+        fs = content.FS(store=store)
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("dir", "a"), "contents")
+        fs.set_contents(Path("dir", "b"), "contents")
+        fs.set_contents(Path("c"), "other contents")
+        self.assertEqual(
+            (
+                len(self.objects(store)),
+                fs.stored_at(Path("dir", "a")),
+            ),
+            (2, fs.stored_at(Path("dir", "b"))),
+        )
+
+    def test_stores_share_contents(self):
+        store = self.store()
+        one, two = content.FS(store=store), content.FS(store=store)
+        one.set_contents(Path("file"), "contents")
+        two.set_contents(Path("file"), "contents")
+        self.assertEqual(len(self.objects(store)), 1)
+
+    def test_persistent_names(self):
+        store = self.store()
+        names = native.FS().temporary_directory()
+        self.addCleanup(native.FS().remove, names)
+
+        fs = content.FS(store=store, names_fs=native.FS(), names=names)
+        fs.set_contents(Path("file"), "contents")
+
+        reopened = content.FS(store=store, names_fs=native.FS(), names=names)
+        self.assertEqual(reopened.get_contents(Path("file")), "contents")
+
+    def test_stat_size(self):
+        fs = content.FS(store=self.store())
+        fs.set_contents(Path("file"), "some contents")
+        self.assertEqual(fs.stat(Path("file")).st_size, 13)
+
+    def test_digest(self):
+        fs = content.FS(store=self.store())
+        fs.set_contents(Path("file"), "contents")
+
+        expected = memory.FS()
+        expected.set_contents(Path("file"), "contents")
+
+        self.assertEqual(
+            (
+                fs.digest(Path("file")),
+                fs.digest(Path("file"), algorithm="sha1"),
+                fs.digest(Path("file"), tree_chunk_size=4),
+            ),
+            (
+                expected.digest(Path("file")),
+                expected.digest(Path("file"), algorithm="sha1"),
+                expected.digest(Path("file"), tree_chunk_size=4),
+            ),
+        )
+
+    def test_rewriting_keeps_old_contents(self):
+        store = self.store()
+        fs = content.FS(store=store)
+        fs.set_contents(Path("file"), "old")
+        old = fs.stored_at(Path("file"))
+        fs.set_contents(Path("file"), "new")
+        self.assertEqual(
+            (fs.get_contents(Path("file")), native.FS().get_contents(old)),
+            ("new", "old"),
+        )
+
+    def test_absolute_links_within_nested_names(self):
+        names_fs = memory.FS()
+        names_fs.create_directory(Path("ns"))
+        fs = content.FS(
+            store=self.store(),
+            names_fs=names_fs,
+            names=Path("ns"),
+        )
+        fs.set_contents(Path("a"), "contents")
+        fs.link(Path("a"), Path("l"))
+        self.assertEqual(
+            (fs.realpath(Path("l")), fs.get_contents(Path("l"))),
+            (Path("a"), "contents"),
+        )
+
+    def test_writing_through_links_within_nested_names(self):
+        names_fs = memory.FS()
+        names_fs.create_directory(Path("ns"))
+        fs = content.FS(
+            store=self.store(),
+            names_fs=names_fs,
+            names=Path("ns"),
+        )
+        fs.create_directory(Path("d"))
+        fs.link(Path("d"), Path("ld"))
+        fs.set_contents(Path("ld", "x"), "contents")
+        self.assertEqual(
+            (
+                fs.get_contents(Path("d", "x")),
+                names_fs.children(Path("ns")),
+            ),
+            ("contents", s(Path("ns", "d"), Path("ns", "ld"))),
+        )
@@ -1,9 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
+import sys
+import threading
 
 from pyrsistent import s
 
-from filesystems import Path, memory
+from filesystems import Path, exceptions, memory, native
+from filesystems._path import RelativePath
 from filesystems.tests.common import (
+    HardlinkMixin,
     InvalidModeMixin,
     NonExistentChildMixin,
     OpenAppendNonExistingFileMixin,
@@ -66,3 +71,1097 @@ class TestNonExistentChild(NonExistentChildMixin, TestCase):
 
 class TestSymbolicLoops(SymbolicLoopMixin, TestCase):
     FS = staticmethod(memory.FS)
+
+
+class TestHardlinks(HardlinkMixin, TestCase):
+    FS = staticmethod(memory.FS)
+
+    def test_snapshots_are_independent(self):
+        fs = self.FS()
+        fs.set_contents(Path("source"), "contents")
+        fs.hardlink(source=Path("source"), to=Path("to"))
+        snapshot = fs.snapshot()
+        snapshot.set_contents(Path("to"), "new contents")
+        self.assertEqual(
+            (
+                fs.get_contents(Path("source")),
+                snapshot.get_contents(Path("source")),
+            ),
+            ("contents", "new contents"),
+        )
+
+    def test_save(self):
+        fs = self.FS()
+        fs.set_contents(Path("source"), "contents")
+        fs.hardlink(source=Path("source"), to=Path("to"))
+        fs.set_contents(Path("to"), "new contents")
+
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+        fs.save(tempdir / "image")
+
+        loaded = memory.load(tempdir / "image")
+        self.assertEqual(
+            loaded.get_contents(Path("source")),
+            "new contents",
+        )
+
+    def test_save_keeps_links(self):
+        fs = self.FS()
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("source"), "contents")
+        fs.hardlink(source=Path("source"), to=Path("dir", "to"))
+        fs.hardlink(source=Path("source"), to=Path("also"))
+
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+        fs.save(tempdir / "image")
+
+        loaded = memory.load(tempdir / "image")
+        loaded.set_contents(Path("dir", "to"), "new contents")
+        source = loaded.stat(Path("source"))
+        to = loaded.stat(Path("dir", "to"))
+        self.assertEqual(
+            (
+                loaded.get_contents(Path("source")),
+                loaded.get_contents(Path("also")),
+                source.st_nlink,
+                source.st_ino,
+            ),
+            ("new contents", "new contents", 3, to.st_ino),
+        )
+
+    def test_usage_counts_each_file_once(self):
+        fs = self.FS()
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("source"), "0123456789")
+        fs.hardlink(source=Path("source"), to=Path("dir", "to"))
+        fs.hardlink(source=Path("source"), to=Path("dir", "also"))
+        self.assertEqual(
+            (
+                fs.memory_usage(Path.root()),
+                fs.memory_usage(Path("dir")),
+                fs.memory_usage(Path("dir", "to")),
+            ),
+            (
+                memory.MemoryUsage(size=10, nodes=5),
+                memory.MemoryUsage(size=10, nodes=3),
+                memory.MemoryUsage(size=10, nodes=1),
+            ),
+        )
+
+    def test_usage_after_unlinking(self):
+        fs = self.FS()
+        fs.set_contents(Path("source"), "0123456789")
+        fs.hardlink(source=Path("source"), to=Path("to"))
+        fs.remove_file(Path("source"))
+        during = fs.memory_usage(Path.root()).size
+        fs.remove_file(Path("to"))
+        self.assertEqual(
+            (during, fs.memory_usage(Path.root()).size),
+            (10, 0),
+        )
+
+    def test_budget_counts_each_file_once(self):
+        fs = memory.FS(budget=15)
+        fs.set_contents(Path("source"), "0123456789")
+        fs.hardlink(source=Path("source"), to=Path("to"))
+        fs.set_contents(Path("other"), "01234")
+        with self.assertRaises(exceptions.NoSpace):
+            fs.set_contents(Path("more"), "0")
+
+
+class TestSnapshot(TestCase):
+    def test_snapshot_has_same_contents(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("dir", "file"), "contents")
+
+        snapshot = fs.snapshot()
+        self.assertEqual(
+            (
+                snapshot.children(Path("dir")),
+                snapshot.get_contents(Path("dir", "file")),
+            ),
+            (s(Path("dir", "file")), "contents"),
+        )
+
+    def test_changes_to_original_are_not_seen(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("dir", "file"), "contents")
+
+        snapshot = fs.snapshot()
+        fs.set_contents(Path("dir", "file"), "changed")
+        fs.touch(Path("dir", "new"))
+        fs.create_directory(Path("other"))
+
+        self.assertEqual(
+            (
+                snapshot.get_contents(Path("dir", "file")),
+                snapshot.children(Path("dir")),
+                snapshot.exists(Path("other")),
+            ),
+            ("contents", s(Path("dir", "file")), False),
+        )
+
+    def test_changes_to_snapshot_are_not_seen(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("dir", "file"), "contents")
+
+        snapshot = fs.snapshot()
+        with snapshot.open(Path("dir", "file"), "a") as file:
+            file.write(" and more")
+        snapshot.remove(Path("dir"))
+
+        self.assertEqual(
+            fs.get_contents(Path("dir", "file")),
+            "contents",
+        )
+
+    def test_links_resolve_within_the_snapshot(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.link(source=Path("dir"), to=Path("link"))
+
+        snapshot = fs.snapshot()
+        snapshot.touch(Path("link", "file"))
+
+        self.assertEqual(
+            (
+                fs.exists(Path("dir", "file")),
+                snapshot.exists(Path("dir", "file")),
+            ),
+            (False, True),
+        )
+
+
+class TestImage(TestCase):
+    def image(self):
+        fs = native.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        return tempdir / "image"
+
+    def test_round_trip(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.create_directory(Path("dir", "empty"))
+        fs.set_contents(Path("dir", "file"), b"\x00contents", mode="b")
+        fs.touch(Path("dir", "nothing"))
+        fs.link(source=Path("dir", "file"), to=Path("link"))
+        fs.link(source=RelativePath("dir"), to=Path("dir", "relative"))
+
+        image = self.image()
+        fs.save(image)
+        loaded = memory.load(image)
+
+        self.assertEqual(
+            (
+                loaded.children(Path("dir")),
+                loaded.get_contents(Path("dir", "file"), mode="b"),
+                loaded.get_contents(Path("dir", "nothing")),
+                loaded.children(Path("dir", "empty")),
+                loaded.readlink(Path("link")),
+                loaded.readlink(Path("dir", "relative")),
+                loaded.get_contents(Path("link"), mode="b"),
+            ),
+            (
+                s(
+                    Path("dir", "empty"),
+                    Path("dir", "file"),
+                    Path("dir", "nothing"),
+                    Path("dir", "relative"),
+                ),
+                b"\x00contents",
+                "",
+                s(),
+                Path("dir", "file"),
+                RelativePath("dir"),
+                b"\x00contents",
+            ),
+        )
+
+    def test_round_trip_empty(self):
+        image = self.image()
+        memory.FS().save(image)
+        self.assertFalse(memory.load(image).children(Path.root()))
+
+    def test_writing_after_load(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "contents")
+
+        image = self.image()
+        fs.save(image)
+        loaded = memory.load(image)
+
+        with loaded.open(Path("file"), "a") as file:
+            file.write(" and more")
+        loaded.set_contents(Path("other"), "new")
+
+        self.assertEqual(
+            (
+                loaded.get_contents(Path("file")),
+                memory.load(image).get_contents(Path("file")),
+                memory.load(image).exists(Path("other")),
+            ),
+            ("contents and more", "contents", False),
+        )
+
+    def test_digest_after_load(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "contents")
+
+        image = self.image()
+        fs.save(image)
+
+        self.assertEqual(
+            memory.load(image).digest(Path("file")),
+            fs.digest(Path("file")),
+        )
+
+    def test_save_while_open(self):
+        fs = memory.FS()
+        file = fs.open(Path("file"), "wb")
+        self.addCleanup(file.close)
+        file.write(b"contents")
+
+        image = self.image()
+        fs.save(image)
+
+        self.assertEqual(
+            (
+                memory.load(image).get_contents(Path("file"), mode="b"),
+                fs.digest(Path("file")),
+            ),
+            (b"contents", memory.load(image).digest(Path("file"))),
+        )
+
+    def test_images_without_hard_links(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "contents")
+
+        image = self.image()
+        fs.save(image)
+        with open(image, "r+b") as file:
+            file.write(b"FSIMAGE1")
+
+        self.assertEqual(
+            memory.load(image).get_contents(Path("file")),
+            "contents",
+        )
+
+    def test_invalid_image(self):
+        image = self.image()
+        native.FS().set_contents(image, "not an image")
+        with self.assertRaises(exceptions.InvalidImage):
+            memory.load(image)
+
+
+class TestFromNative(TestCase):
+    def test_from_native(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+
+        native_fs.create_directory(tempdir / "dir")
+        native_fs.create_directory(tempdir.descendant("dir", "empty"))
+        native_fs.set_contents(tempdir / "file", b"\x00contents", mode="b")
+        native_fs.set_contents(tempdir.descendant("dir", "nested"), "nested")
+        native_fs.link(source=RelativePath("file"), to=tempdir / "link")
+
+        fs = memory.from_native(tempdir)
+
+        self.assertEqual(
+            (
+                fs.children(Path.root()),
+                fs.children(Path("dir")),
+                fs.children(Path("dir", "empty")),
+                fs.get_contents(Path("file"), mode="b"),
+                fs.get_contents(Path("dir", "nested")),
+                fs.readlink(Path("link")),
+            ),
+            (
+                s(Path("dir"), Path("file"), Path("link")),
+                s(Path("dir", "empty"), Path("dir", "nested")),
+                s(),
+                b"\x00contents",
+                "nested",
+                RelativePath("file"),
+            ),
+        )
+
+    def test_from_native_is_a_copy(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+
+        native_fs.set_contents(tempdir / "file", "contents")
+
+        fs = memory.from_native(tempdir)
+        fs.set_contents(Path("file"), "changed")
+
+        self.assertEqual(native_fs.get_contents(tempdir / "file"), "contents")
+
+    def test_from_native_non_existing(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+
+        with self.assertRaises(exceptions.FileNotFound):
+            memory.from_native(tempdir / "does not exist")
+
+    def test_from_native_file(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+
+        native_fs.touch(tempdir / "file")
+
+        with self.assertRaises(exceptions.NotADirectory):
+            memory.from_native(tempdir / "file")
+
+
+class TestLazyFromNative(TestCase):
+    def test_lazy(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+
+        native_fs.create_directory(tempdir / "dir")
+        native_fs.set_contents(tempdir / "file", b"\x00contents", mode="b")
+        native_fs.set_contents(tempdir.descendant("dir", "nested"), "nested")
+        native_fs.link(source=RelativePath("file"), to=tempdir / "link")
+
+        fs = memory.from_native(tempdir, lazy=True)
+
+        self.assertEqual(
+            (
+                fs.children(Path.root()),
+                fs.children(Path("dir")),
+                fs.get_contents(Path("file"), mode="b"),
+                fs.get_contents(Path("dir", "nested")),
+                fs.readlink(Path("link")),
+            ),
+            (
+                s(Path("dir"), Path("file"), Path("link")),
+                s(Path("dir", "nested")),
+                b"\x00contents",
+                "nested",
+                RelativePath("file"),
+            ),
+        )
+
+    def test_nothing_is_read_up_front(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+
+        native_fs.set_contents(tempdir / "file", "contents")
+
+        fs = memory.from_native(tempdir, lazy=True)
+        native_fs.set_contents(tempdir / "file", "changed")
+        native_fs.touch(tempdir / "later")
+
+        self.assertEqual(
+            (fs.children(Path.root()), fs.get_contents(Path("file"))),
+            (s(Path("file"), Path("later")), "changed"),
+        )
+
+    def test_writes_stay_in_memory(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+
+        native_fs.create_directory(tempdir / "dir")
+        native_fs.set_contents(tempdir / "file", "contents")
+
+        fs = memory.from_native(tempdir, lazy=True)
+        with fs.open(Path("file"), "a") as file:
+            file.write(" and more")
+        fs.touch(Path("dir", "new"))
+        fs.remove_file(Path("file"))
+
+        self.assertEqual(
+            (
+                native_fs.get_contents(tempdir / "file"),
+                native_fs.children(tempdir / "dir"),
+                fs.children(Path.root()),
+                fs.children(Path("dir")),
+            ),
+            ("contents", s(), s(Path("dir")), s(Path("dir", "new"))),
+        )
+
+    def test_lazy_non_existing(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+
+        with self.assertRaises(exceptions.FileNotFound):
+            memory.from_native(tempdir / "does not exist", lazy=True)
+
+
+class TestMemoryUsage(TestCase):
+    def test_empty(self):
+        fs = memory.FS()
+        self.assertEqual(
+            fs.memory_usage(Path.root()),
+            memory.MemoryUsage(size=0, nodes=1),
+        )
+
+    def test_subtrees(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.create_directory(Path("dir", "sub"))
+        fs.set_contents(Path("dir", "sub", "file"), "12345")
+        fs.set_contents(Path("dir", "file"), "123")
+        fs.set_contents(Path("file"), "1")
+        fs.link(source=Path("file"), to=Path("dir", "link"))
+        self.assertEqual(
+            (
+                fs.memory_usage(Path.root()),
+                fs.memory_usage(Path("dir")),
+                fs.memory_usage(Path("dir", "sub")),
+                fs.memory_usage(Path("dir", "sub", "file")),
+                fs.memory_usage(Path("dir", "link")),
+            ),
+            (
+                memory.MemoryUsage(size=9, nodes=7),
+                memory.MemoryUsage(size=8, nodes=5),
+                memory.MemoryUsage(size=5, nodes=2),
+                memory.MemoryUsage(size=5, nodes=1),
+                memory.MemoryUsage(size=0, nodes=1),
+            ),
+        )
+
+    def test_overwriting_and_appending(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "12345")
+        fs.set_contents(Path("file"), "12")
+        with fs.open(Path("file"), "a") as file:
+            file.write("345678")
+        self.assertEqual(
+            fs.memory_usage(Path.root()),
+            memory.MemoryUsage(size=8, nodes=2),
+        )
+
+    def test_writing_through_a_link(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.link(source=Path("dir", "file"), to=Path("link"))
+        fs.set_contents(Path("link"), "123")
+        self.assertEqual(
+            fs.memory_usage(Path("dir")),
+            memory.MemoryUsage(size=3, nodes=2),
+        )
+
+    def test_removing(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("dir", "file"), "12345")
+        fs.set_contents(Path("file"), "123")
+        fs.remove(Path("dir"))
+        self.assertEqual(
+            fs.memory_usage(Path.root()),
+            memory.MemoryUsage(size=3, nodes=2),
+        )
+
+    def test_open_files_are_not_counted_until_closed(self):
+        fs = memory.FS()
+        with fs.open(Path("file"), "wb") as file:
+            file.write(b"12345")
+            during = fs.memory_usage(Path.root())
+        self.assertEqual(
+            (during, fs.memory_usage(Path.root())),
+            (
+                memory.MemoryUsage(size=0, nodes=2),
+                memory.MemoryUsage(size=5, nodes=2),
+            ),
+        )
+
+    def test_many_closed_files(self):
+        fs = memory.FS()
+        count = memory._MAX_UNSETTLED * 2 + 1
+        for i in range(count):
+            fs.set_contents(Path(str(i)), "1")
+        self.assertEqual(
+            fs.memory_usage(Path.root()),
+            memory.MemoryUsage(size=count, nodes=count + 1),
+        )
+
+    def test_closing_after_the_directory_is_replaced(self):
+        for fs in memory.FS(), memory.FS(budget=100):
+            with self.subTest(fs=fs):
+                fs.create_directory(Path("dir"))
+                file = fs.open(Path("dir", "file"), "wb")
+                file.write(b"12345")
+                fs.remove(Path("dir"))
+                fs.touch(Path("dir"))
+                file.close()
+                self.assertEqual(
+                    (
+                        fs.get_contents(Path("dir")),
+                        fs.memory_usage(Path.root()),
+                    ),
+                    ("", memory.MemoryUsage(size=0, nodes=2)),
+                )
+
+    def test_closing_after_the_file_is_replaced(self):
+        for fs in memory.FS(), memory.FS(budget=100):
+            with self.subTest(fs=fs):
+                file = fs.open(Path("file"), "wb")
+                file.write(b"12345")
+                fs.set_contents(Path("file"), "123")
+                file.close()
+                self.assertEqual(
+                    (
+                        fs.get_contents(Path("file")),
+                        fs.memory_usage(Path.root()),
+                    ),
+                    ("123", memory.MemoryUsage(size=3, nodes=2)),
+                )
+
+    def test_snapshots(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "123")
+        snapshot = fs.snapshot()
+        snapshot.set_contents(Path("other"), "45")
+        self.assertEqual(
+            (
+                fs.memory_usage(Path.root()),
+                snapshot.memory_usage(Path.root()),
+            ),
+            (
+                memory.MemoryUsage(size=3, nodes=2),
+                memory.MemoryUsage(size=5, nodes=3),
+            ),
+        )
+
+    def test_lazy_from_native(self):
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+        native_fs.create_directory(tempdir / "dir")
+        native_fs.set_contents(tempdir / "dir" / "native", "contents")
+
+        fs = memory.from_native(tempdir, lazy=True)
+        fs.set_contents(Path("dir", "file"), "123")
+        self.assertEqual(
+            fs.memory_usage(Path.root()),
+            memory.MemoryUsage(size=3, nodes=4),
+        )
+
+    def test_non_existing(self):
+        fs = memory.FS()
+        with self.assertRaises(exceptions.FileNotFound):
+            fs.memory_usage(Path("missing"))
+
+    def test_within_budget(self):
+        fs = memory.FS(budget=10)
+        fs.set_contents(Path("file"), "12345")
+        fs.set_contents(Path("other"), "12345")
+        self.assertEqual(fs.memory_usage(Path.root()).size, 10)
+
+    def test_budget_exceeded(self):
+        fs = memory.FS(budget=10)
+        fs.set_contents(Path("file"), "12345")
+        with (
+            self.assertRaises(exceptions.NoSpace),
+            fs.open(Path("other"), "wb") as file,
+        ):
+            file.write(b"123456")
+
+    def test_budget_exceeded_by_files_still_open(self):
+        fs = memory.FS(budget=10)
+        with fs.open(Path("file"), "wb") as file:
+            file.write(b"123456")
+            with (
+                self.assertRaises(exceptions.NoSpace),
+                fs.open(Path("other"), "wb") as other,
+            ):
+                other.write(b"12345")
+
+    def test_budget_freed_by_removing(self):
+        fs = memory.FS(budget=10)
+        fs.set_contents(Path("file"), "1234567890")
+        fs.remove_file(Path("file"))
+        fs.set_contents(Path("file"), "1234567890")
+        self.assertEqual(fs.memory_usage(Path.root()).size, 10)
+
+    def test_overwriting_within_budget(self):
+        fs = memory.FS(budget=10)
+        with fs.open(Path("file"), "wb") as file:
+            file.write(b"1234567890")
+            file.seek(0)
+            file.write(b"abc")
+        fs.set_contents(Path("file"), "0987654321")
+        self.assertEqual(fs.get_contents(Path("file")), "0987654321")
+
+
+class TestSpilling(TestCase):
+    def test_large_files_are_spilled(self):
+        fs = memory.FS(spill_above=3)
+        fs.set_contents(Path("large"), "1234")
+        fs.set_contents(Path("small"), "123")
+        self.assertEqual(
+            (
+                fs.get_contents(Path("large")),
+                fs.stat(Path("large")).st_size,
+                fs.memory_usage(Path.root()).size,
+            ),
+            ("1234", 4, 3),
+        )
+
+    def test_spilled_files_can_be_appended_to(self):
+        fs = memory.FS(spill_above=3)
+        fs.set_contents(Path("file"), "1234")
+        with fs.open(Path("file"), "a") as file:
+            file.write("5678")
+        self.assertEqual(fs.get_contents(Path("file")), "12345678")
+
+    def test_spilled_files_are_saved(self):
+        fs = memory.FS(spill_above=3)
+        fs.set_contents(Path("file"), "1234")
+
+        native_fs = native.FS()
+        tempdir = native_fs.temporary_directory()
+        self.addCleanup(native_fs.remove, tempdir)
+        fs.save(tempdir / "image")
+
+        loaded = memory.load(tempdir / "image")
+        self.assertEqual(loaded.get_contents(Path("file")), "1234")
+
+    def test_empty_files(self):
+        fs = memory.FS(max_resident=0)
+        fs.touch(Path("empty"))
+        fs.set_contents(Path("also"), b"", mode="b")
+        fs.set_contents(Path("file"), "contents")
+        self.assertEqual(
+            (
+                fs.get_contents(Path("empty")),
+                fs.get_contents(Path("also")),
+                fs.get_contents(Path("file")),
+                fs.memory_usage(Path.root()).size,
+            ),
+            ("", "", "contents", 0),
+        )
+
+    def test_least_recently_opened_files_are_spilled(self):
+        fs = memory.FS(max_resident=25)
+        fs.set_contents(Path("a"), "0123456789")
+        fs.set_contents(Path("b"), "0123456789")
+        fs.get_contents(Path("a"))
+        fs.set_contents(Path("c"), "0123456789")
+        self.assertEqual(
+            (
+                fs.memory_usage(Path("a")).size,
+                fs.memory_usage(Path("b")).size,
+                fs.memory_usage(Path("c")).size,
+                fs.get_contents(Path("b")),
+            ),
+            (10, 0, 10, "0123456789"),
+        )
+
+    def test_removed_files_are_not_spilled(self):
+        fs = memory.FS(max_resident=15)
+        fs.set_contents(Path("a"), "0123456789")
+        fs.remove_file(Path("a"))
+        fs.set_contents(Path("b"), "0123456789")
+        fs.set_contents(Path("c"), "0123456789")
+        self.assertEqual(
+            (
+                fs.memory_usage(Path("b")).size,
+                fs.memory_usage(Path("c")).size,
+            ),
+            (0, 10),
+        )
+
+    def test_spilling_frees_budget(self):
+        fs = memory.FS(budget=10, spill_above=5)
+        fs.set_contents(Path("a"), "0123456789")
+        fs.set_contents(Path("b"), "0123456789")
+        self.assertEqual(fs.memory_usage(Path.root()).size, 0)
+
+
+class TestCompression(TestCase):
+    def test_compressed(self):
+        fs = memory.FS(compression="zlib", hot=0)
+        fs.set_contents(Path("file"), "contents" * 100)
+        stats = fs.compression_stats()
+        self.assertEqual(
+            (
+                fs.get_contents(Path("file")),
+                fs.stat(Path("file")).st_size,
+                fs.memory_usage(Path("file")).size,
+                stats.files,
+                stats.size,
+            ),
+            ("contents" * 100, 800, stats.compressed_size, 1, 800),
+        )
+        self.assertGreater(stats.ratio, 10)
+
+    def test_lzma(self):
+        fs = memory.FS(compression="lzma")
+        fs.set_contents(Path("file"), "contents" * 100)
+        self.assertEqual(fs.get_contents(Path("file")), "contents" * 100)
+
+    def test_appending(self):
+        fs = memory.FS(compression="zlib")
+        fs.set_contents(Path("file"), "one")
+        with fs.open(Path("file"), "a") as file:
+            file.write(" two")
+        self.assertEqual(fs.get_contents(Path("file")), "one two")
+
+    def test_hot_files_are_not_decompressed_again(self):
+        fs = memory.FS(compression="zlib", hot=1)
+        fs.set_contents(Path("a"), "a")
+        fs.set_contents(Path("b"), "b")
+        for _ in range(3):
+            fs.get_contents(Path("b"))
+        fs.get_contents(Path("a"))
+        fs.get_contents(Path("a"))
+        stats = fs.compression_stats()
+        self.assertEqual(
+            (stats.files, stats.hits, stats.misses),
+            (1, 1, 1),
+        )
+
+    def test_hot_files_are_not_compressed(self):
+        fs = memory.FS(compression="zlib", hot=2)
+        fs.set_contents(Path("a"), "contents" * 100)
+        fs.set_contents(Path("b"), "contents" * 100)
+        before = fs.compression_stats().files
+        fs.get_contents(Path("a"))
+        fs.set_contents(Path("c"), "contents" * 100)
+        self.assertEqual(
+            (
+                before,
+                fs.compression_stats().files,
+                fs.memory_usage(Path("a")).size,
+                fs.memory_usage(Path("c")).size,
+                fs.get_contents(Path("b")),
+            ),
+            (0, 1, 800, 800, "contents" * 100),
+        )
+        self.assertLess(fs.memory_usage(Path("b")).size, 800)
+
+    def test_digest(self):
+        fs, uncompressed = memory.FS(compression="zlib"), memory.FS()
+        fs.set_contents(Path("file"), "contents")
+        uncompressed.set_contents(Path("file"), "contents")
+        self.assertEqual(
+            fs.digest(Path("file")),
+            uncompressed.digest(Path("file")),
+        )
+
+    def test_uncompressed(self):
+        self.assertEqual(
+            memory.FS().compression_stats(),
+            memory.CompressionStats(
+                files=0,
+                size=0,
+                compressed_size=0,
+                hits=0,
+                misses=0,
+            ),
+        )
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            memory.FS(compression="nope")
+
+
+class TestDeduplication(TestCase):
+    def test_identical_contents_are_shared(self):
+        fs = memory.FS(deduplicate=True)
+        fs.set_contents(Path("a"), "contents")
+        fs.set_contents(Path("b"), "contents")
+        fs.set_contents(Path("c"), "other")
+        self.assertEqual(
+            (fs.get_contents(Path("a")), fs.get_contents(Path("b"))),
+            ("contents", "contents"),
+        )
+
+    def test_writing_to_shared_contents(self):
+        fs = memory.FS(deduplicate=True)
+        fs.set_contents(Path("a"), "contents")
+        fs.set_contents(Path("b"), "contents")
+        with fs.open(Path("b"), "a") as file:
+            file.write(" and more")
+        self.assertEqual(
+            (fs.get_contents(Path("a")), fs.get_contents(Path("b"))),
+            ("contents", "contents and more"),
+        )
+
+    def test_shared_contents_are_counted_once(self):
+        fs = memory.FS(deduplicate=True)
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("dir", "a"), "0123456789")
+        fs.set_contents(Path("dir", "b"), "0123456789")
+        fs.set_contents(Path("c"), "0123456789")
+        fs.set_contents(Path("d"), "other")
+        self.assertEqual(
+            (
+                fs.memory_usage(Path.root()),
+                fs.memory_usage(Path("dir")),
+                fs.memory_usage(Path("dir", "a")),
+            ),
+            (
+                memory.MemoryUsage(size=15, nodes=6),
+                memory.MemoryUsage(size=10, nodes=3),
+                memory.MemoryUsage(size=10, nodes=1),
+            ),
+        )
+
+    def test_shared_contents_are_counted_once_per_directory(self):
+        fs = memory.FS(deduplicate=True)
+        fs.create_directory(Path("dir"))
+        fs.create_directory(Path("dir", "x"))
+        fs.create_directory(Path("dir", "y"))
+        fs.set_contents(Path("dir", "x", "a"), "0123456789")
+        fs.set_contents(Path("dir", "y", "b"), "0123456789")
+        fs.set_contents(Path("dir", "y", "c"), "other")
+        fs.set_contents(Path("elsewhere"), "0123456789")
+        self.assertEqual(
+            (
+                fs.memory_usage(Path("dir")),
+                fs.memory_usage(Path("dir", "x")),
+                fs.memory_usage(Path("dir", "y")),
+            ),
+            (
+                memory.MemoryUsage(size=15, nodes=6),
+                memory.MemoryUsage(size=10, nodes=2),
+                memory.MemoryUsage(size=15, nodes=3),
+            ),
+        )
+
+    def test_shared_contents_are_counted_until_unused(self):
+        fs = memory.FS(deduplicate=True)
+        fs.set_contents(Path("a"), "0123456789")
+        fs.set_contents(Path("b"), "0123456789")
+        fs.remove_file(Path("a"))
+        during = fs.memory_usage(Path.root()).size
+        fs.set_contents(Path("b"), "new")
+        self.assertEqual(
+            (during, fs.memory_usage(Path.root()).size),
+            (10, 3),
+        )
+
+    def test_shared_contents_are_budgeted_once(self):
+        fs = memory.FS(deduplicate=True, budget=20)
+        fs.set_contents(Path("a"), "0123456789")
+        fs.set_contents(Path("b"), "0123456789")
+        fs.copy(Path("a"), Path("c"))
+        fs.set_contents(Path("d"), "9876543210")
+        with self.assertRaises(exceptions.NoSpace):
+            fs.set_contents(Path("e"), "0")
+
+    def test_snapshots_count_shared_contents_separately(self):
+        fs = memory.FS(deduplicate=True)
+        fs.set_contents(Path("a"), "0123456789")
+        snapshot = fs.snapshot()
+        snapshot.set_contents(Path("b"), "0123456789")
+        fs.remove_file(Path("a"))
+        self.assertEqual(
+            (
+                fs.memory_usage(Path.root()).size,
+                snapshot.memory_usage(Path.root()).size,
+            ),
+            (0, 10),
+        )
+
+    def test_with_compression(self):
+        fs = memory.FS(deduplicate=True, compression="zlib", hot=0)
+        fs.set_contents(Path("a"), "contents")
+        fs.set_contents(Path("b"), "contents")
+        self.assertEqual(
+            (fs.get_contents(Path("b")), fs.compression_stats().files),
+            ("contents", 1),
+        )
+
+    def test_compressed_once_they_are_not_hot(self):
+        fs = memory.FS(deduplicate=True, compression="zlib", hot=1)
+        fs.set_contents(Path("a"), "contents")
+        fs.set_contents(Path("b"), "contents")
+        fs.set_contents(Path("c"), "other")
+        fs.set_contents(Path("d"), "other")
+        self.assertEqual(
+            (
+                fs.get_contents(Path("a")),
+                fs.get_contents(Path("c")),
+                fs.compression_stats().files,
+                fs.memory_usage(Path("b")).size,
+            ),
+            ("contents", "other", 2, fs.memory_usage(Path("a")).size),
+        )
+
+
+class TestCopy(TestCase):
+    def test_copy(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        fs.set_contents(Path("file"), "contents")
+        copied = fs.copy(Path("file"), Path("dir", "copy"))
+        self.assertEqual(
+            (copied, fs.get_contents(Path("dir", "copy"))),
+            (Path("dir", "copy"), "contents"),
+        )
+
+    def test_copies_are_independent(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "contents")
+        fs.copy(Path("file"), Path("copy"))
+        fs.set_contents(Path("copy"), "new")
+        with fs.open(Path("file"), "a") as file:
+            file.write(" and more")
+        self.assertEqual(
+            (fs.get_contents(Path("file")), fs.get_contents(Path("copy"))),
+            ("contents and more", "new"),
+        )
+
+    def test_copy_over_existing_file(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "contents")
+        fs.set_contents(Path("copy"), "old")
+        fs.copy(Path("file"), Path("copy"))
+        self.assertEqual(fs.get_contents(Path("copy")), "contents")
+
+    def test_copy_file_open_for_writing(self):
+        fs = memory.FS()
+        with fs.open(Path("file"), "w") as file:
+            file.write("contents")
+            file.flush()
+            fs.copy(Path("file"), Path("copy"))
+            file.write(" and more")
+        self.assertEqual(fs.get_contents(Path("copy")), "contents")
+
+    def test_copy_is_counted(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "contents")
+        fs.copy(Path("file"), Path("copy"))
+        self.assertEqual(fs.memory_usage(Path.root()).size, 16)
+
+    def test_copy_within_budget(self):
+        fs = memory.FS(budget=10)
+        fs.set_contents(Path("file"), "contents")
+        with self.assertRaises(exceptions.NoSpace):
+            fs.copy(Path("file"), Path("copy"))
+
+    def test_copy_directory(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+        with self.assertRaises(exceptions.IsADirectory):
+            fs.copy(Path("dir"), Path("copy"))
+
+    def test_copy_non_existing(self):
+        fs = memory.FS()
+        with self.assertRaises(exceptions.FileNotFound):
+            fs.copy(Path("file"), Path("copy"))
+
+    def test_copy_into_non_existing_directory(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "contents")
+        with self.assertRaises(exceptions.FileNotFound):
+            fs.copy(Path("file"), Path("dir", "copy"))
+
+
+class TestConcurrency(TestCase):
+    def setUp(self):
+        interval = sys.getswitchinterval()
+        self.addCleanup(sys.setswitchinterval, interval)
+        sys.setswitchinterval(1e-6)
+
+    def test_concurrent_writers(self):
+        fs = memory.FS()
+        fs.create_directory(Path("dir"))
+
+        def touch(thread):
+            for i in range(100):
+                fs.touch(Path("dir", f"{thread}-{i}"))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(touch, range(8)))
+
+        self.assertEqual(len(fs.children(Path("dir"))), 800)
+
+    def test_readers_during_writes(self):
+        fs = memory.FS()
+        fs.set_contents(Path("file"), "contents")
+
+        def write():
+            for i in range(200):
+                fs.create_directory(Path("dir"))
+                fs.set_contents(Path("dir", "file"), str(i))
+                fs.remove(Path("dir"))
+
+        def read():
+            for _ in range(200):
+                self.assertEqual(fs.get_contents(Path("file")), "contents")
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(write)]
+            futures.extend(pool.submit(read) for _ in range(3))
+            for future in futures:
+                future.result()
+
+    def test_stat_during_writes(self):
+        fs = memory.FS()
+        fs.touch(Path("file"))
+        reading, done = threading.Barrier(4), threading.Event()
+
+        def write():
+            reading.wait()
+            try:
+                for _ in range(100):
+                    with fs.open(Path("file"), "wb") as file:
+                        for _ in range(200):
+                            file.write(b"x" * 1000)
+            finally:
+                done.set()
+
+        def read():
+            reading.wait()
+            while not done.is_set():
+                fs.stat(Path("file"))
+                fs.digest(Path("file"))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(write)]
+            futures.extend(pool.submit(read) for _ in range(3))
+            for future in futures:
+                future.result()
+
+        self.assertEqual(fs.stat(Path("file")).st_size, 200_000)
+
+    def test_reading_hard_links_being_removed(self):
+        fs = memory.FS()
+        reading, done = threading.Barrier(4), threading.Event()
+
+        def write():
+            reading.wait()
+            try:
+                for _ in range(500):
+                    fs.set_contents(Path("file"), "contents")
+                    fs.hardlink(source=Path("file"), to=Path("link"))
+                    fs.remove_file(Path("file"))
+                    fs.remove_file(Path("link"))
+            finally:
+                done.set()
+
+        def read():
+            reading.wait()
+            while not done.is_set():
+                try:
+                    contents = fs.get_contents(Path("link"))
+                except exceptions.FileNotFound:
+                    continue
+                self.assertEqual(contents, "contents")
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(write)]
+            futures.extend(pool.submit(read) for _ in range(3))
+            for future in futures:
+                future.result()
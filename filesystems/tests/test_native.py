@@ -1,7 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
+import errno
+import os
 
-from filesystems import native
+from pyrsistent import s
+
+from filesystems import Path, exceptions, native
+from filesystems._path import RelativePath
 from filesystems.tests.common import (
+    HardlinkMixin,
     InvalidModeMixin,
     NonExistentChildMixin,
     OpenAppendNonExistingFileMixin,
@@ -16,6 +23,18 @@ from filesystems.tests.common import (
 class TestNative(TestFS, TestCase):
     FS = native.FS
 
+    def test_disk_usage_counts_hard_links_once(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.create_directory(tempdir / "dir")
+        fs.set_contents(tempdir / "file", b"foo", mode="b")
+        os.link(str(tempdir / "file"), str(tempdir.descendant("dir", "file")))
+
+        (usage,) = fs.disk_usage(tempdir)
+        self.assertEqual((usage.size, usage.files), (3, 2))
+
 
 class TestNativeInvalidMode(InvalidModeMixin, TestCase):
     FS = native.FS
@@ -49,3 +68,211 @@ class TestNonExistentChild(NonExistentChildMixin, TestCase):
 
 class TestSymbolicLoops(SymbolicLoopMixin, TestCase):
     FS = native.FS
+
+
+class TestHardlinks(HardlinkMixin, TestCase):
+    FS = native.FS
+
+
+class TestAnchored(TestFS, TestCase):
+    FS = staticmethod(native.anchored)
+
+    def test_recreated_directory(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.create_directory(tempdir / "dir")
+        fs.touch(tempdir.descendant("dir", "file"))
+        fs.remove(tempdir / "dir")
+
+        fs.create_directory(tempdir / "dir")
+        fs.touch(tempdir.descendant("dir", "other"))
+
+        self.assertEqual(
+            native.FS().children(tempdir / "dir"),
+            s(tempdir.descendant("dir", "other")),
+        )
+
+    def test_replaced_directory_link(self):
+        fs = self.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        fs.create_directory(tempdir / "a")
+        fs.create_directory(tempdir / "b")
+        fs.link(source=tempdir / "a", to=tempdir / "link")
+        fs.touch(tempdir.descendant("link", "file"))
+
+        fs.remove_file(tempdir / "link")
+        fs.link(source=tempdir / "b", to=tempdir / "link")
+        fs.touch(tempdir.descendant("link", "other"))
+
+        self.assertEqual(
+            fs.children(tempdir / "b"),
+            s(tempdir.descendant("b", "other")),
+        )
+
+    def test_evicts_least_recently_used(self):
+        fs = native.anchored(cache_size=2)
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        for name in "abcd":
+            fs.create_directory(tempdir / name)
+            fs.touch(tempdir.descendant(name, "file"))
+
+        self.assertEqual(
+            [fs.exists(tempdir.descendant(name, "file")) for name in "abcd"],
+            [True] * 4,
+        )
+
+    def test_top_level_paths_use_the_root(self):
+        directories = native._OpenDirectories(size=1)
+        self.addCleanup(directories.close)
+        with directories.at(Path("tmp")) as (name, fd):
+            self.assertEqual(
+                (name, fd, os.stat(name, dir_fd=fd).st_ino),
+                ("tmp", directories._root, os.stat("/tmp").st_ino),
+            )
+        self.assertEqual(len(directories._recent), 0)
+
+    def test_evicted_directories_stay_open_while_in_use(self):
+        fs = native.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        fs.create_directory(tempdir / "a")
+        fs.create_directory(tempdir / "b")
+        fs.touch(tempdir.descendant("a", "file"))
+
+        directories = native._OpenDirectories(size=1)
+        self.addCleanup(directories.close)
+        with directories.at(tempdir.descendant("a", "file")) as (name, fd):
+            with directories.at(tempdir.descendant("b", "file")):
+                pass
+            self.assertEqual(
+                (name, os.listdir(fd), directories._evicted),
+                ("file", ["file"], {fd}),
+            )
+        self.assertEqual(directories._evicted, set())
+
+    def test_concurrent_use(self):
+        fs = native.anchored(cache_size=2)
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+
+        names = [str(i) for i in range(16)]
+        for name in names:
+            fs.create_directory(tempdir / name)
+            fs.touch(tempdir.descendant(name, "file"))
+
+        def exists(name):
+            return all(
+                fs.exists(tempdir.descendant(name, "file")) for _ in range(50)
+            )
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertTrue(all(pool.map(exists, names * 4)))
+
+
+class TestAnchoredInvalidMode(InvalidModeMixin, TestCase):
+    FS = staticmethod(native.anchored)
+
+
+class TestAnchoredOpenFile(OpenFileMixin, TestCase):
+    FS = staticmethod(native.anchored)
+
+
+class TestAnchoredOpenWriteNonExistingFile(
+    OpenWriteNonExistingFileMixin,
+    TestCase,
+):
+    FS = staticmethod(native.anchored)
+
+
+class TestAnchoredOpenAppendNonExistingFile(
+    OpenAppendNonExistingFileMixin,
+    TestCase,
+):
+    FS = staticmethod(native.anchored)
+
+
+class TestAnchoredWriteLines(WriteLinesMixin, TestCase):
+    FS = staticmethod(native.anchored)
+
+
+class TestAnchoredNonExistentChild(NonExistentChildMixin, TestCase):
+    FS = staticmethod(native.anchored)
+
+
+class TestAnchoredSymbolicLoops(SymbolicLoopMixin, TestCase):
+    FS = staticmethod(native.anchored)
+
+
+class TestAnchoredHardlinks(HardlinkMixin, TestCase):
+    FS = staticmethod(native.anchored)
+
+
+class _BytesPathsMixin:
+    def tempdir(self, fs):
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        return Path.from_string(os.fsencode(tempdir))
+
+    def test_list_directory(self):
+        fs = self.FS()
+        tempdir = self.tempdir(fs)
+        fs.touch(tempdir / b"\xff")
+        fs.create_directory(tempdir / b"dir")
+        self.assertEqual(
+            (
+                sorted(fs.list_directory(tempdir)),
+                fs.children(tempdir),
+            ),
+            (
+                [b"dir", b"\xff"],
+                s(tempdir / b"dir", tempdir / b"\xff"),
+            ),
+        )
+
+    def test_contents(self):
+        fs = self.FS()
+        tempdir = self.tempdir(fs)
+        fs.create_directory(tempdir / b"\xff")
+        fs.set_contents(tempdir.descendant(b"\xff", b"file"), "contents")
+        self.assertEqual(
+            (
+                fs.get_contents(tempdir.descendant(b"\xff", b"file")),
+                fs.is_file(tempdir.descendant(b"\xff", b"file")),
+            ),
+            ("contents", True),
+        )
+
+    def test_readlink(self):
+        fs = self.FS()
+        tempdir = self.tempdir(fs)
+        fs.link(source=RelativePath(b"\xff"), to=tempdir / b"link")
+        self.assertEqual(
+            fs.readlink(tempdir / b"link"),
+            RelativePath(b"\xff"),
+        )
+
+    def test_non_existing(self):
+        fs = self.FS()
+        tempdir = self.tempdir(fs)
+        with self.assertRaises(exceptions.FileNotFound) as e:
+            fs.stat(tempdir / b"\xff")
+
+        path = os.path.join(os.fsencode(tempdir), b"\xff")
+        self.assertEqual(
+            str(e.exception),
+            os.strerror(errno.ENOENT) + ": " + os.fsdecode(path),
+        )
+
+
+class TestNativeBytesPaths(_BytesPathsMixin, TestCase):
+    FS = native.FS
+
+
+class TestAnchoredBytesPaths(_BytesPathsMixin, TestCase):
+    FS = staticmethod(native.anchored)
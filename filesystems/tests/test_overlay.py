@@ -0,0 +1,302 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+import sys
+
+from pyrsistent import s
+
+from filesystems import Path, exceptions, memory, native, overlay
+from filesystems.tests.common import (
+    InvalidModeMixin,
+    NonExistentChildMixin,
+    OpenAppendNonExistingFileMixin,
+    OpenFileMixin,
+    OpenWriteNonExistingFileMixin,
+    SymbolicLoopMixin,
+    TestFS,
+    WriteLinesMixin,
+)
+
+
+class _OverlayMixin:
+    def FS(self):
+        lower = native.FS().temporary_directory()
+        self.addCleanup(native.FS().remove, lower)
+        return overlay.FS(lower=lower)
+
+
+class TestOverlay(_OverlayMixin, TestFS, TestCase):
+    pass
+
+
+class TestOverlayInvalidMode(_OverlayMixin, InvalidModeMixin, TestCase):
+    pass
+
+
+class TestOverlayOpenFile(_OverlayMixin, OpenFileMixin, TestCase):
+    pass
+
+
+class TestOverlayOpenWriteNonExistingFile(
+    _OverlayMixin,
+    OpenWriteNonExistingFileMixin,
+    TestCase,
+):
+    pass
+
+
+class TestOverlayOpenAppendNonExistingFile(
+    _OverlayMixin,
+    OpenAppendNonExistingFileMixin,
+    TestCase,
+):
+    pass
+
+
+class TestOverlayWriteLines(_OverlayMixin, WriteLinesMixin, TestCase):
+    pass
+
+
+class TestNonExistentChild(_OverlayMixin, NonExistentChildMixin, TestCase):
+    pass
+
+
+class TestSymbolicLoops(_OverlayMixin, SymbolicLoopMixin, TestCase):
+    pass
+
+
+class TestLayers(TestCase):
+    def setUp(self):
+        self.native = native.FS()
+        self.lower = self.native.temporary_directory()
+        self.addCleanup(self.native.remove, self.lower)
+
+        self.native.create_directory(self.lower / "dir")
+        self.native.set_contents(self.lower / "file", "lower")
+        self.native.set_contents(self.lower.descendant("dir", "a"), "a")
+        self.native.set_contents(self.lower.descendant("dir", "b"), "b")
+
+        self.upper_fs = memory.FS()
+        self.fs = overlay.FS(lower=self.lower, upper_fs=self.upper_fs)
+
+    def test_reads_from_lower(self):
+        self.assertEqual(
+            (
+                self.fs.children(Path.root()),
+                self.fs.get_contents(Path("dir", "a")),
+                self.fs.is_dir(Path("dir")),
+            ),
+            (s(Path("dir"), Path("file")), "a", True),
+        )
+
+    def test_writes_do_not_touch_lower(self):
+        self.fs.set_contents(Path("file"), "upper")
+        self.fs.touch(Path("dir", "c"))
+
+        self.assertEqual(
+            (
+                self.fs.get_contents(Path("file")),
+                self.native.get_contents(self.lower / "file"),
+                self.fs.children(Path("dir")),
+                self.native.children(self.lower / "dir"),
+            ),
+            (
+                "upper",
+                "lower",
+                s(Path("dir", "a"), Path("dir", "b"), Path("dir", "c")),
+                s(self.lower.descendant("dir", "a"), self.lower / "dir" / "b"),
+            ),
+        )
+
+    def test_append_copies_up(self):
+        with self.fs.open(Path("dir", "a"), "a") as file:
+            file.write(" and more")
+
+        self.assertEqual(
+            (
+                self.fs.get_contents(Path("dir", "a")),
+                self.upper_fs.get_contents(Path("dir", "a")),
+                self.native.get_contents(self.lower.descendant("dir", "a")),
+            ),
+            ("a and more", "a and more", "a"),
+        )
+
+    def test_remove_lower_file(self):
+        self.fs.remove_file(Path("dir", "a"))
+
+        self.assertEqual(
+            (
+                self.fs.exists(Path("dir", "a")),
+                self.fs.children(Path("dir")),
+                self.native.exists(self.lower.descendant("dir", "a")),
+            ),
+            (False, s(Path("dir", "b")), True),
+        )
+
+    def test_remove_and_recreate_lower_directory(self):
+        self.fs.remove(Path("dir"))
+        self.assertFalse(self.fs.exists(Path("dir")))
+
+        self.fs.create_directory(Path("dir"))
+        self.assertEqual(
+            (self.fs.children(Path("dir")), self.native.exists(self.lower)),
+            (s(), True),
+        )
+
+    def test_remove_nonempty_lower_directory(self):
+        with self.assertRaises(exceptions.DirectoryNotEmpty):
+            self.fs.remove_empty_directory(Path("dir"))
+
+    def test_remove_file_on_lower_directory(self):
+        with self.assertRaises(exceptions._UnlinkNonFileError):
+            self.fs.remove_file(Path("dir"))
+
+    def test_create_existing_lower_file(self):
+        with self.assertRaises(exceptions.FileExists):
+            self.fs.create(Path("file"))
+
+    def test_create_existing_lower_directory_allow_existing(self):
+        self.fs.create_directory(Path("dir"), allow_existing=True)
+        self.assertTrue(self.fs.is_dir(Path("dir")))
+
+    def test_errors_use_overlay_paths(self):
+        with self.assertRaises(exceptions.NotADirectory) as e:
+            self.fs.list_directory(Path("file"))
+        self.assertEqual(e.exception, exceptions.NotADirectory(Path("file")))
+
+    def test_native_upper(self):
+        upper = self.native.temporary_directory()
+        self.addCleanup(self.native.remove, upper)
+
+        fs = overlay.FS(lower=self.lower, upper_fs=self.native, upper=upper)
+        fs.set_contents(Path("dir", "a"), "changed")
+
+        self.assertEqual(
+            (
+                fs.get_contents(Path("dir", "a")),
+                self.native.get_contents(upper.descendant("dir", "a")),
+                self.native.get_contents(self.lower.descendant("dir", "a")),
+            ),
+            ("changed", "changed", "a"),
+        )
+
+    def test_link_to_lower_file(self):
+        self.fs.link(source=Path("file"), to=Path("alias"))
+        self.assertEqual(
+            (
+                self.fs.get_contents(Path("alias")),
+                self.fs.realpath(Path("alias")),
+            ),
+            ("lower", Path("file")),
+        )
+
+    def test_link_to_lower_directory(self):
+        self.fs.link(source=Path("dir"), to=Path("alias"))
+        self.assertEqual(
+            (
+                self.fs.list_directory(Path("alias")),
+                self.fs.get_contents(Path("alias", "a")),
+            ),
+            (s("a", "b"), "a"),
+        )
+
+    def test_absolute_lower_links_are_within_the_overlay(self):
+        self.native.link(source=Path("dir", "a"), to=self.lower / "link")
+        self.assertEqual(
+            (
+                self.fs.get_contents(Path("link")),
+                self.fs.realpath(Path("link")),
+            ),
+            ("a", Path("dir", "a")),
+        )
+
+    def test_lower_link_to_upper_file(self):
+        self.native.link(source=Path("new"), to=self.lower / "link")
+        self.fs.set_contents(Path("new"), "upper")
+        self.assertEqual(self.fs.get_contents(Path("link")), "upper")
+
+    def test_writing_through_link_to_lower_file(self):
+        self.fs.link(source=Path("file"), to=Path("alias"))
+        self.fs.set_contents(Path("alias"), "changed")
+        self.assertEqual(
+            (
+                self.fs.get_contents(Path("file")),
+                self.fs.readlink(Path("alias")),
+                self.native.get_contents(self.lower / "file"),
+            ),
+            ("changed", Path("file"), "lower"),
+        )
+
+    def test_broken_link_errors_use_the_link(self):
+        self.fs.link(source=Path("nowhere"), to=Path("alias"))
+        with self.assertRaises(exceptions.FileNotFound) as e:
+            self.fs.stat(Path("alias"))
+        self.assertEqual(e.exception, exceptions.FileNotFound(Path("alias")))
+
+    def test_lower_links_along_the_path(self):
+        self.native.link(source=Path("dir"), to=self.lower / "alias")
+        self.assertEqual(
+            (
+                self.fs.get_contents(Path("alias", "a")),
+                self.fs.realpath(Path("alias", "a")),
+                self.fs.children(Path("alias")),
+            ),
+            ("a", Path("dir", "a"), s(Path("alias", "a"), Path("alias", "b"))),
+        )
+
+    def test_existing_upper_contents_hide_lower(self):
+        upper_fs = memory.FS()
+        upper_fs.set_contents(Path("file"), "upper")
+        fs = overlay.FS(lower=self.lower, upper_fs=upper_fs)
+        self.assertEqual(
+            (fs.get_contents(Path("file")), fs.get_contents(Path("dir", "a"))),
+            ("upper", "a"),
+        )
+
+    def test_reading_after_writing_elsewhere(self):
+        self.assertEqual(self.fs.get_contents(Path("dir", "a")), "a")
+        self.fs.set_contents(Path("dir", "b"), "changed")
+        self.fs.remove_file(Path("file"))
+        self.assertEqual(
+            (
+                self.fs.get_contents(Path("dir", "a")),
+                self.fs.get_contents(Path("dir", "b")),
+                self.fs.exists(Path("file")),
+            ),
+            ("a", "changed", False),
+        )
+
+    def test_lower_results_are_bounded(self):
+        state = overlay._Overlay(
+            lower=self.lower,
+            upper_fs=self.upper_fs,
+            upper=Path.root(),
+        )
+        for i in range(overlay._CACHE_SIZE + 10):
+            with self.assertRaises(exceptions.FileNotFound):
+                state.lstat(Path(f"missing{i}"))
+        self.assertEqual(len(state._cached), overlay._CACHE_SIZE)
+
+    def test_concurrent_lower_results(self):
+        interval = sys.getswitchinterval()
+        self.addCleanup(sys.setswitchinterval, interval)
+        sys.setswitchinterval(1e-6)
+
+        state = overlay._Overlay(
+            lower=self.lower,
+            upper_fs=self.upper_fs,
+            upper=Path.root(),
+        )
+
+        # Each thread both finds results other threads are evicting, and
+        # evicts those they are finding.
+        paths = [Path(f"missing{i}") for i in range(overlay._CACHE_SIZE + 1)]
+
+        def lstat(thread):
+            for i in range(overlay._CACHE_SIZE * 2):
+                with self.assertRaises(exceptions.FileNotFound):
+                    state.lstat(paths[(i + thread) % len(paths)])
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lstat, range(4)))
+
+        self.assertEqual(len(state._cached), overlay._CACHE_SIZE)
@@ -113,6 +113,57 @@ class TestPath(TestCase):
         with self.assertRaises(exceptions.InvalidPath):
             Path.from_string("")
 
+    def test_from_string_normalize(self):
+        self.assertEqual(
+            Path.from_string(
+                os.sep.join(["", "a", os.curdir, "b", "", os.pardir, "c"]),
+                normalize=True,
+            ),
+            Path("a", "c"),
+        )
+
+    def test_from_string_relative_normalize(self):
+        self.assertEqual(
+            Path.from_string(
+                os.sep.join([os.pardir, "a", os.pardir, os.pardir, "b"]),
+                normalize=True,
+            ),
+            RelativePath(os.pardir, os.pardir, "b"),
+        )
+
+    def test_from_string_is_cached(self):
+        path = os.sep + os.sep.join("abc")
+        self.assertIs(Path.from_string(path), Path.from_string(path))
+
+    def test_from_strings(self):
+        strings = [
+            os.sep,
+            os.sep + os.sep.join("ab"),
+            os.sep + os.sep.join("abc") + os.sep,
+            os.sep + os.sep.join("ad"),
+            os.sep.join("ab"),
+            "c",
+            os.sep * 3 + "a" + os.sep * 2 + "b",
+            os.pardir + os.sep + "a",
+        ]
+        self.assertEqual(
+            Path.from_strings(iter(strings)),
+            [Path.from_string(each) for each in strings],
+        )
+
+    def test_from_strings_shares_segments(self):
+        one, two = Path.from_strings(
+            [
+                os.sep + os.sep.join(["directory", "one"]),
+                os.sep + os.sep.join(["other", "directory", "two"]),
+            ],
+        )
+        self.assertIs(one.segments[0], two.segments[1])
+
+    def test_from_strings_empty_string(self):
+        with self.assertRaises(exceptions.InvalidPath):
+            Path.from_strings([os.sep + "a", ""])
+
     def test_str(self):
         self.assertEqual(
             str(Path.from_string(os.sep + os.sep.join("abc"))),
@@ -158,6 +209,57 @@ class TestPath(TestCase):
             Path.from_string(os.path.expanduser("~/foo/~/bar")),
         )
 
+    def test_normalized(self):
+        self.assertEqual(
+            Path("a", os.curdir, "", "b", os.pardir, "c").normalized(),
+            Path("a", "c"),
+        )
+
+    def test_normalized_parent_of_root(self):
+        self.assertEqual(
+            Path(os.pardir, "a", os.pardir, os.pardir, "b").normalized(),
+            Path("b"),
+        )
+
+    def test_normalized_already_normal(self):
+        path = Path("a", "b")
+        self.assertIs(path.normalized(), path)
+
+    def test_bytes(self):
+        path = Path(b"a", b"\xff")
+        self.assertEqual(
+            (os.fspath(path), str(path)),
+            (
+                os.path.join(os.fsencode(os.sep), b"a", b"\xff"),
+                os.fsdecode(os.path.join(os.fsencode(os.sep), b"a", b"\xff")),
+            ),
+        )
+
+    def test_from_bytes(self):
+        self.assertEqual(
+            Path.from_string(os.fsencode(os.sep + os.sep.join("ab") + os.sep)),
+            Path(b"a", b"b"),
+        )
+
+    def test_from_bytes_relative(self):
+        self.assertEqual(
+            Path.from_string(os.fsencode(os.sep.join("ab"))),
+            RelativePath(b"a", b"b"),
+        )
+
+    def test_from_strings_bytes(self):
+        strings = [os.fsencode(os.sep + "a"), os.fsencode(os.sep + "a")]
+        self.assertEqual(
+            Path.from_strings(strings),
+            [Path(b"a"), Path(b"a")],
+        )
+
+    def test_normalized_bytes(self):
+        self.assertEqual(
+            Path(b"a", b".", b"b", b"..", b"c").normalized(),
+            Path(b"a", b"c"),
+        )
+
     def test_interface(self):
         verify.verifyClass(interfaces.Path, Path)
 
@@ -244,5 +346,35 @@ class TestRelativePath(TestCase):
             os.path.join("a", "b", "c"),
         )
 
+    def test_normalized(self):
+        self.assertEqual(
+            RelativePath(os.curdir, "a", "", "b", os.pardir).normalized(),
+            RelativePath("a"),
+        )
+
+    def test_normalized_leading_parents(self):
+        self.assertEqual(
+            RelativePath(os.pardir, "a", os.pardir, os.pardir).normalized(),
+            RelativePath(os.pardir, os.pardir),
+        )
+
+    def test_normalized_to_nothing(self):
+        self.assertEqual(
+            RelativePath("a", os.pardir).normalized(),
+            RelativePath(os.curdir),
+        )
+
+    def test_bytes(self):
+        self.assertEqual(
+            os.fspath(RelativePath(b"a", b"\xff")),
+            os.path.join(b"a", b"\xff"),
+        )
+
+    def test_normalized_bytes_to_nothing(self):
+        self.assertEqual(
+            RelativePath(b"a", b"..").normalized(),
+            RelativePath(b"."),
+        )
+
     def test_interface(self):
         verify.verifyClass(interfaces.Path, RelativePath)
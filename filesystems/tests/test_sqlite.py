@@ -0,0 +1,149 @@
+from unittest import TestCase
+import sqlite3
+
+from pyrsistent import s
+
+from filesystems import Path, exceptions, native, sqlite
+from filesystems.tests.common import (
+    InvalidModeMixin,
+    NonExistentChildMixin,
+    OpenAppendNonExistingFileMixin,
+    OpenFileMixin,
+    OpenWriteNonExistingFileMixin,
+    SymbolicLoopMixin,
+    TestFS,
+    WriteLinesMixin,
+)
+
+
+class _SQLiteMixin:
+    def FS(self, **kwargs):
+        fs = sqlite.FS(**kwargs)
+        self.addCleanup(fs.close)
+        return fs
+
+
+class TestSQLite(_SQLiteMixin, TestFS, TestCase):
+    pass
+
+
+class TestSQLiteInvalidMode(_SQLiteMixin, InvalidModeMixin, TestCase):
+    pass
+
+
+class TestSQLiteOpenFile(_SQLiteMixin, OpenFileMixin, TestCase):
+    pass
+
+
+class TestSQLiteOpenWriteNonExistingFile(
+    _SQLiteMixin,
+    OpenWriteNonExistingFileMixin,
+    TestCase,
+):
+    pass
+
+
+class TestSQLiteOpenAppendNonExistingFile(
+    _SQLiteMixin,
+    OpenAppendNonExistingFileMixin,
+    TestCase,
+):
+    pass
+
+
+class TestSQLiteWriteLines(_SQLiteMixin, WriteLinesMixin, TestCase):
+    pass
+
+
+class TestNonExistentChild(_SQLiteMixin, NonExistentChildMixin, TestCase):
+    pass
+
+
+class TestSymbolicLoops(_SQLiteMixin, SymbolicLoopMixin, TestCase):
+    pass
+
+
+class TestDatabase(_SQLiteMixin, TestCase):
+    def database(self):
+        fs = native.FS()
+        tempdir = fs.temporary_directory()
+        self.addCleanup(fs.remove, tempdir)
+        return tempdir / "fs.sqlite"
+
+    def test_persistent(self):
+        database = self.database()
+        with sqlite.FS(path=database) as fs:
+            fs.create_directory(Path("dir"))
+            fs.set_contents(Path("dir", "file"), "contents")
+            fs.link(source=Path("dir", "file"), to=Path("link"))
+
+        reopened = self.FS(path=database)
+        self.assertEqual(
+            (
+                reopened.list_directory(Path.root()),
+                reopened.get_contents(Path("link")),
+            ),
+            (s("dir", "link"), "contents"),
+        )
+
+    def test_write_ahead_log(self):
+        database = self.database()
+        self.FS(path=database).touch(Path("file"))
+        self.assertTrue(
+            native.FS().exists(database.sibling("fs.sqlite-wal")),
+        )
+
+    def test_remove_tree(self):
+        fs = self.FS()
+        fs.create_directory(Path("dir", "sub", "subsub"), with_parents=True)
+        fs.touch(Path("dir", "sub", "file"))
+        fs.touch(Path("dir", "sub", "subsub", "file"))
+        fs.link(source=Path("dir"), to=Path("dir", "loop"))
+        fs.touch(Path("other"))
+
+        fs.remove(Path("dir"))
+        self.assertEqual(fs.list_directory(Path.root()), s("other"))
+
+    def test_remove_root(self):
+        fs = self.FS()
+        fs.create_directory(Path("dir"))
+        fs.touch(Path("dir", "file"))
+        fs.remove(Path.root())
+        self.assertEqual(fs.list_directory(Path.root()), s())
+
+    def test_close(self):
+        fs = self.FS()
+        fs.touch(Path("file"))
+        fs.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            fs.exists(Path("file"))
+
+
+class TestTransaction(_SQLiteMixin, TestCase):
+    def test_committed(self):
+        fs = self.FS()
+        with fs.transaction():
+            fs.create_directory(Path("dir"))
+            for i in range(10):
+                fs.set_contents(Path("dir", str(i)), str(i))
+        self.assertEqual(
+            fs.list_directory(Path("dir")),
+            s(*(str(i) for i in range(10))),
+        )
+
+    def test_rolled_back(self):
+        fs = self.FS()
+        fs.touch(Path("existing"))
+        with self.assertRaises(exceptions.FileExists), fs.transaction():
+            fs.create_directory(Path("dir"))
+            fs.touch(Path("dir", "file"))
+            fs.create_directory(Path("existing"))
+        self.assertEqual(fs.list_directory(Path.root()), s("existing"))
+
+    def test_nested(self):
+        fs = self.FS()
+        with self.assertRaises(ZeroDivisionError), fs.transaction():
+            with fs.transaction():
+                fs.touch(Path("file"))
+            1 / 0  # noqa: B018
+        self.assertFalse(fs.exists(Path("file")))
@@ -0,0 +1,58 @@
+from unittest import TestCase, skipUnless
+import platform
+import subprocess
+import sys
+
+#: Modules which would make importing the package slow.
+HEAVY = {"attr", "concurrent.futures", "pyrsistent", "zope.interface"}
+
+
+def import_times(module):
+    """
+    Import a module in a fresh interpreter, returning each module's import
+    time (cumulative, in microseconds), as reported by ``-X importtime``.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+
+    times = {}
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+#: Only CPython reports import times (other implementations accept, but
+#: ignore, ``-X importtime``).
+reports_import_times = skipUnless(
+    platform.python_implementation() == "CPython",
+    "-X importtime is CPython-specific",
+)
+
+
+class TestStartup(TestCase):
+    @reports_import_times
+    def test_no_heavy_imports(self):
+        self.assertFalse(HEAVY & import_times("filesystems").keys())
+
+    @reports_import_times
+    def test_submodules_are_lazy(self):
+        self.assertNotIn("filesystems.native", import_times("filesystems"))
+
+    def test_submodules_are_importable_as_attributes(self):
+        import filesystems
+
+        self.assertEqual(
+            filesystems.native.__name__,
+            "filesystems.native",
+        )
+
+    def test_unknown_attribute(self):
+        import filesystems
+
+        with self.assertRaises(AttributeError):
+            filesystems.nonexistent  # noqa: B018
@@ -0,0 +1,196 @@
+from unittest import TestCase
+
+from pyrsistent import s
+from testscenarios import multiply_scenarios, with_scenarios
+
+from filesystems import Path, exceptions, memory, native
+from filesystems._path import RelativePath
+from filesystems.sync import Synced, _is_native, sync
+
+_FILESYSTEMS = [
+    ("memory", dict(FS=memory.FS)),
+    ("native", dict(FS=native.FS)),
+    ("anchored", dict(FS=native.anchored)),
+]
+
+
+@with_scenarios()
+class TestSync(TestCase):
+    scenarios = multiply_scenarios(
+        [
+            (f"from {name}", dict(SourceFS=each["FS"]))
+            for name, each in _FILESYSTEMS
+        ],
+        [
+            (f"to {name}", dict(DestFS=each["FS"]))
+            for name, each in _FILESYSTEMS
+        ],
+    )
+
+    def populate(self):
+        self.source_fs = self.SourceFS()
+        self.source = self.source_fs.temporary_directory()
+        self.addCleanup(self.source_fs.remove, self.source)
+
+        self.dest_fs = self.DestFS()
+        tempdir = self.dest_fs.temporary_directory()
+        self.addCleanup(self.dest_fs.remove, tempdir)
+        self.dest = tempdir / "dest"
+
+        self.source_fs.create_directory(self.source / "dir")
+        self.source_fs.set_contents(self.source / "file", "contents")
+        self.source_fs.set_contents(
+            self.source.descendant("dir", "nested"),
+            "nested",
+        )
+        self.source_fs.link(
+            source=RelativePath("file"),
+            to=self.source / "link",
+        )
+
+    def sync(self, **kwargs):
+        return sync(
+            source_fs=self.source_fs,
+            source_path=self.source,
+            dest_fs=self.dest_fs,
+            dest_path=self.dest,
+            **kwargs,
+        )
+
+    def test_sync(self):
+        self.populate()
+        synced = self.sync()
+        self.assertEqual(
+            (
+                synced,
+                self.dest_fs.get_contents(self.dest / "file"),
+                self.dest_fs.get_contents(
+                    self.dest.descendant("dir", "nested"),
+                ),
+                self.dest_fs.readlink(self.dest / "link"),
+            ),
+            (
+                Synced(
+                    copied=s(
+                        self.dest / "file",
+                        self.dest.descendant("dir", "nested"),
+                        self.dest / "link",
+                    ),
+                ),
+                "contents",
+                "nested",
+                RelativePath("file"),
+            ),
+        )
+
+    def test_unchanged_files_are_not_copied(self):
+        self.populate()
+        self.sync()
+        self.assertEqual(self.sync(), Synced())
+
+    def test_changed_size(self):
+        self.populate()
+        self.sync()
+        self.source_fs.set_contents(self.source / "file", "more contents")
+        self.assertEqual(
+            (self.sync(), self.dest_fs.get_contents(self.dest / "file")),
+            (Synced(copied=s(self.dest / "file")), "more contents"),
+        )
+
+    def test_checksum(self):
+        self.populate()
+        self.sync()
+        self.dest_fs.set_contents(self.dest / "file", "CONTENTS")
+        self.assertEqual(
+            (
+                self.sync(checksum=True),
+                self.dest_fs.get_contents(self.dest / "file"),
+            ),
+            (Synced(copied=s(self.dest / "file")), "contents"),
+        )
+
+    def test_changed_link(self):
+        self.populate()
+        self.sync()
+        self.source_fs.remove_file(self.source / "link")
+        self.source_fs.link(
+            source=RelativePath("dir"),
+            to=self.source / "link",
+        )
+        self.assertEqual(
+            (self.sync(), self.dest_fs.readlink(self.dest / "link")),
+            (Synced(copied=s(self.dest / "link")), RelativePath("dir")),
+        )
+
+    def test_extra_files_are_kept(self):
+        self.populate()
+        self.sync()
+        self.dest_fs.touch(self.dest / "extra")
+        self.assertEqual(
+            (self.sync(), self.dest_fs.exists(self.dest / "extra")),
+            (Synced(), True),
+        )
+
+    def test_delete(self):
+        self.populate()
+        self.sync()
+        self.dest_fs.touch(self.dest / "extra")
+        self.dest_fs.create_directory(self.dest / "extra_dir")
+        self.dest_fs.touch(self.dest.descendant("extra_dir", "file"))
+        self.assertEqual(
+            (
+                self.sync(delete=True),
+                self.dest_fs.children(self.dest),
+            ),
+            (
+                Synced(
+                    removed=s(self.dest / "extra", self.dest / "extra_dir"),
+                ),
+                s(self.dest / "dir", self.dest / "file", self.dest / "link"),
+            ),
+        )
+
+    def test_replaces_other_kinds_of_entries(self):
+        self.populate()
+        self.dest_fs.create_directory(self.dest)
+        self.dest_fs.create_directory(self.dest / "file")
+        self.dest_fs.touch(self.dest.descendant("file", "child"))
+        self.dest_fs.touch(self.dest / "dir")
+
+        synced = self.sync()
+        self.assertEqual(
+            (
+                synced.removed,
+                self.dest_fs.get_contents(self.dest / "file"),
+                self.dest_fs.children(self.dest / "dir"),
+            ),
+            (s(), "contents", s(self.dest.descendant("dir", "nested"))),
+        )
+
+
+class TestSyncNonExisting(TestCase):
+    def test_source_does_not_exist(self):
+        fs = memory.FS()
+        with self.assertRaises(exceptions.FileNotFound):
+            sync(
+                source_fs=fs,
+                source_path=Path("source"),
+                dest_fs=fs,
+                dest_path=Path("dest"),
+            )
+
+
+class TestIsNative(TestCase):
+    def test_native(self):
+        self.assertEqual(
+            [
+                _is_native(fs)
+                for fs in (native.FS(), native.anchored(), memory.FS())
+            ],
+            [True, True, False],
+        )
+
+    def test_unrelated_filesystems_with_the_same_methods(self):
+        fs = memory.FS()
+        fs._at = native._at
+        self.assertFalse(_is_native(fs))
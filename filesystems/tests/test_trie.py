@@ -0,0 +1,161 @@
+from unittest import TestCase
+
+from filesystems import Path
+from filesystems._path import RelativePath
+from filesystems.trie import PathSet, PathTrie
+
+
+class TestPathTrie(TestCase):
+    def test_mapping(self):
+        trie = PathTrie({Path("a", "b"): 1, Path("a"): 2})
+        trie[Path("c")] = 3
+        trie[Path("a")] = 4
+        del trie[Path("c")]
+        self.assertEqual(
+            (dict(trie), len(trie)),
+            ({Path("a", "b"): 1, Path("a"): 4}, 2),
+        )
+
+    def test_missing(self):
+        trie = PathTrie({Path("a", "b"): 1})
+        self.assertEqual(
+            (Path("a") in trie, Path("a", "b", "c") in trie),
+            (False, False),
+        )
+
+    def test_delete_missing(self):
+        trie = PathTrie({Path("a", "b"): 1})
+        with self.assertRaises(KeyError):
+            del trie[Path("a")]
+
+    def test_delete_prunes(self):
+        trie = PathTrie({Path("a", "b", "c"): 1})
+        del trie[Path("a", "b", "c")]
+        self.assertEqual((trie._roots, len(trie)), ({}, 0))
+
+    def test_relative_paths_are_distinct(self):
+        trie = PathTrie({Path("a"): 1, RelativePath("a"): 2})
+        self.assertEqual(
+            (trie[Path("a")], trie[RelativePath("a")], len(trie)),
+            (1, 2, 2),
+        )
+
+    def test_root(self):
+        trie = PathTrie({Path.root(): 1})
+        self.assertEqual(
+            trie.longest_prefix(Path("a", "b")),
+            (Path.root(), 1),
+        )
+
+    def test_longest_prefix(self):
+        trie = PathTrie({Path("a"): 1, Path("a", "b"): 2, Path("c"): 3})
+        self.assertEqual(
+            (
+                trie.longest_prefix(Path("a", "b", "c", "d")),
+                trie.longest_prefix(Path("a", "c")),
+                trie.longest_prefix(Path("a", "b")),
+            ),
+            ((Path("a", "b"), 2), (Path("a"), 1), (Path("a", "b"), 2)),
+        )
+
+    def test_longest_prefix_missing(self):
+        trie = PathTrie({Path("a", "b"): 1})
+        with self.assertRaises(KeyError):
+            trie.longest_prefix(Path("a", "c"))
+
+    def test_longest_prefix_default(self):
+        trie = PathTrie({Path("a", "b"): 1})
+        self.assertIsNone(trie.longest_prefix(Path("a"), default=None))
+
+    def test_has_prefix(self):
+        trie = PathTrie({Path("a", "b"): 1})
+        self.assertEqual(
+            (
+                trie.has_prefix(Path("a", "b", "c")),
+                trie.has_prefix(Path("a", "b")),
+                trie.has_prefix(Path("a")),
+                trie.has_prefix(RelativePath("a", "b")),
+            ),
+            (True, True, False, False),
+        )
+
+    def test_subtree(self):
+        trie = PathTrie(
+            {
+                Path("a"): 1,
+                Path("a", "b"): 2,
+                Path("a", "b", "c"): 3,
+                Path("a", "d"): 4,
+                Path("e"): 5,
+            },
+        )
+        self.assertEqual(
+            (
+                dict(trie.subtree(Path("a", "b"))),
+                list(trie.subtree(Path("f"))),
+            ),
+            ({Path("a", "b"): 2, Path("a", "b", "c"): 3}, []),
+        )
+
+    def test_discard_subtree(self):
+        trie = PathTrie(
+            {
+                Path("a"): 1,
+                Path("a", "b"): 2,
+                Path("a", "b", "c"): 3,
+                Path("a", "d"): 4,
+            },
+        )
+        trie.discard_subtree(Path("a", "b"))
+        trie.discard_subtree(Path("f"))
+        self.assertEqual(
+            (dict(trie), len(trie)),
+            ({Path("a"): 1, Path("a", "d"): 4}, 2),
+        )
+
+    def test_discard_whole_tree(self):
+        trie = PathTrie({Path("a"): 1, Path("a", "b"): 2})
+        trie.discard_subtree(Path.root())
+        self.assertEqual((dict(trie), len(trie)), ({}, 0))
+
+
+class TestPathSet(TestCase):
+    def test_set(self):
+        paths = PathSet([Path("a"), Path("a", "b")])
+        paths.add(Path("c"))
+        paths.discard(Path("a"))
+        paths.discard(Path("d"))
+        self.assertEqual(paths, {Path("a", "b"), Path("c")})
+
+    def test_longest_prefix(self):
+        paths = PathSet([Path("a"), Path("a", "b")])
+        self.assertEqual(
+            (
+                paths.longest_prefix(Path("a", "b", "c")),
+                paths.longest_prefix(Path("d"), default=None),
+            ),
+            (Path("a", "b"), None),
+        )
+
+    def test_longest_prefix_missing(self):
+        with self.assertRaises(KeyError):
+            PathSet([Path("a")]).longest_prefix(Path("b"))
+
+    def test_has_prefix(self):
+        paths = PathSet([Path("a")])
+        self.assertEqual(
+            (paths.has_prefix(Path("a", "b")), paths.has_prefix(Path("b"))),
+            (True, False),
+        )
+
+    def test_subtree(self):
+        paths = PathSet([Path("a"), Path("a", "b"), Path("c")])
+        self.assertEqual(
+            set(paths.subtree(Path("a"))),
+            {Path("a"), Path("a", "b")},
+        )
+
+    def test_discard_subtree(self):
+        paths = PathSet([Path("a"), Path("a", "b"), Path("c")])
+        paths.discard_subtree(Path("a"))
+        self.assertEqual(paths, {Path("c")})
@@ -0,0 +1,250 @@
+"""
+Collections of paths, stored as tries of their segments.
+
+Checking whether any ancestor of a path is present in an ordinary set of
+paths means building (and hashing) each ancestor. Tries instead walk a path's
+segments once, so prefix queries take time proportional to the path's depth
+without creating any intermediate paths.
+"""
+
+from collections.abc import MutableMapping, MutableSet
+
+import attr
+
+_MISSING = object()
+
+
+@attr.s(slots=True, eq=False)
+class _Node:
+    """
+    A node within a trie, along with how many values live beneath it.
+    """
+
+    children = attr.ib(factory=dict)
+    value = attr.ib(default=_MISSING)
+    size = attr.ib(default=0)
+
+
+class PathTrie(MutableMapping):
+    """
+    A mapping from paths, supporting queries about their prefixes.
+
+    Absolute and relative paths are kept separately, so that ``Path("a")``
+    and ``RelativePath("a")`` are distinct keys.
+    """
+
+    def __init__(self, items=()):
+        self._roots = {}
+        self.update(items)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {dict(self.items())!r}>"
+
+    def __len__(self):
+        return sum(root.size for root in self._roots.values())
+
+    def __iter__(self):
+        for cls, root in list(self._roots.items()):
+            for key, _ in _items(cls(), root):
+                yield key
+
+    def __getitem__(self, path):
+        node = self._find(path)
+        if node is None or node.value is _MISSING:
+            raise KeyError(path)
+        return node.value
+
+    def __setitem__(self, path, value):
+        node = self._roots.get(path.__class__)
+        if node is None:
+            node = self._roots[path.__class__] = _Node()
+        nodes = [node]
+        for segment in path.segments:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _Node()
+            node = child
+            nodes.append(node)
+
+        if node.value is _MISSING:
+            for each in nodes:
+                each.size += 1
+        node.value = value
+
+    def __delitem__(self, path):
+        nodes = self._nodes(path)
+        if nodes is None or nodes[-1].value is _MISSING:
+            raise KeyError(path)
+        nodes[-1].value = _MISSING
+        self._prune(path, nodes, removed=1)
+
+    def _find(self, path):
+        """
+        The node for the given path, if there is one.
+        """
+        node = self._roots.get(path.__class__)
+        for segment in path.segments:
+            if node is None:
+                return None
+            node = node.children.get(segment)
+        return node
+
+    def _nodes(self, path):
+        """
+        The nodes from the root down to the given path, if it is present.
+        """
+        node = self._roots.get(path.__class__)
+        if node is None:
+            return None
+        nodes = [node]
+        for segment in path.segments:
+            node = node.children.get(segment)
+            if node is None:
+                return None
+            nodes.append(node)
+        return nodes
+
+    def _prune(self, path, nodes, removed):
+        """
+        Account for values removed from beneath the given nodes.
+        """
+        for each in nodes:
+            each.size -= removed
+        for depth in range(len(nodes) - 1, 0, -1):
+            if nodes[depth].size:
+                break
+            del nodes[depth - 1].children[path.segments[depth - 1]]
+        if not nodes[0].size:
+            del self._roots[path.__class__]
+
+    def longest_prefix(self, path, default=_MISSING):
+        """
+        Find the longest key which is the given path or one of its ancestors.
+
+        Returns the key and its value, or ``default`` if there is no such
+        key (or raises a `KeyError` if no default is given).
+        """
+        node = self._roots.get(path.__class__)
+        found = -1
+        if node is not None:
+            if node.value is not _MISSING:
+                found, value = 0, node.value
+            for depth, segment in enumerate(path.segments, 1):
+                node = node.children.get(segment)
+                if node is None:
+                    break
+                if node.value is not _MISSING:
+                    found, value = depth, node.value
+
+        if found == -1:
+            if default is _MISSING:
+                raise KeyError(path)
+            return default
+        return path.__class__(*path.segments[:found]), value
+
+    def has_prefix(self, path):
+        """
+        Is the given path, or any of its ancestors, a key?
+        """
+        node = self._roots.get(path.__class__)
+        if node is None:
+            return False
+        for segment in path.segments:
+            if node.value is not _MISSING:
+                return True
+            node = node.children.get(segment)
+            if node is None:
+                return False
+        return node.value is not _MISSING
+
+    def subtree(self, path):
+        """
+        Iterate over the items whose keys are the given path or beneath it.
+        """
+        node = self._find(path)
+        if node is None:
+            return iter(())
+        return _items(path, node)
+
+    def discard_subtree(self, path):
+        """
+        Remove the given path, and any paths beneath it (if present).
+        """
+        nodes = self._nodes(path)
+        if nodes is None:
+            return
+        nodes[-1].children.clear()
+        nodes[-1].value = _MISSING
+        self._prune(path, nodes, removed=nodes[-1].size)
+
+
+def _items(path, node):
+    """
+    Iterate over the (path, value) pairs beneath the given node, depth first.
+    """
+    if node.value is not _MISSING:
+        yield path, node.value
+    for segment, child in list(node.children.items()):
+        yield from _items(path._child(segment), child)
+
+
+class PathSet(MutableSet):
+    """
+    A set of paths, supporting queries about their prefixes.
+
+    See `PathTrie`.
+    """
+
+    def __init__(self, paths=()):
+        self._trie = PathTrie((path, None) for path in paths)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {set(self)!r}>"
+
+    def __contains__(self, path):
+        return path in self._trie
+
+    def __iter__(self):
+        return iter(self._trie)
+
+    def __len__(self):
+        return len(self._trie)
+
+    def add(self, path):
+        """
+        Add a path to this set.
+        """
+        self._trie[path] = None
+
+    def discard(self, path):
+        """
+        Remove a path from this set, if present.
+        """
+        self._trie.pop(path, None)
+
+    def longest_prefix(self, path, default=_MISSING):
+        """
+        Find the longest member which is the given path or an ancestor of it.
+        """
+        if default is _MISSING:
+            return self._trie.longest_prefix(path)[0]
+        found = self._trie.longest_prefix(path, default=None)
+        return default if found is None else found[0]
+
+    def has_prefix(self, path):
+        """
+        Is the given path, or any of its ancestors, in this set?
+        """
+        return self._trie.has_prefix(path)
+
+    def subtree(self, path):
+        """
+        Iterate over the members which are the given path or beneath it.
+        """
+        return (each for each, _ in self._trie.subtree(path))
+
+    def discard_subtree(self, path):
+        """
+        Remove the given path, and any paths beneath it (if present).
+        """
+        self._trie.discard_subtree(path)
@@ -63,6 +63,17 @@ def tests(session):
         session.run("virtue", *session.posargs, PACKAGE)
 
 
+@session(default=False)
+def perf(session):
+    """
+    Run benchmarks.
+    """
+    session.install("pyperf", ROOT)
+    benchmarks = PACKAGE / "benchmarks"
+    for each in sorted(benchmarks.glob("[!_]*.py")):
+        session.run("python", each, *session.posargs)
+
+
 @session(tags=["build"])
 def build(session):
     """